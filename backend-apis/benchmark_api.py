@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, requests: int, bust_cache: bool):
+    """
+    Sends `requests` GETs with at most `concurrency` in flight.
+    Returns (seconds, latencies, errors).
+    """
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        #A unique query parameter makes every request a response cache miss, so it reaches Neo4j
+        params = {"_bench": f"{concurrency}-{i}"} if bust_cache else None
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, latencies, errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load benchmark of the backend API: throughput and latency per concurrency level")
+    parser.add_argument("--url", default="http://127.0.0.1:8085/nodes/count-of-classes", help="Endpoint to hit")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrency levels")
+    parser.add_argument("--cached", action="store_true", help="Let the response cache answer (measures cache hits instead of Neo4j)")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        for concurrency in args.concurrency:
+            seconds, latencies, errors = await run_level(client, args.url, concurrency, args.requests, not args.cached)
+            if not latencies:
+                print(f"concurrency={concurrency}: all {errors} requests failed")
+                continue
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"concurrency={concurrency}: {len(latencies) / seconds:.1f} req/s, "
+                  f"p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, errors {errors}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
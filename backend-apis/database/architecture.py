@@ -0,0 +1,97 @@
+from typing import Dict, List, Tuple
+
+from database.dependency_graph import DependencySnapshot
+
+#Dependencies between architecture layers (Class.layer) that break the layering, with the rule they break.
+#Dependencies within a layer, and towards Dto / Entity from above, are allowed
+FORBIDDEN_LAYER_DEPENDENCIES = {
+    ("Controller", "Repository"): "Controllers go through services, not repositories",
+    ("Service", "Controller"): "Services must not depend on controllers",
+    ("Repository", "Controller"): "Repositories must not depend on controllers",
+    ("Repository", "Service"): "Repositories must not depend on services",
+    ("Entity", "Controller"): "Entities must not depend on controllers",
+    ("Entity", "Service"): "Entities must not depend on services",
+    ("Entity", "Repository"): "Entities must not depend on repositories",
+    ("Dto", "Controller"): "DTOs must not depend on controllers",
+    ("Dto", "Service"): "DTOs must not depend on services",
+    ("Dto", "Repository"): "DTOs must not depend on repositories",
+}
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_MAX_ITERATIONS = 100
+PAGERANK_TOLERANCE = 1e-6
+
+
+def dependency_cycles(snapshot: DependencySnapshot) -> List[List[int]]:
+    """Dependency cycles (strongly connected components) of the snapshot, largest first."""
+    return snapshot.memo("cycles", lambda: sorted(snapshot.cycles(), key=lambda component: (-len(component), component[0])))
+
+
+def layer_violations(snapshot: DependencySnapshot) -> List[Tuple[int, int, str]]:
+    """(source, target, rule) of every dependency between layers listed in FORBIDDEN_LAYER_DEPENDENCIES."""
+    def compute():
+        layers = snapshot.layers
+        return [(source, target, FORBIDDEN_LAYER_DEPENDENCIES[(layers[source], layers[target])])
+                for source, target in snapshot.edges()
+                if (layers[source], layers[target]) in FORBIDDEN_LAYER_DEPENDENCIES]
+    return snapshot.memo("layer_violations", compute)
+
+
+def package_coupling(snapshot: DependencySnapshot) -> List[Dict]:
+    """
+    Afferent (Ca) and efferent (Ce) coupling of every package, counted in distinct packages like
+    the ingest analytics, plus the class level dependency counts and instability Ce / (Ca + Ce).
+    """
+    def compute():
+        packages = snapshot.packages
+        coupling = {package: {"afferent": set(), "efferent": set(), "incoming": 0, "outgoing": 0}
+                    for package in packages if package is not None}
+        for source, target in snapshot.edges():
+            source_package, target_package = packages[source], packages[target]
+            if source_package is None or target_package is None or source_package == target_package:
+                continue
+            coupling[source_package]["efferent"].add(target_package)
+            coupling[source_package]["outgoing"] += 1
+            coupling[target_package]["afferent"].add(source_package)
+            coupling[target_package]["incoming"] += 1
+        rows = []
+        for package, edges in coupling.items():
+            afferent, efferent = len(edges["afferent"]), len(edges["efferent"])
+            rows.append({
+                "package_name": package,
+                "afferent": afferent,
+                "efferent": efferent,
+                "instability": round(efferent / (afferent + efferent), 3) if afferent + efferent else 0.0,
+                "incoming_dependencies": edges["incoming"],
+                "outgoing_dependencies": edges["outgoing"],
+            })
+        rows.sort(key=lambda item: (-(item["afferent"] + item["efferent"]), item["package_name"]))
+        return rows
+    return snapshot.memo("package_coupling", compute)
+
+
+def pagerank(snapshot: DependencySnapshot) -> List[float]:
+    """
+    PageRank of every class over the dependency edges, so rank flows to the classes that are
+    depended upon by other central classes. Power iteration; the rank of classes without
+    dependencies is spread evenly. Ranks sum to 1.
+    """
+    def compute():
+        size = len(snapshot)
+        if not size:
+            return []
+        #The graph does not change between iterations: in-edges and the damped share factor of every class are set up once
+        incoming = [snapshot.dependents(i).tolist() for i in range(size)]
+        factor = [PAGERANK_DAMPING / degree if degree else 0.0 for degree in map(snapshot.fan_out, range(size))]
+        dangling = [i for i in range(size) if not factor[i]]
+        rank = [1.0 / size] * size
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            share = list(map(float.__mul__, rank, factor))
+            base = (1.0 - PAGERANK_DAMPING) / size + PAGERANK_DAMPING * sum(rank[i] for i in dangling) / size
+            updated = [base + sum(map(share.__getitem__, sources)) for sources in incoming]
+            change = sum(abs(new - old) for new, old in zip(updated, rank))
+            rank = updated
+            if change < PAGERANK_TOLERANCE:
+                break
+        return rank
+    return snapshot.memo("pagerank", compute)
@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import os
+import time
+from array import array
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+#Repositories with more classes than this are not snapshotted, their queries go to Neo4j
+DEFAULT_MAX_CLASSES = 200000
+#How long the repository versions read from Neo4j are trusted before they are read again
+DEFAULT_STATE_TTL_SECONDS = 2.0
+
+
+def _csr(size: int, edges: Iterable[Tuple[int, int]]) -> Tuple[array, array]:
+    """Compressed sparse row adjacency: the neighbours of i are targets[offsets[i]:offsets[i + 1]], sorted."""
+    buckets = [[] for _ in range(size)]
+    for source, target in edges:
+        buckets[source].append(target)
+    offsets = array('l', [0])
+    targets = array('l')
+    for bucket in buckets:
+        bucket.sort()
+        targets.extend(bucket)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class DependencySnapshot:
+    """
+    In-memory, read only copy of the HAS_INTERNAL_DEPENDENCY_ON graph of one generation of
+    a repository. Classes get integer ids in class id order, edges are held as CSR arrays in
+    both directions, so closure, fan-in/fan-out, cycle and top-N questions are answered
+    without a round trip to Neo4j.
+    """
+
+    def __init__(self, repo: str, generation: int, version: int, classes: List[Dict[str, Any]],
+                 edges: List[Tuple[str, str]]):
+        self.repo = repo
+        self.generation = generation
+        self.version = version
+        classes = sorted(classes, key=lambda item: item["id"])
+        self.ids = [item["id"] for item in classes]
+        self.names = [item.get("name") for item in classes]
+        self.packages = [item.get("package") for item in classes]
+        self.layers = [item.get("layer") for item in classes]
+        self.index = {class_id: i for i, class_id in enumerate(self.ids)}
+        self._by_name = {}
+        for i, name in enumerate(self.names):
+            self._by_name.setdefault(name, []).append(i)
+
+        pairs = [(self.index[source], self.index[target]) for source, target in edges
+                 if source in self.index and target in self.index]
+        self.edge_count = len(pairs)
+        self._out_offsets, self._out_targets = _csr(len(self.ids), pairs)
+        self._in_offsets, self._in_targets = _csr(len(self.ids), ((target, source) for source, target in pairs))
+        self._components = None
+        self._memo = {}
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def memo(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Result of compute(), computed once per snapshot, i.e. once per generation and version of the repository."""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def edges(self) -> Iterable[Tuple[int, int]]:
+        """Every (source, target) dependency, by source."""
+        for source in range(len(self)):
+            for target in self.dependencies(source):
+                yield source, target
+
+    def find(self, class_name: str) -> Optional[int]:
+        """Index of a class by id, or by simple name preferring classes with a layer (defined in the code base)."""
+        if class_name in self.index:
+            return self.index[class_name]
+        candidates = self._by_name.get(class_name)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda i: (self.layers[i] is None, self.ids[i]))
+
+    def dependencies(self, i: int) -> array:
+        return self._out_targets[self._out_offsets[i]:self._out_offsets[i + 1]]
+
+    def dependents(self, i: int) -> array:
+        return self._in_targets[self._in_offsets[i]:self._in_offsets[i + 1]]
+
+    def fan_out(self, i: int) -> int:
+        return self._out_offsets[i + 1] - self._out_offsets[i]
+
+    def fan_in(self, i: int) -> int:
+        return self._in_offsets[i + 1] - self._in_offsets[i]
+
+    def traverse(self, start: int, depth: int, direction: str = "dependencies", limit: int = None, with_edges: bool = True):
+        """
+        Breadth first traversal from `start` up to `depth` hops (all of them when depth is None).
+        direction is "dependencies", "dependents" or "both". Returns (nodes, edges, truncated):
+        nodes are (index, depth, via) for every reached class at its shortest depth, via being the
+        lowest index it was reached from, edges the (source, target) dependencies between the start
+        and the reached classes (skipped when with_edges is False). At most `limit` classes, picked
+        in id order within a level.
+        """
+        steps = {"dependencies": (self.dependencies,), "dependents": (self.dependents,),
+                 "both": (self.dependencies, self.dependents)}[direction]
+        reached = {start: 0}
+        nodes = []
+        frontier = [start]
+        truncated = False
+        level = 0
+        while frontier and (depth is None or level < depth):
+            level += 1
+            candidates = {}
+            for source in frontier:
+                for step in steps:
+                    for target in step(source):
+                        if target not in reached and target not in candidates:
+                            candidates[target] = source
+            frontier = sorted(candidates)
+            if limit is not None and len(nodes) + len(frontier) > limit:
+                frontier = frontier[:limit - len(nodes)]
+                truncated = True
+            for target in frontier:
+                reached[target] = level
+                nodes.append((target, level, candidates[target]))
+            if truncated:
+                break
+        edges = [(source, target) for source in reached for target in self.dependencies(source)
+                 if target in reached] if with_edges else []
+        return nodes, edges, truncated
+
+    def closure(self, start: int, direction: str = "dependencies") -> List[int]:
+        """Every class transitively reachable from `start`, i.e. the transitive closure row of the class."""
+        return [i for i, _, _ in self.traverse(start, None, direction, with_edges=False)[0]]
+
+    def top_fan_out(self, n: int, include: Callable[[int], bool] = None) -> List[Tuple[int, int]]:
+        """(index, fan-out) of the n classes with the most dependencies, optionally only those passing include."""
+        return self._top(n, self.fan_out, include)
+
+    def top_fan_in(self, n: int, include: Callable[[int], bool] = None) -> List[Tuple[int, int]]:
+        """(index, fan-in) of the n classes with the most dependents, optionally only those passing include."""
+        return self._top(n, self.fan_in, include)
+
+    def _top(self, n: int, metric: Callable[[int], int], include: Callable[[int], bool] = None) -> List[Tuple[int, int]]:
+        counts = ((i, metric(i)) for i in range(len(self)) if include is None or include(i))
+        return [(i, count) for i, count in heapq.nlargest(n, counts, key=lambda item: item[1]) if count]
+
+    def cycles(self) -> List[List[int]]:
+        """Dependency cycles: strongly connected components with more than one class, or a self dependency."""
+        return [component for component in self._strongly_connected()
+                if len(component) > 1 or component[0] in self.dependencies(component[0])]
+
+    def component_size(self, i: int) -> int:
+        """Size of the strongly connected component of a class; above 1 means it is part of a cycle."""
+        if self._components is None:
+            components = array('l', [0]) * len(self)
+            for component in self._strongly_connected():
+                for member in component:
+                    components[member] = len(component)
+            self._components = components
+        return self._components[i]
+
+    def _strongly_connected(self) -> List[List[int]]:
+        """Tarjan's algorithm, iterative so deep dependency chains do not hit the recursion limit."""
+        size = len(self)
+        order = [-1] * size
+        low = [0] * size
+        on_stack = [False] * size
+        stack = []
+        components = []
+        counter = 0
+        for root in range(size):
+            if order[root] != -1:
+                continue
+            work = [(root, self._out_offsets[root])]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, position = work[-1]
+                if position < self._out_offsets[node + 1]:
+                    work[-1] = (node, position + 1)
+                    target = self._out_targets[position]
+                    if order[target] == -1:
+                        order[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, self._out_offsets[target]))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], order[target])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+
+
+class DependencyGraphStore:
+    """
+    Dependency snapshots of the repositories the APIs read, one per repository.
+
+    A snapshot belongs to the active generation and version of its repository. Versions are
+    read from Neo4j at most once per `state_ttl` seconds; when ingest has moved a repository
+    on, its snapshot is rebuilt by the next request that needs it (one load per repository
+    at a time, concurrent requests wait for it). Repositories larger than max_classes are not
+    snapshotted, get() returns None for them and callers query Neo4j instead.
+    """
+
+    def __init__(self, repository_states: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                 load: Callable[[str, int, int, int], Awaitable[Optional[DependencySnapshot]]],
+                 max_classes: int = None, state_ttl: float = None):
+        self.repository_states = repository_states
+        self.load = load
+        self.max_classes = max_classes or int(os.getenv("DEPENDENCY_SNAPSHOT_MAX_CLASSES", DEFAULT_MAX_CLASSES))
+        self.state_ttl = state_ttl if state_ttl is not None else float(os.getenv("GRAPH_VERSION_TTL_SECONDS", DEFAULT_STATE_TTL_SECONDS))
+        self.enabled = os.getenv("DEPENDENCY_SNAPSHOT_ENABLED", "true").lower() not in ("0", "false", "no")
+        self._snapshots = {}
+        self._states = None
+        self._states_read_at = 0.0
+        self._locks = {}
+
+    async def _current_states(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        if self._states is None or now - self._states_read_at >= self.state_ttl:
+            self._states = {state["key"]: state for state in await self.repository_states()}
+            self._states_read_at = now
+        return self._states
+
+    async def _snapshot(self, state: Dict[str, Any]) -> Optional[DependencySnapshot]:
+        key = state["key"]
+        marker = (state["generation"], state["version"])
+        cached = self._snapshots.get(key)
+        if cached is not None and cached[0] == marker:
+            return cached[1]
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            cached = self._snapshots.get(key)
+            if cached is not None and cached[0] == marker:
+                return cached[1]
+            start = time.perf_counter()
+            snapshot = await self.load(key, state["generation"], state["version"], self.max_classes)
+            #A repository over max_classes is remembered as None so it is not loaded again for this version
+            self._snapshots[key] = (marker, snapshot)
+            if snapshot is None:
+                print(f"Dependency snapshot of {key} skipped (more than {self.max_classes} classes).")
+            else:
+                print(f"Dependency snapshot of {key} loaded: {len(snapshot)} classes, {snapshot.edge_count} dependencies "
+                      f"in {time.perf_counter() - start:.2f}s.")
+            return snapshot
+
+    async def get(self, repo: Optional[str] = None) -> Optional[List[DependencySnapshot]]:
+        """
+        Up to date snapshots of the repository, or of every repository when repo is None.
+        None when snapshots are disabled or one of the repositories is not snapshotted.
+        """
+        if not self.enabled:
+            return None
+        states = await self._current_states()
+        if repo and repo not in states:
+            return []
+        selected = [states[repo]] if repo else list(states.values())
+        snapshots = []
+        for state in selected:
+            if state.get("generation") is None:
+                continue
+            snapshot = await self._snapshot(state)
+            if snapshot is None:
+                return None
+            snapshots.append(snapshot)
+        #Drop repositories that were deleted
+        for key in [key for key in self._snapshots if key not in states]:
+            del self._snapshots[key]
+        return snapshots
+
+    async def refresh(self):
+        """Loads the snapshots of every repository, e.g. at startup."""
+        self._states = None
+        await self.get()
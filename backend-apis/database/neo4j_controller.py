@@ -1,97 +1,686 @@
-from neo4j import GraphDatabase, Driver
-from typing import List, Dict, Any
-from neo4j.exceptions import ServiceUnavailable
+import asyncio
+import heapq
+import json
+import os
+from neo4j import AsyncGraphDatabase, AsyncDriver
+from typing import List, Dict, Any, Optional, AsyncIterator
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 from fastapi import HTTPException
-from models import ClassDependency, PackageClassCount, LabelCount
+from models import ClassDependency, PackageClassCount, LabelCount, Repository, AnalyticsSummary, \
+    DependencyTraversal, TraversalNode, TraversalEdge, ClassFanIn, ClassDependencyMetrics, DependencyCycle, \
+    LayerViolation, PackageCoupling, ClassCentrality, ClassDetails
+from database.dependency_graph import DependencyGraphStore, DependencySnapshot
+from database import architecture
+
+#Layout of the analytics document written by ingest (data-ingestion/graphdb/analytics.py)
+ANALYTICS_VERSION = 1
+#Rows returned by the classes with dependencies table
+TOP_DEPENDENCIES = 20
+
+#Traversal direction -> pattern from a frontier class `c` to the next class `d`
+TRAVERSAL_PATTERNS = {
+    "dependencies": "(c)-[r:HAS_INTERNAL_DEPENDENCY_ON]->(d:Class)",
+    "dependents": "(c)<-[r:HAS_INTERNAL_DEPENDENCY_ON]-(d:Class)",
+    "both": "(c)-[r:HAS_INTERNAL_DEPENDENCY_ON]-(d:Class)",
+}
+MAX_TRAVERSAL_DEPTH = 20
+MAX_TRAVERSAL_NODES = 5000
+
+#Per section caps of the class details, and the length method descriptions are clipped to
+DEFAULT_DETAIL_LIMIT = 50
+DEFAULT_DETAIL_TEXT_LIMIT = 400
+
+#Driver pool defaults, can be overridden from ENV. A request waits at most
+#NEO4J_ACQUISITION_TIMEOUT seconds for a free connection before it fails
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_ACQUISITION_TIMEOUT = 10.0
+DEFAULT_CONNECTION_TIMEOUT = 5.0
+DEFAULT_MAX_CONNECTION_LIFETIME = 3600
+#Records fetched per round trip by the streaming endpoints, bounds the memory of a stream
+DEFAULT_STREAM_FETCH_SIZE = 500
 
 class Neo4jController:
-    """Handles the connection and session management for Neo4j queries."""
-    def __init__(self, uri, user, password):
-        """Initializes the Neo4j driver."""
-        if GraphDatabase is None:
+    """
+    Handles the connection and session management for Neo4j queries.
+    Built on the async driver: queries are awaited, so a slow query does not block the
+    event loop and concurrent requests run side by side on the connection pool.
+    """
+    def __init__(self, uri, user, password, max_pool_size: int = None, acquisition_timeout: float = None):
+        """Initializes the Neo4j driver and its connection pool."""
+        if AsyncGraphDatabase is None:
             raise RuntimeError("Neo4j library is not available. Please install 'neo4j'.")
-            
-        self.driver: Driver = GraphDatabase.driver(uri, auth=(user, password))
-        print("Neo4j Driver initialized.")
 
-    def close(self):
+        self.max_pool_size = max_pool_size or int(os.getenv("NEO4J_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE))
+        self.stream_fetch_size = int(os.getenv("NEO4J_STREAM_FETCH_SIZE", DEFAULT_STREAM_FETCH_SIZE))
+        self.driver: AsyncDriver = AsyncGraphDatabase.driver(
+            uri, auth=(user, password),
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=acquisition_timeout or float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", DEFAULT_ACQUISITION_TIMEOUT)),
+            connection_timeout=float(os.getenv("NEO4J_CONNECTION_TIMEOUT", DEFAULT_CONNECTION_TIMEOUT)),
+            max_connection_lifetime=int(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", DEFAULT_MAX_CONNECTION_LIFETIME)),
+        )
+        print(f"Neo4j Driver initialized (pool size {self.max_pool_size}).")
+        #In-memory copies of the class dependency graphs, see database/dependency_graph.py
+        self.dependency_graphs = DependencyGraphStore(self._repository_states, self._load_snapshot)
+
+    async def close(self):
         """Closes the driver connection."""
-        self.driver.close()
+        await self.driver.close()
         print("Neo4j Driver closed.")
 
-    def _run_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    async def _run_query(self, query: str, parameters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
         Executes a Cypher query within a session and returns the results as a list of dictionaries.
         """
-        results = []
         try:
-            with self.driver.session() as session:
-                records = session.run(query, parameters or {})
-                for record in records:
-                    results.append(dict(record))
-            return results
-        except ServiceUnavailable as e:
-            print(f"Neo4j Service Unavailable: {e}")
-            raise HTTPException(status_code=503, detail="Could not connect to Neo4j database.")
+            async with self.driver.session() as session:
+                records = await session.run(query, parameters or {})
+                return [dict(record) async for record in records]
         except Exception as e:
-            print(f"An error occurred during query execution: {e}")
-            raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+            raise self._query_error(e)
 
-    def get_classes_with_dependencies(self) -> List[ClassDependency]:
+    async def _stream_query(self, query: str, parameters: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
         """
-        API 1 core logic: Returns table of Package Name, Class Name and Dependency Count.
+        Executes a Cypher query and yields the records as dictionaries while the driver fetches
+        them, stream_fetch_size at a time, instead of collecting the whole result first.
+        """
+        try:
+            async with self.driver.session(fetch_size=self.stream_fetch_size) as session:
+                records = await session.run(query, parameters or {})
+                async for record in records:
+                    yield dict(record)
+        except Exception as e:
+            raise self._query_error(e)
+
+    @staticmethod
+    def _query_error(e: Exception) -> HTTPException:
+        """HTTP error reported for a failed query."""
+        if isinstance(e, HTTPException):
+            return e
+        if isinstance(e, ServiceUnavailable):
+            print(f"Neo4j Service Unavailable: {e}")
+            return HTTPException(status_code=503, detail="Could not connect to Neo4j database.")
+        if isinstance(e, SessionExpired):
+            print(f"Neo4j session expired: {e}")
+            return HTTPException(status_code=503, detail="Neo4j connection lost, retry the request.")
+        print(f"An error occurred during query execution: {e}")
+        return HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+
+    @staticmethod
+    def _active(repo: Optional[str]) -> str:
+        """
+        Leading MATCH binding `repository` to one repository, or to every repository when repo is None.
+        Built into the query text (not `$repo IS NULL OR ...`) so the Repository key constraint is used.
+        """
+        return "MATCH (repository:Repository {key: $repo})" if repo else "MATCH (repository:Repository)"
+
+    @staticmethod
+    def _in_active(alias: str) -> str:
+        """
+        Cypher predicate limiting `alias` to the active generation of `repository`. A load builds
+        the next generation next to it and flips activeGeneration atomically, so readers never
+        see a partial graph. Relationships never cross generations, so filtering the node a
+        pattern starts from is enough.
+        """
+        return f"{alias}.repo = repository.key AND {alias}.generation = repository.activeGeneration"
+
+    async def get_repositories(self) -> List[Repository]:
+        """
+        Returns the repositories (name or name@branch) loaded into the graph.
         """
         cypher_query = """
-        MATCH (p:Package)-[]-(c:Class)-[r:HAS_INTERNAL_DEPENDENCY_ON]->(other:Class) 
-        RETURN p.name as package_name, c.name AS class_name, count(r) AS dependency_count 
-        ORDER BY dependency_count DESC LIMIT 20
+        MATCH (r:Repository)
+        RETURN r.key AS key, r.name AS name, r.branch AS branch, toString(r.updatedAt) AS updated_at,
+               r.activeGeneration AS active_generation, r.version AS version
+        ORDER BY r.key
+        """
+        data = await self._run_query(cypher_query)
+        return [Repository(**item) for item in data]
+
+    async def _repository_states(self) -> List[Dict[str, Any]]:
+        """Active generation and version of every repository, for the dependency snapshots."""
+        return await self._run_query("""
+        MATCH (r:Repository)
+        RETURN r.key AS key, r.activeGeneration AS generation, r.version AS version
+        """)
+
+    async def _load_snapshot(self, repo: str, generation: int, version: int, max_classes: int) -> Optional[DependencySnapshot]:
+        """
+        Reads the classes and HAS_INTERNAL_DEPENDENCY_ON edges of one generation of a repository
+        into a DependencySnapshot. None when the repository has more than max_classes classes.
         """
-        data = self._run_query(cypher_query)
+        scope = {"repo": repo, "generation": generation}
+        count = await self._run_query("MATCH (c:Class {repo: $repo, generation: $generation}) RETURN count(c) AS count", scope)
+        if count[0]["count"] > max_classes:
+            return None
+        classes = await self._run_query("""
+        MATCH (c:Class {repo: $repo, generation: $generation})
+        OPTIONAL MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN c.id AS id, c.name AS name, head(collect(p.name)) AS package, c.layer AS layer
+        """, scope)
+        edges = await self._run_query("""
+        MATCH (c:Class {repo: $repo, generation: $generation})-[:HAS_INTERNAL_DEPENDENCY_ON]->(d:Class)
+        RETURN c.id AS source, d.id AS target
+        """, scope)
+        return DependencySnapshot(repo, generation, version, classes, [(edge["source"], edge["target"]) for edge in edges])
+
+    @staticmethod
+    def _find_in_snapshots(snapshots: List[DependencySnapshot], class_name: str):
+        """(snapshot, index) of a class by id or simple name, same preference as the Cypher lookups; None when missing."""
+        found = [(snapshot, snapshot.find(class_name)) for snapshot in snapshots]
+        found = [(snapshot, i) for snapshot, i in found if i is not None]
+        if not found:
+            return None
+        return min(found, key=lambda item: (item[0].ids[item[1]] != class_name, item[0].layers[item[1]] is None, item[0].repo))
+
+    async def get_graph_version(self, repo: Optional[str] = None) -> str:
+        """
+        Version marker of the graph readers see: the key, version and active generation of
+        the repository (or of every repository). Ingest bumps Repository.version whenever
+        that changes, so the marker can key response caches and ETags.
+        """
+        cypher_query = f"""
+        {self._active(repo)}
+        RETURN repository.key AS key, repository.version AS version, repository.activeGeneration AS generation
+        ORDER BY key
+        """
+        data = await self._run_query(cypher_query, {"repo": repo})
+        return ",".join(f"{item['key']}:{item['version']}:{item['generation']}" for item in data)
+
+    async def _analytics(self, repo: Optional[str], fresh_only: bool = True) -> Optional[List[Dict[str, Any]]]:
+        """
+        Analytics documents precomputed by ingest for the repository (or every repository).
+        Returns None when one of them is missing or older than the active generation, so the
+        caller falls back to the live Cypher aggregation; with fresh_only=False those are skipped.
+        """
+        cypher_query = f"""
+        {self._active(repo)}
+        RETURN repository.analytics AS analytics,
+               repository.analyticsVersion = repository.version AS fresh
+        """
+        documents = []
+        for item in await self._run_query(cypher_query, {"repo": repo}):
+            document = json.loads(item["analytics"]) if item["analytics"] else None
+            if not item["fresh"] or document is None or document.get("analytics_version") != ANALYTICS_VERSION:
+                if fresh_only:
+                    return None
+                continue
+            documents.append(document)
+        return documents
+
+    async def get_analytics_summaries(self, repo: Optional[str] = None) -> List[AnalyticsSummary]:
+        """
+        Returns the analytics (fan-in/fan-out, layer distribution, package coupling, counts)
+        of the repository, or of every repository that has up to date analytics.
+        """
+        return [AnalyticsSummary(**document) for document in await self._analytics(repo, fresh_only=False)]
+
+    async def get_classes_with_dependencies(self, repo: Optional[str] = None, limit: int = TOP_DEPENDENCIES,
+                                            after: Optional[List[Any]] = None) -> List[ClassDependency]:
+        """
+        API 1 core logic: Returns table of Package Name, Class Name and Dependency Count.
+        Ordered by dependency count (descending), repo and class id; `after` is the
+        [dependency_count, repo, class_id] of the last row of the previous page.
+        """
+        after_key = None if after is None else (-after[0], after[1] or "", after[2] or "")
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            candidates = (((-snapshot.fan_out(i), snapshot.repo, snapshot.ids[i]), snapshot, i)
+                          for snapshot in snapshots for i in range(len(snapshot))
+                          if snapshot.packages[i] is not None and snapshot.fan_out(i))
+            page = heapq.nsmallest(limit, (row for row in candidates if after_key is None or row[0] > after_key),
+                                   key=lambda row: row[0])
+            return [ClassDependency(package_name=snapshot.packages[i], class_name=snapshot.names[i], class_id=snapshot.ids[i],
+                                    repo=snapshot.repo, dependency_count=-key[0]) for key, snapshot, i in page]
+
+        #The analytics document only holds the top of the ranking
+        summaries = await self._analytics(repo) if after is None and limit <= TOP_DEPENDENCIES else None
+        if summaries is not None:
+            rows = [dict(item, repo=summary["repo"]) for summary in summaries for item in summary["classes_with_dependencies"]]
+            rows.sort(key=lambda item: (-item["dependency_count"], item["repo"], item["class_id"] or ""))
+            return [ClassDependency(**item) for item in rows[:limit]]
+
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (p:Package)<-[:BELONGS_TO_PACKAGE]-(c:Class)-[r:HAS_INTERNAL_DEPENDENCY_ON]->(other:Class) 
+        WHERE {self._in_active('c')}
+        WITH p, c, count(r) AS dependency_count
+        WHERE $after_count IS NULL OR dependency_count < $after_count
+           OR (dependency_count = $after_count AND (c.repo > $after_repo OR (c.repo = $after_repo AND c.id > $after_id)))
+        RETURN p.name as package_name, c.name AS class_name, c.id AS class_id, c.repo AS repo, dependency_count 
+        ORDER BY dependency_count DESC, repo, class_id LIMIT $limit
+        """
+        data = await self._run_query(cypher_query, {
+            "repo": repo, "limit": limit,
+            "after_count": after[0] if after else None, "after_repo": after[1] if after else None,
+            "after_id": after[2] if after else None,
+        })
         return [ClassDependency(**item) for item in data]
 
-    def get_number_of_classes_per_package(self) -> List[PackageClassCount]:
+    async def get_number_of_classes_per_package(self, repo: Optional[str] = None, limit: int = None,
+                                                after: Optional[List[Any]] = None) -> List[PackageClassCount]:
         """
         API 2 core logic: Returns list of packages and the count of classes in them.
+        Ordered by class count (descending) and package name; `after` is the
+        [class_count, package_name] of the last row of the previous page.
         """
-        cypher_query = """
+        summaries = await self._analytics(repo)
+        if summaries is not None:
+            counts = {}
+            for summary in summaries:
+                for item in summary["classes_per_package"]:
+                    counts[item["package_name"]] = counts.get(item["package_name"], 0) + item["class_count"]
+            rows = sorted(((-count, name) for name, count in counts.items()
+                           if after is None or (-count, name) > (-after[0], after[1])))
+            return [PackageClassCount(package_name=name, class_count=-count) for count, name in rows[:limit]]
+
+        cypher_query = f"""
+        {self._active(repo)}
         MATCH (c:Class)-[:BELONGS_TO_PACKAGE]->(p:Package) 
-        RETURN p.name AS package_name, count(c) AS class_count 
-        ORDER BY class_count DESC
+        WHERE {self._in_active('c')}
+        WITH p.name AS package_name, count(c) AS class_count
+        WHERE $after_count IS NULL OR class_count < $after_count OR (class_count = $after_count AND package_name > $after_name)
+        RETURN package_name, class_count 
+        ORDER BY class_count DESC, package_name
+        {"LIMIT $limit" if limit else ""}
         """
-        data = self._run_query(cypher_query)
+        data = await self._run_query(cypher_query, {
+            "repo": repo, "limit": limit,
+            "after_count": after[0] if after else None, "after_name": after[1] if after else None,
+        })
         return [PackageClassCount(**item) for item in data]
-    
 
-    def get_size_by_type(self) -> List[LabelCount]:
+    async def get_size_by_type(self, repo: Optional[str] = None, limit: int = None,
+                               after: Optional[List[Any]] = None) -> List[LabelCount]:
         """
-        API 3 core logic: Returns list of node labels and their counts.
+        API 3 core logic: Returns list of node labels and their counts, ordered by label;
+        `after` is the [label] of the last row of the previous page.
         """
-        cypher_query = """
+        summaries = await self._analytics(repo)
+        if summaries is not None:
+            counts = {}
+            for summary in summaries:
+                for item in summary["node_counts"]:
+                    counts[item["label"]] = counts.get(item["label"], 0) + item["count"]
+            labels = sorted(label for label in counts if after is None or label > after[0])
+            return [LabelCount(label=label, count=counts[label]) for label in labels[:limit]]
+
+        cypher_query = f"""
+            {self._active(repo)}
             MATCH (n) 
-            RETURN labels(n)[0] AS label, COUNT(n) AS count
+            WHERE {self._in_active('n')}
+            WITH labels(n)[0] AS label, COUNT(n) AS count
+            WHERE $after_label IS NULL OR label > $after_label
+            RETURN label, count
+            ORDER BY label
+            {"LIMIT $limit" if limit else ""}
         """
-        data = self._run_query(cypher_query)
+        data = await self._run_query(cypher_query, {"repo": repo, "limit": limit, "after_label": after[0] if after else None})
         return [LabelCount(**item) for item in data]
     
-    def get_total_classes(self) -> int:
+    async def stream_classes_with_dependencies(self, repo: Optional[str] = None, limit: int = None) -> AsyncIterator[ClassDependency]:
+        """
+        Every class with at least one internal dependency and its dependency count, unordered.
+        Counted per class with a pattern comprehension rather than an aggregation, so the first
+        rows are sent before the whole graph has been read.
         """
-        Returns the total number of Class nodes in the database.
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class) WHERE {self._in_active('c')}
+        WITH c, size([(c)-[:HAS_INTERNAL_DEPENDENCY_ON]->(:Class) | 1]) AS dependency_count
+        WHERE dependency_count > 0
+        MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN p.name AS package_name, c.name AS class_name, c.id AS class_id, c.repo AS repo, dependency_count
+        {"LIMIT $limit" if limit else ""}
         """
-        cypher_query = "MATCH (c:Class) RETURN count(c) AS total_classes"
-        data = self._run_query(cypher_query)
+        async for item in self._stream_query(cypher_query, {"repo": repo, "limit": limit}):
+            yield ClassDependency(**item)
+
+    async def stream_classes_per_package(self, repo: Optional[str] = None, limit: int = None) -> AsyncIterator[PackageClassCount]:
+        """
+        Every package with its class count, one row per repository and package, unordered and
+        streamed like stream_classes_with_dependencies.
+        """
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (p:Package) WHERE {self._in_active('p')}
+        WITH p, size([(p)<-[:BELONGS_TO_PACKAGE]-(:Class) | 1]) AS class_count
+        WHERE class_count > 0
+        RETURN p.name AS package_name, p.repo AS repo, class_count
+        {"LIMIT $limit" if limit else ""}
+        """
+        async for item in self._stream_query(cypher_query, {"repo": repo, "limit": limit}):
+            yield PackageClassCount(**item)
+
+    async def get_total_classes(self, repo: Optional[str] = None) -> int:
+        """
+        Returns the total number of Class nodes in the database (or in one repository).
+        """
+        summaries = await self._analytics(repo)
+        if summaries is not None:
+            return sum(summary["total_classes"] for summary in summaries)
+        cypher_query = f"{self._active(repo)} MATCH (c:Class) WHERE {self._in_active('c')} RETURN count(c) AS total_classes"
+        data = await self._run_query(cypher_query, {"repo": repo})
         return data[0]['total_classes'] if data else 0
     
-    def get_class_details(self, class_name: str) -> Dict[str, Any]:
+    async def get_class_details(self, class_name: str, repo: Optional[str] = None, limit: int = DEFAULT_DETAIL_LIMIT,
+                                text_limit: int = DEFAULT_DETAIL_TEXT_LIMIT, include_pseudo_code: bool = False) -> ClassDetails:
         """
-        Returns detailed information about a specific class.
+        Returns a class and its direct neighbourhood: package, file, annotations, fields, methods
+        (with parameters, annotations, exceptions), dependencies, dependents and external dependencies.
+        class_name can be the fully qualified id (com.app.UserService) or the simple name;
+        for an ambiguous simple name the class defined in the code base wins over stubs.
+
+        One subquery per relationship type picks only the listed properties, so neighbours are
+        not multiplied with each other or returned as whole nodes. Each list holds the first
+        `limit` entries in a stable order (by name, or id for classes) so the same graph always
+        gives the same details; method descriptions are clipped to text_limit characters and
+        pseudo code is left out unless include_pseudo_code is set.
         """
-        cypher_query = """
-        MATCH (c:Class {name : $class_name})
-        OPTIONAL MATCH (source)-[r1]-(c)
-        OPTIONAL MATCH (c)-[r2]-(target)
-        RETURN c, collect(DISTINCT source), collect(DISTINCT target) 
+        dependency = "{class_id: d.id, class_name: d.name, package_name: head([(d)-[:BELONGS_TO_PACKAGE]->(p:Package) | p.name])}"
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class) WHERE (c.id = $class_name OR c.name = $class_name) AND {self._in_active('c')}
+        WITH c ORDER BY c.id = $class_name DESC, c.layer IS NULL LIMIT 1
+        CALL {{
+            WITH c
+            MATCH (c)-[:HAS_ANNOTATION]->(a:Annotation)
+            WITH a ORDER BY a.name LIMIT $limit
+            RETURN collect(a.name) AS annotations
+        }}
+        CALL {{
+            WITH c
+            MATCH (c)-[:HAS_FIELD]->(f:Field)
+            WITH f ORDER BY f.name, f.id LIMIT $limit
+            RETURN collect({{
+                name: f.name, type: f.type, is_primary_key: f.isPrimaryKey, is_public: f.isPublic, is_static: f.isStatic,
+                annotations: [(f)-[:HAS_ANNOTATION]->(a:Annotation) | a.name]
+            }}) AS fields
+        }}
+        CALL {{
+            WITH c
+            MATCH (c)-[:HAS_METHOD]->(m:Method)
+            WITH m ORDER BY m.name, m.id LIMIT $limit
+            RETURN collect({{
+                name: m.name, return_type: m.returnType,
+                parameters: [(m)-[:HAS_PARAMETER]->(pa:Parameter) | pa.name + ': ' + coalesce(pa.type, '?')],
+                annotations: [(m)-[:HAS_ANNOTATION]->(a:Annotation) | a.name],
+                exceptions: [(m)-[:THROWS_EXCEPTION]->(e:Exception) | e.name],
+                description: left(m.description, $text_limit),
+                pseudo_code: CASE WHEN $include_pseudo_code THEN left(m.pseudoCode, $text_limit) END
+            }}) AS methods
+        }}
+        CALL {{
+            WITH c
+            MATCH (c)-[:HAS_INTERNAL_DEPENDENCY_ON]->(d:Class)
+            WITH d ORDER BY d.id LIMIT $limit
+            RETURN collect({dependency}) AS dependencies
+        }}
+        CALL {{
+            WITH c
+            MATCH (c)<-[:HAS_INTERNAL_DEPENDENCY_ON]-(d:Class)
+            WITH d ORDER BY d.id LIMIT $limit
+            RETURN collect({dependency}) AS dependents
+        }}
+        CALL {{
+            WITH c
+            MATCH (c)-[:HAS_EXTERNAL_DEPENDENCY_ON]->(d:Class)
+            WITH d ORDER BY d.id LIMIT $limit
+            RETURN collect({dependency}) AS external_dependencies
+        }}
+        RETURN c.id AS class_id, c.name AS class_name, c.repo AS repo, c.layer AS layer, c.file_name AS file_name,
+               c.functionalitySummary AS summary,
+               head([(c)-[:BELONGS_TO_PACKAGE]->(p:Package) | p.name]) AS package_name,
+               head([(f:File)-[:DEFINES_CLASS]->(c) | f.path]) AS file_path,
+               annotations, fields, methods, dependencies, dependents, external_dependencies,
+               size([(c)-[:HAS_FIELD]->(:Field) | 1]) AS field_count,
+               size([(c)-[:HAS_METHOD]->(:Method) | 1]) AS method_count,
+               size([(c)-[:HAS_INTERNAL_DEPENDENCY_ON]->(:Class) | 1]) AS dependency_count,
+               size([(c)<-[:HAS_INTERNAL_DEPENDENCY_ON]-(:Class) | 1]) AS dependent_count,
+               size([(c)-[:HAS_EXTERNAL_DEPENDENCY_ON]->(:Class) | 1]) AS external_dependency_count
         """
-        data = self._run_query(cypher_query, {"class_name": class_name})
+        data = await self._run_query(cypher_query, {
+            "class_name": class_name, "repo": repo, "limit": limit, "text_limit": text_limit,
+            "include_pseudo_code": include_pseudo_code,
+        })
         if not data:
             raise HTTPException(status_code=404, detail="Class not found.")
-        return data[0]
\ No newline at end of file
+        return ClassDetails(**data[0])
+
+    async def get_dependency_traversal(self, class_name: str, repo: Optional[str] = None, depth: int = 4,
+                                       direction: str = "dependencies", limit: int = 500) -> DependencyTraversal:
+        """
+        Breadth first traversal of HAS_INTERNAL_DEPENDENCY_ON from a class, one parameterised
+        query per level. Every reachable class is returned once, at its shortest depth, instead
+        of once per path, and the dependency edges between the returned classes are listed.
+        direction is "dependencies" (what the class uses), "dependents" (what uses it) or "both".
+        Stops after `limit` classes and reports truncated.
+        """
+        if direction not in TRAVERSAL_PATTERNS:
+            raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(TRAVERSAL_PATTERNS)}")
+        depth = max(1, min(int(depth), MAX_TRAVERSAL_DEPTH))
+        limit = max(1, min(int(limit), MAX_TRAVERSAL_NODES))
+
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            found = self._find_in_snapshots(snapshots, class_name)
+            if found is None:
+                raise HTTPException(status_code=404, detail="Class not found.")
+            snapshot, start = found
+            reached, edges, truncated = snapshot.traverse(start, depth, direction, limit)
+
+            def node(i: int, level: int, via: Optional[int]) -> TraversalNode:
+                return TraversalNode(class_id=snapshot.ids[i], class_name=snapshot.names[i], package_name=snapshot.packages[i],
+                                     layer=snapshot.layers[i], depth=level, via=None if via is None else snapshot.ids[via])
+            return DependencyTraversal(
+                root=node(start, 0, None), repo=snapshot.repo, direction=direction, max_depth=depth, truncated=truncated,
+                nodes=[node(i, level, via) for i, level, via in reached],
+                edges=sorted((TraversalEdge(source=snapshot.ids[source], target=snapshot.ids[target]) for source, target in edges),
+                             key=lambda edge: (edge.source, edge.target)),
+            )
+
+        start_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class) WHERE (c.id = $class_name OR c.name = $class_name) AND {self._in_active('c')}
+        WITH c ORDER BY c.id = $class_name DESC, c.layer IS NULL LIMIT 1
+        OPTIONAL MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN c.id AS class_id, c.name AS class_name, p.name AS package_name, c.layer AS layer,
+               c.repo AS repo, c.generation AS generation
+        """
+        data = await self._run_query(start_query, {"class_name": class_name, "repo": repo})
+        if not data:
+            raise HTTPException(status_code=404, detail="Class not found.")
+        start = data[0]
+        root = TraversalNode(class_id=start["class_id"], class_name=start["class_name"],
+                             package_name=start["package_name"], layer=start["layer"], depth=0)
+
+        #Only classes not reached yet, in id order like the snapshot; one row past the
+        #remaining room tells whether the level had more classes than fit
+        level_query = f"""
+        UNWIND $frontier AS source_id
+        MATCH (c:Class {{repo: $repo, generation: $generation, id: source_id}})
+        MATCH {TRAVERSAL_PATTERNS[direction]}
+        WHERE NOT d.id IN $visited
+        WITH d, min(source_id) AS via
+        ORDER BY d.id LIMIT $row_limit
+        OPTIONAL MATCH (d)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN d.id AS class_id, d.name AS class_name, p.name AS package_name, d.layer AS layer, via
+        ORDER BY class_id
+        """
+        edge_query = """
+        UNWIND $ids AS source_id
+        MATCH (c:Class {repo: $repo, generation: $generation, id: source_id})-[:HAS_INTERNAL_DEPENDENCY_ON]->(d:Class)
+        WHERE d.id IN $ids
+        RETURN DISTINCT c.id AS source, d.id AS target
+        """
+        visited = [root.class_id]
+        nodes: List[TraversalNode] = []
+        frontier = [root.class_id]
+        truncated = False
+        for level in range(1, depth + 1):
+            if not frontier:
+                break
+            remaining = limit - len(nodes)
+            rows = await self._run_query(level_query, {
+                "frontier": frontier, "visited": visited, "repo": start["repo"], "generation": start["generation"],
+                "row_limit": remaining + 1,
+            })
+            if len(rows) > remaining:
+                rows = rows[:remaining]
+                truncated = True
+            frontier = [row["class_id"] for row in rows]
+            visited.extend(frontier)
+            nodes.extend(TraversalNode(class_id=row["class_id"], class_name=row["class_name"], package_name=row["package_name"],
+                                       layer=row["layer"], depth=level, via=row["via"]) for row in rows)
+            if truncated:
+                break
+
+        #Every dependency between the returned classes, not only those followed by the walk
+        edges = await self._run_query(edge_query, {"ids": visited, "repo": start["repo"], "generation": start["generation"]})
+        return DependencyTraversal(
+            root=root, repo=start["repo"], direction=direction, max_depth=depth, truncated=truncated, nodes=nodes,
+            edges=[TraversalEdge(source=edge["source"], target=edge["target"])
+                   for edge in sorted(edges, key=lambda edge: (edge["source"], edge["target"]))],
+        )
+
+    async def get_classes_with_dependents(self, repo: Optional[str] = None, limit: int = TOP_DEPENDENCIES) -> List[ClassFanIn]:
+        """
+        Returns the classes most depended upon (fan-in), with their package and dependent count.
+        """
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            rows = [ClassFanIn(package_name=snapshot.packages[i], class_name=snapshot.names[i], class_id=snapshot.ids[i],
+                               repo=snapshot.repo, dependent_count=count)
+                    for snapshot in snapshots for i, count in snapshot.top_fan_in(limit)]
+            rows.sort(key=lambda item: item.dependent_count, reverse=True)
+            return rows[:limit]
+
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class)<-[r:HAS_INTERNAL_DEPENDENCY_ON]-(:Class)
+        WHERE {self._in_active('c')}
+        WITH c, count(r) AS dependent_count
+        ORDER BY dependent_count DESC LIMIT $limit
+        OPTIONAL MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN p.name AS package_name, c.name AS class_name, c.id AS class_id, c.repo AS repo, dependent_count
+        ORDER BY dependent_count DESC
+        """
+        data = await self._run_query(cypher_query, {"repo": repo, "limit": limit})
+        return [ClassFanIn(**item) for item in data]
+
+    async def get_class_dependency_metrics(self, class_name: str, repo: Optional[str] = None) -> ClassDependencyMetrics:
+        """
+        Returns fan-in, fan-out, the number of classes the class transitively depends on / is
+        depended upon by, and the size of the dependency cycle it is part of. The transitive
+        counts and cycle size come from the dependency snapshot only.
+        """
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            found = self._find_in_snapshots(snapshots, class_name)
+            if found is None:
+                raise HTTPException(status_code=404, detail="Class not found.")
+            snapshot, i = found
+            return ClassDependencyMetrics(
+                class_id=snapshot.ids[i], class_name=snapshot.names[i], package_name=snapshot.packages[i],
+                layer=snapshot.layers[i], repo=snapshot.repo, fan_in=snapshot.fan_in(i), fan_out=snapshot.fan_out(i),
+                transitive_dependencies=len(snapshot.closure(i, "dependencies")),
+                transitive_dependents=len(snapshot.closure(i, "dependents")),
+                cycle_size=snapshot.component_size(i),
+            )
+
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class) WHERE (c.id = $class_name OR c.name = $class_name) AND {self._in_active('c')}
+        WITH c ORDER BY c.id = $class_name DESC, c.layer IS NULL LIMIT 1
+        OPTIONAL MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN c.id AS class_id, c.name AS class_name, head(collect(p.name)) AS package_name, c.layer AS layer, c.repo AS repo,
+               size([(c)<-[:HAS_INTERNAL_DEPENDENCY_ON]-(:Class) | 1]) AS fan_in,
+               size([(c)-[:HAS_INTERNAL_DEPENDENCY_ON]->(:Class) | 1]) AS fan_out
+        """
+        data = await self._run_query(cypher_query, {"class_name": class_name, "repo": repo})
+        if not data:
+            raise HTTPException(status_code=404, detail="Class not found.")
+        return ClassDependencyMetrics(**data[0])
+
+    async def _require_snapshots(self, repo: Optional[str]) -> List[DependencySnapshot]:
+        """Dependency snapshots of the repository (or every repository); 503 when they are disabled or too large."""
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is None:
+            raise HTTPException(status_code=503, detail="This analysis needs the dependency snapshot, which is disabled or too large for this repository.")
+        return snapshots
+
+    async def get_dependency_cycles(self, repo: Optional[str] = None, limit: int = 50, member_limit: int = 200) -> List[DependencyCycle]:
+        """
+        Returns the dependency cycles (strongly connected components) of the class graph, largest first.
+        Computed once per generation of a repository.
+        """
+        cycles = []
+        for snapshot in await self._require_snapshots(repo):
+            for component in await asyncio.to_thread(architecture.dependency_cycles, snapshot):
+                cycles.append(DependencyCycle(
+                    repo=snapshot.repo, size=len(component),
+                    class_ids=[snapshot.ids[i] for i in component[:member_limit]],
+                    packages=sorted({snapshot.packages[i] for i in component if snapshot.packages[i] is not None}),
+                ))
+        cycles.sort(key=lambda cycle: cycle.size, reverse=True)
+        return cycles[:limit]
+
+    async def get_layer_violations(self, repo: Optional[str] = None, limit: int = 500) -> List[LayerViolation]:
+        """
+        Returns the class dependencies that break the layering rules (architecture.FORBIDDEN_LAYER_DEPENDENCIES),
+        e.g. a Repository depending on a Controller.
+        """
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            violations = []
+            for snapshot in snapshots:
+                for source, target, rule in await asyncio.to_thread(architecture.layer_violations, snapshot):
+                    violations.append(LayerViolation(
+                        repo=snapshot.repo, rule=rule,
+                        source_class_id=snapshot.ids[source], source_class_name=snapshot.names[source], source_layer=snapshot.layers[source],
+                        target_class_id=snapshot.ids[target], target_class_name=snapshot.names[target], target_layer=snapshot.layers[target],
+                    ))
+                    if len(violations) >= limit:
+                        return violations
+            return violations
+
+        cypher_query = f"""
+        {self._active(repo)}
+        MATCH (c:Class)-[:HAS_INTERNAL_DEPENDENCY_ON]->(d:Class)
+        WHERE {self._in_active('c')} AND [c.layer, d.layer] IN $forbidden
+        RETURN c.repo AS repo, c.id AS source_class_id, c.name AS source_class_name, c.layer AS source_layer,
+               d.id AS target_class_id, d.name AS target_class_name, d.layer AS target_layer
+        ORDER BY repo, source_class_id, target_class_id LIMIT $limit
+        """
+        data = await self._run_query(cypher_query, {"repo": repo, "limit": limit,
+                                                    "forbidden": [list(pair) for pair in architecture.FORBIDDEN_LAYER_DEPENDENCIES]})
+        return [LayerViolation(rule=architecture.FORBIDDEN_LAYER_DEPENDENCIES[(item["source_layer"], item["target_layer"])], **item)
+                for item in data]
+
+    async def get_package_coupling(self, repo: Optional[str] = None) -> List[PackageCoupling]:
+        """
+        Returns afferent / efferent coupling and instability of every package. Without a dependency
+        snapshot the (top N) coupling of the ingest analytics document is returned.
+        """
+        snapshots = await self.dependency_graphs.get(repo)
+        if snapshots is not None:
+            return [PackageCoupling(repo=snapshot.repo, **item)
+                    for snapshot in snapshots for item in await asyncio.to_thread(architecture.package_coupling, snapshot)]
+        return [PackageCoupling(repo=summary["repo"], **item)
+                for summary in await self._analytics(repo, fresh_only=False) for item in summary["package_coupling"]]
+
+    async def get_class_centrality(self, repo: Optional[str] = None, limit: int = 20) -> List[ClassCentrality]:
+        """
+        Returns the most central classes by PageRank over the dependency graph, i.e. the classes
+        much of the code base transitively relies on. Computed once per generation of a repository.
+        """
+        rows = []
+        for snapshot in await self._require_snapshots(repo):
+            ranks = await asyncio.to_thread(architecture.pagerank, snapshot)
+            top = sorted(range(len(ranks)), key=lambda i: ranks[i], reverse=True)[:limit]
+            rows.extend(ClassCentrality(
+                repo=snapshot.repo, class_id=snapshot.ids[i], class_name=snapshot.names[i], package_name=snapshot.packages[i],
+                layer=snapshot.layers[i], pagerank=round(ranks[i], 6), fan_in=snapshot.fan_in(i), fan_out=snapshot.fan_out(i),
+            ) for i in top)
+        rows.sort(key=lambda row: row.pagerank, reverse=True)
+        return rows[:limit]
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = ".description_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_AGE_DAYS = 30
+#Eviction runs after this many writes
+EVICT_EVERY = 100
+#How long a call waits for another worker's write lock
+DEFAULT_BUSY_TIMEOUT_SECONDS = 5
+
+def _stable(value: Any):
+    """
+    JSON friendly, order independent form of the class details (ClassDetails as a dict), so the
+    same neighbourhood read twice gives the same value whatever order Neo4j returned it in.
+    """
+    if isinstance(value, dict):
+        return {str(k): _stable(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_stable(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def neighbourhood_hash(class_details: Dict[str, Any]) -> str:
+    """Content hash of a class and its graph neighbourhood (the get_class_details output, as a dict)."""
+    payload = json.dumps(_stable(class_details), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DescriptionCache:
+    """
+    Persistent SQLite cache of generated class descriptions, shared by every API worker
+    using the same file.
+
+    Keys are SHA-256 of class id, neighbourhood hash, language, model and prompt version,
+    so a description is generated once per change of the class's graph data and stale
+    entries are simply never asked for again. Those age out: entries older than max age
+    are dropped and the least recently used ones beyond max_entries are evicted.
+
+    get/put/evict are coroutines running the SQLite work in a thread, so the event loop
+    never waits on the file. Hits do not write: their access times are kept in memory and
+    written with the next put or eviction.
+    """
+
+    def __init__(self, model_name: str, prompt_version: str, path: str = None,
+                 max_entries: int = None, max_age_days: int = None):
+        self.path = path or os.getenv("DESCRIPTION_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries or int(os.getenv("DESCRIPTION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.max_age_seconds = (max_age_days or int(os.getenv("DESCRIPTION_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS))) * 24 * 3600
+        self._salt = f"{model_name}\0{prompt_version}"
+        self._lock = threading.Lock()
+        self._writes = 0
+        #key -> access time of hits not written yet
+        self._touched = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=DEFAULT_BUSY_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS descriptions (
+                key TEXT PRIMARY KEY,
+                class_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS descriptions_accessed ON descriptions (accessed_at);
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    def key(self, class_id: str, neighbourhood: str, language: str) -> str:
+        return hashlib.sha256(f"{class_id}\0{neighbourhood}\0{language.lower()}\0{self._salt}".encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, class_id: str, language: str, content: str):
+        await asyncio.to_thread(self._put, key, class_id, language, content)
+
+    async def evict(self) -> int:
+        """
+        Removes entries older than max age, then the least recently used ones until at
+        most max_entries are left. Returns the number of removed entries.
+        """
+        return await asyncio.to_thread(self._evict)
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT content, created_at FROM descriptions WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            self.hits += 1
+        return row[0]
+
+    def _flush_touched(self):
+        #Called with the lock held, committed by the caller
+        if self._touched:
+            self._conn.executemany("UPDATE descriptions SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self._touched.items()])
+            self._touched.clear()
+
+    def _put(self, key: str, class_id: str, language: str, content: str):
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute("""
+                INSERT OR REPLACE INTO descriptions (key, class_id, language, content, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, class_id, language.lower(), content, now, now))
+            self._conn.commit()
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self._evict()
+
+    def _evict(self) -> int:
+        with self._lock:
+            self._flush_touched()
+            removed = self._conn.execute("DELETE FROM descriptions WHERE created_at < ?",
+                                         (time.time() - self.max_age_seconds,)).rowcount
+            removed += self._conn.execute("""
+                DELETE FROM descriptions WHERE key NOT IN (
+                    SELECT key FROM descriptions ORDER BY accessed_at DESC LIMIT ?
+                )
+            """, (self.max_entries,)).rowcount
+            self._conn.commit()
+        return removed
@@ -1,7 +1,7 @@
 import os
 import json
+import asyncio
 from typing import Dict, Any, Optional
-from functools import lru_cache
 
 # LangChain imports for Google Generative AI
 # Switched from langchain_google_vertexai to langchain_google_genai
@@ -9,6 +9,11 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.exceptions import OutputParserException # A common exception to catch
 
+from genai.description_cache import DescriptionCache, neighbourhood_hash
+
+#Bump when the description / translation prompts change, it is part of the cache key
+DESCRIPTION_PROMPT_VERSION = "2"
+
 """
     A class to interface with the ChatVertexAI LLM model for processing raw data
     into natural language descriptions.
@@ -25,9 +30,14 @@ class GenAIProcessor:
                               defaults to 'gemini-2.5-flash'.
             **kwargs: Additional parameters passed to the ChatGoogleGenerativeAI constructor.
         """
+        # Generations in flight by cache key
+        self._inflight: Dict[str, asyncio.Future] = {}
+
         # Read model name from environment if not provided
         if model_name is None:
             model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash")
+        # Generated descriptions survive restarts and are shared by the API workers
+        self.cache = DescriptionCache(model_name=model_name, prompt_version=DESCRIPTION_PROMPT_VERSION)
         print(f"Initializing ChatGoogleGenerativeAI with model: {model_name}...")
         try:
             self.llm = ChatGoogleGenerativeAI(model=model_name, **kwargs)
@@ -37,31 +47,102 @@ class GenAIProcessor:
             self.llm = None
             raise RuntimeError("Failed to initialize ChatGoogleGenerativeAI. Check your GEMINI_API_KEY and GEMINI_MODEL_NAME environment variables.")
 
-    @staticmethod
-    @lru_cache(maxsize=128)
-    def _cached_description(class_name: str, neo4j_description: str, language: str) -> str:
+    async def _flight(self, key, generate):
+        """
+        Returns the task producing the description for `key`: a finished one when it is
+        cached, the in-flight one when an identical request is already generating it, or a
+        new task running generate(). Concurrent identical requests share one LLM call.
+        """
+        cached = await self.cache.get(key)
+        if cached is not None:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(cached)
+            return done
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(generate())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _generate(self, key, class_id: str, language: str, messages, what: str, fallback: str) -> str:
         """
-        Internal static method for caching LLM results.
+        One LLM call. The content is cached under key; on failure the fallback text is
+        returned and nothing is cached, so the next request tries again.
         """
-        # This method will be called by get_class_description
-        # The actual LLM call should be done in the instance method, so we just return a placeholder here.
-        # This is a stub, actual caching logic is in get_class_description.
-        return ""
+        print(f"\n--- Invoking LLM for {what} ---")
+        try:
+            response = await self.llm.ainvoke(messages)
+            print(f"LLM call successful ({what}).")
+            print(f"LLM response text: {response.content}")
+            await self.cache.put(key, class_id, language, response.content)
+            return response.content
+        except (Exception, OutputParserException) as e:
+            print(f"An error occurred during LLM call for {what}: {type(e).__name__}. Returning the fallback.")
+            print(f"Exception details: {e}")
+            return fallback
 
-    def get_class_description(
+    @staticmethod
+    def _description_messages(class_name: str, neo4j_description, language: str):
+        # System prompt for the business description, written directly in `language`
+        system_prompt = (
+           "You are an expert documentation assistant. Your task is to analyze the "
+            "provided raw database output describing a class/node structure and rewrite "
+            "it into a clear, concise, and natural language description suitable for "
+            f"business analyst in {language}."
+            "Focus on the functional description, business rules, and avoid technical jargon."
+        )
+        user_query = (
+            f"Class Name: {class_name}\n\n"
+            f"Raw Database Data:\n---\n{GenAIProcessor._render(neo4j_description)}\n---\n\n"
+            f"Based on the data above, generate the final, detailed description in {language}."
+        )
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_query)]
+
+    @staticmethod
+    def _render(neo4j_description: Dict[str, Any]) -> str:
+        """Class details as compact JSON for the prompt."""
+        return json.dumps(neo4j_description, ensure_ascii=False, separators=(",", ":"), default=str)
+
+    @staticmethod
+    def _translation_messages(class_name: str, english_content: str, language: str):
+        system_prompt_translate = (
+            f"You are a professional translator and business analyst. Translate the following business-oriented class description into {language} for a non-technical stakeholder. "
+            "Preserve technical names as references unless there is an industry-standard translation. "
+            "Translate all explanatory text with high fluency and precision, maintaining a formal and clear register. "
+            "Do not add any introductory or concluding commentary. Only return the translated, structured summary."
+        )
+        user_query_translate = (
+            f"Class Name: {class_name}\n\n"
+            f"Business Description (English):\n{english_content}\n\n"
+            f"Target Language: {language}\n"
+        )
+        return [SystemMessage(content=system_prompt_translate), HumanMessage(content=user_query_translate)]
+
+    async def get_class_description(
         self,
         class_name: str,
-        neo4j_description: str,
-        language: str = "english"
+        neo4j_description: Dict[str, Any],
+        language: str = "english",
+        repo: Optional[str] = None
     ) -> str:
         """
-        Processes raw Neo4j output describing a class and generates a natural
+        Processes the class details read from Neo4j and generates a natural
         language description using the LLM, with caching.
 
+        Descriptions are cached persistently by class id, a hash of the class's graph
+        neighbourhood (neo4j_description), language and model, so a class is described
+        again only when its graph data changes. LLM calls are awaited (ainvoke) and coalesced: concurrent requests for the same
+        (repo, class, language) share one in-flight generation. A translation is made from
+        the cached English description; when that is not there yet, the English description
+        and the one in the target language are generated side by side, so a cold request
+        costs one LLM round-trip instead of two.
+
         Parameters:
             class_name (str): The name of the class (e.g., 'Movie', 'Person').
-            neo4j_description (str): The raw output from a Neo4j query.
+            neo4j_description: The class details (get_class_details, as a dict).
             language (str): The target language for the output (default: 'english').
+            repo (str): Repository the class belongs to, part of the cache key.
 
         Returns:
             str: The generated class description or a default error message.
@@ -69,92 +150,53 @@ class GenAIProcessor:
         if not self.llm:
             return "Error: LLM was not initialized correctly."
 
+        # Cache keys follow the class's graph data, a re-ingest without changes keeps them
+        class_id = self._class_id(neo4j_description, class_name, repo)
+        neighbourhood = neighbourhood_hash(neo4j_description)
+
         # Step 1: Always generate and cache the English description
-        english_cache_key = (class_name, "english")
-        if not hasattr(self, "_desc_cache"):
-            self._desc_cache = {}
+        english_cache_key = self.cache.key(class_id, neighbourhood, "english")
+        english_error = (
+            f"An error occurred during LLM generation for class '{class_name}' (English). "
+            "Returning a default description. "
+            "Default: This is a placeholder description for the class "
+            f"'{class_name}' due to a processing error. The raw data provided "
+            "was:\n"
+            f"{self._render(neo4j_description)}"
+        )
+        english = await self._flight(english_cache_key, lambda: self._generate(
+            english_cache_key, class_id, "english", self._description_messages(class_name, neo4j_description, "English"),
+            f"'{class_name}' description in English", english_error))
 
-        if english_cache_key in self._desc_cache:
-            english_content = self._desc_cache[english_cache_key]
-            print(f"Returning cached English description for {class_name}")
-        else:
-            # System prompt for English synthesis
-            system_prompt_en = (
-               "You are an expert documentation assistant. Your task is to analyze the "
-                "provided raw database output describing a class/node structure and rewrite "
-                "it into a clear, concise, and natural language description suitable for "
-                f"business analyst in English."
-                "Focus on the functional description, business rules, and avoid technical jargon."
-            )
-            user_query_en = (
-                f"Class Name: {class_name}\n\n"
-                f"Raw Database Data:\n---\n{neo4j_description}\n---\n\n"
-                "Based on the data above, generate the final, detailed description in English."
-            )
-            messages_en = [
-                SystemMessage(content=system_prompt_en),
-                HumanMessage(content=user_query_en),
-            ]
-            print(f"\n--- Invoking LLM for '{class_name}' description in English ---")
-            try:
-                response_en = self.llm.invoke(messages_en)
-                print("LLM call successful (English).")
-                print(f"LLM raw response: {response_en}")
-                print(f"LLM response text: {response_en.content}")
-                english_content = response_en.content
-                self._desc_cache[english_cache_key] = english_content
-            except (Exception, OutputParserException) as e:
-                error_message = (
-                    f"An error occurred during LLM generation for class '{class_name}' (English): {type(e).__name__}. "
-                    "Returning a default description. "
-                    "Default: This is a placeholder description for the class "
-                    f"'{class_name}' due to a processing error. The raw data provided "
-                    "was:\n"
-                    f"{neo4j_description}"
-                )
-                print(error_message)
-                print(f"Exception details: {e}")
-                return error_message
-
-        # Step 2: If target language is English, return the cached English content
+        # Step 2: If target language is English, return the English content.
+        # shield() keeps a shared generation running when one waiting request is cancelled
         if language.lower() == "english":
-            return english_content
+            return await asyncio.shield(english)
 
-        # Step 2: Translate the English content to the target language using LLM and cache
-        translation_cache_key = (class_name, language)
-        if translation_cache_key in self._desc_cache:
-            print(f"Returning cached translation for {class_name} in {language}")
-            return self._desc_cache[translation_cache_key]
+        # Step 3: Translate the cached English content, or generate in the target language
+        # while the English description is still being generated
+        translation_cache_key = self.cache.key(class_id, neighbourhood, language)
+        english_content = await self.cache.get(english_cache_key) if english.done() else None
+        if english_content is not None:
+            translation = await self._flight(translation_cache_key, lambda: self._generate(
+                translation_cache_key, class_id, language, self._translation_messages(class_name, english_content, language),
+                f"'{class_name}' translation to {language}", english_content))
+        else:
+            translation = await self._flight(translation_cache_key, lambda: self._generate_in_language(
+                translation_cache_key, class_id, english, class_name, neo4j_description, language))
+        return await asyncio.shield(translation)
 
-        system_prompt_translate = (
-            f"You are a professional translator and business analyst. Translate the following business-oriented class description into {language} for a non-technical stakeholder. "
-            "Preserve technical names as references unless there is an industry-standard translation. "
-            "Translate all explanatory text with high fluency and precision, maintaining a formal and clear register. "
-            "Do not add any introductory or concluding commentary. Only return the translated, structured summary."
-        )
-        user_query_translate = (
-            f"Class Name: {class_name}\n\n"
-            f"Business Description (English):\n{english_content}\n\n"
-            f"Target Language: {language}\n"
-        )
-        messages_translate = [
-            SystemMessage(content=system_prompt_translate),
-            HumanMessage(content=user_query_translate),
-        ]
-        print(f"\n--- Invoking LLM for '{class_name}' translation to {language} ---")
-        try:
-            response_translate = self.llm.invoke(messages_translate)
-            print("LLM call successful (Translation).")
-            print(f"LLM raw response: {response_translate}")
-            print(f"LLM response text: {response_translate.content}")
-            self._desc_cache[translation_cache_key] = response_translate.content
-            return response_translate.content
-        except (Exception, OutputParserException) as e:
-            error_message = (
-                f"An error occurred during LLM translation for class '{class_name}' to {language}: {type(e).__name__}. "
-                "Returning the English description as fallback. "
-                f"English Description:\n{english_content}"
-            )
-            print(error_message)
-            print(f"Exception details: {e}")
-            return english_content
+    async def _generate_in_language(self, key, class_id: str, english, class_name: str, neo4j_description, language: str) -> str:
+        """
+        Description written directly in `language`. Falls back to the English one
+        (awaited from its own in-flight generation) when the call fails.
+        """
+        content = await self._generate(key, class_id, language, self._description_messages(class_name, neo4j_description, language),
+                                       f"'{class_name}' description in {language}", None)
+        return content if content is not None else await asyncio.shield(english)
+
+    @staticmethod
+    def _class_id(neo4j_description: Dict[str, Any], class_name: str, repo: Optional[str]) -> str:
+        """repo + fully qualified class id of the class details, else the requested name."""
+        class_id = neo4j_description.get("class_id") or class_name
+        return f"{repo}:{class_id}" if repo else class_id
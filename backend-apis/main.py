@@ -3,13 +3,17 @@ from dotenv import load_dotenv
 import uvicorn
 from database.neo4j_controller import Neo4jController
 from genai.genai_processor import GenAIProcessor
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from models import ClassDependency, PackageClassCount, LabelCount
-from typing import List
+from models import ClassDependency, PackageClassCount, LabelCount, Repository, AnalyticsSummary, DependencyTraversal, \
+    ClassFanIn, ClassDependencyMetrics, DependencyCycle, LayerViolation, PackageCoupling, ClassCentrality, ClassDetails
+from response_cache import ResponseCache
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor_headers
+from typing import AsyncIterator, List, Optional
 from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 import json
-from functools import lru_cache
+from collections import OrderedDict
 
 load_dotenv()
 NEO4J_URI = os.getenv("DB_URI")
@@ -39,10 +43,18 @@ async def lifespan(app):
     except Exception as e:
         print(f"FATAL: Neo4jController failed to initialize: {e}")
         raise Exception("Cannot start without DB connection")
+
+    # Dependency snapshots are loaded up front; if Neo4j is not reachable yet the first request loads them
+    try:
+        await neo4j_controller.dependency_graphs.refresh()
+    except Exception as e:
+        print(f"WARNING: dependency snapshots not loaded at startup: {e}")
     yield
     # Shutdown logic
     if neo4j_controller:
-        neo4j_controller.close()
+        await neo4j_controller.close()
+    if genai_processor:
+        genai_processor.cache.close()
 
 app = FastAPI(
     title="Modular Neo4j Code Dependency API",
@@ -60,6 +72,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", NEXT_CURSOR_HEADER],
 )
 
 # Health Check remains in main app
@@ -77,58 +90,301 @@ def get_neo4j_controller():
         raise HTTPException(status_code=500, detail="Database connection failed to initialize.")
     return neo4j_controller
 
+# Dashboard aggregations are cached until ingest publishes a new graph version
+response_cache = ResponseCache(graph_version=lambda repo: get_neo4j_controller().get_graph_version(repo))
+
+# Every graph query can be scoped to one repository (name or name@branch); all repositories when omitted
+REPO_DESCRIPTION = "Repository key (name or name@branch). All repositories when omitted"
+CURSOR_DESCRIPTION = f"Cursor from the {NEXT_CURSOR_HEADER} header of the previous page"
+
+async def ndjson_response(records: AsyncIterator) -> StreamingResponse:
+    """
+    Newline delimited JSON response streaming `records`. The first record is awaited before
+    the response starts, so a failing query still gets a proper error status.
+    """
+    try:
+        first = await records.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def lines():
+        if first is not None:
+            yield json.dumps(jsonable_encoder(first)) + "\n"
+            async for record in records:
+                yield json.dumps(jsonable_encoder(record)) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get(
+    "/repos",
+    response_model=List[Repository],
+    summary="Get the repositories loaded into the graph"
+)
+async def get_repositories_endpoint():
+    """
+    Lists the repositories (and branches) that have been ingested.
+    """
+    return await neo4j_controller.get_repositories()
+
 @app.get(
     "/classes/dependencies",
     response_model=List[ClassDependency],
     summary="Get classes and their dependency counts"
 )
-async def get_classes_with_dependencies_endpoint():
+async def get_classes_with_dependencies_endpoint(
+    request: Request,
+    limit: int = Query(20, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
     """
     Retrieves all classes, their parent package, and a count of how many other 
     classes they directly depend on (outgoing relationships).
     """
-    return neo4j_controller.get_classes_with_dependencies()
+    after = decode_cursor(cursor, 3)
+    return await response_cache.respond(
+        request, repo, lambda: neo4j_controller.get_classes_with_dependencies(repo, limit, after),
+        headers=next_cursor_headers(limit, lambda item: [item.dependency_count, item.repo, item.class_id]))
+
+@app.get(
+    "/classes/dependencies/stream",
+    summary="Stream every class with dependencies as NDJSON"
+)
+async def stream_classes_with_dependencies_endpoint(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of rows, all when omitted"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Streams one ClassDependency JSON object per line for every class with internal dependencies,
+    unordered, as the rows come from Neo4j.
+    """
+    return await ndjson_response(neo4j_controller.stream_classes_with_dependencies(repo, limit))
 
 @app.get(
     "/packages/class-counts",
     response_model=List[PackageClassCount],
     summary="Get the total number of classes per package"
 )
-async def get_number_of_classes_per_package_endpoint():
+async def get_number_of_classes_per_package_endpoint(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=10000, description="Page size"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
     """
     Calculates and returns the total number of classes contained within each package.
     """
-    return neo4j_controller.get_number_of_classes_per_package()
+    after = decode_cursor(cursor, 2)
+    return await response_cache.respond(
+        request, repo, lambda: neo4j_controller.get_number_of_classes_per_package(repo, limit, after),
+        headers=next_cursor_headers(limit, lambda item: [item.class_count, item.package_name]))
+
+@app.get(
+    "/packages/class-counts/stream",
+    summary="Stream the class count of every package as NDJSON"
+)
+async def stream_classes_per_package_endpoint(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of rows, all when omitted"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Streams one PackageClassCount JSON object per line, per repository and package, unordered,
+    as the rows come from Neo4j.
+    """
+    return await ndjson_response(neo4j_controller.stream_classes_per_package(repo, limit))
 
 @app.get(
     "/nodes/count-of-nodes",
     response_model=List[LabelCount],
     summary="Get the count of nodes by their labels"
 )
-async def get_size_by_type_endpoint():
+async def get_size_by_type_endpoint(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
     """
     Returns a count of nodes grouped by their primary label.
     """
-    return neo4j_controller.get_size_by_type()
+    after = decode_cursor(cursor, 1)
+    return await response_cache.respond(
+        request, repo, lambda: neo4j_controller.get_size_by_type(repo, limit, after),
+        headers=next_cursor_headers(limit, lambda item: [item.label]))
 
 @app.get(
     "/nodes/count-of-classes",
     response_model=int,
     summary="Get the total number of Class nodes"
 )
-async def get_total_classes_endpoint():
+async def get_total_classes_endpoint(request: Request, repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)):
     """
     Returns the total number of Class nodes in the database.
     """
-    return neo4j_controller.get_total_classes()
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_total_classes(repo))
+
+@app.get(
+    "/classes/dependents",
+    response_model=List[ClassFanIn],
+    summary="Get the classes most depended upon"
+)
+async def get_classes_with_dependents_endpoint(
+    request: Request,
+    limit: int = Query(20, ge=1, le=1000, description="Number of classes returned"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns the classes with the most incoming dependencies (fan-in), with their package.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_classes_with_dependents(repo, limit))
+
+@app.get(
+    "/classes/dependency-metrics",
+    response_model=ClassDependencyMetrics,
+    summary="Get fan-in, fan-out, transitive dependency counts and cycle membership of a class"
+)
+async def get_class_dependency_metrics_endpoint(
+    request: Request,
+    class_name: str = Query(..., description="Name or id of the class"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns the dependency metrics of one class, answered from the in-memory dependency snapshot.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_class_dependency_metrics(class_name, repo))
+
+@app.get(
+    "/analytics/summary",
+    response_model=List[AnalyticsSummary],
+    summary="Get the analytics computed at ingest time"
+)
+async def get_analytics_summary_endpoint(request: Request, repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)):
+    """
+    Returns fan-in/fan-out, layer distribution, package coupling and node counts per repository,
+    as computed by the last load.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_analytics_summaries(repo))
+
+@app.get(
+    "/classes/dependency-traversal",
+    response_model=DependencyTraversal,
+    summary="Get the classes reachable from a class through internal dependencies"
+)
+async def get_dependency_traversal_endpoint(
+    request: Request,
+    class_name: str = Query(..., description="Name or id of the start class"),
+    depth: int = Query(4, ge=1, le=20, description="Maximum number of dependency hops"),
+    direction: str = Query("dependencies", pattern="^(dependencies|dependents|both)$",
+                           description="dependencies (what the class uses), dependents (what uses it) or both"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of classes returned"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Breadth first traversal from a class: every reachable class once, at its shortest depth,
+    plus the dependency edges between them. truncated is set when the limit was reached.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_dependency_traversal(
+        class_name, repo, depth, direction, limit))
+
+@app.get(
+    "/architecture/cycles",
+    response_model=List[DependencyCycle],
+    summary="Get the dependency cycles between classes"
+)
+async def get_dependency_cycles_endpoint(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000, description="Number of cycles returned, largest first"),
+    member_limit: int = Query(200, ge=1, le=10000, description="Class ids listed per cycle"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns the strongly connected components of the class dependency graph, i.e. groups of classes
+    that all depend on each other, largest first.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_dependency_cycles(repo, limit, member_limit))
+
+@app.get(
+    "/architecture/layer-violations",
+    response_model=List[LayerViolation],
+    summary="Get the dependencies that break the architecture layering"
+)
+async def get_layer_violations_endpoint(
+    request: Request,
+    limit: int = Query(500, ge=1, le=10000, description="Maximum number of violations returned"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns class dependencies against the layering rules, e.g. a Repository depending on a Controller.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_layer_violations(repo, limit))
+
+@app.get(
+    "/architecture/package-coupling",
+    response_model=List[PackageCoupling],
+    summary="Get afferent / efferent coupling and instability per package"
+)
+async def get_package_coupling_endpoint(request: Request, repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)):
+    """
+    Returns the afferent (Ca) and efferent (Ce) coupling of every package, in distinct packages,
+    and its instability Ce / (Ca + Ce).
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_package_coupling(repo))
+
+@app.get(
+    "/architecture/centrality",
+    response_model=List[ClassCentrality],
+    summary="Get the most central classes by PageRank"
+)
+async def get_class_centrality_endpoint(
+    request: Request,
+    limit: int = Query(20, ge=1, le=1000, description="Number of classes returned"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns the classes with the highest PageRank over the dependency graph.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_class_centrality(repo, limit))
+
+@app.get(
+    "/classes/details",
+    response_model=ClassDetails,
+    summary="Get a class and its direct neighbourhood"
+)
+async def get_class_details_endpoint(
+    request: Request,
+    class_name: str = Query(..., description="Name or id of the class"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum entries per section (fields, methods, dependencies, ...)"),
+    text_limit: int = Query(400, ge=0, le=100000, description="Characters kept of each method description and pseudo code"),
+    include_pseudo_code: bool = Query(False, description="Include the pseudo code of the methods"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
+):
+    """
+    Returns the package, file, annotations, fields, methods, dependencies, dependents and external
+    dependencies of a class, each list capped at `limit` with its full size in the *_count fields.
+    """
+    return await response_cache.respond(request, repo, lambda: neo4j_controller.get_class_details(
+        class_name, repo, limit, text_limit, include_pseudo_code))
+
+# Cache for class_details, keyed by the graph version so a new load is picked up
+CLASS_DETAILS_CACHE_SIZE = 256
+#Characters kept of each method description and pseudo code in the specification prompt
+SPEC_TEXT_LIMIT = 800
+class_details_cache = OrderedDict()
 
-# Add a cache for class_details using lru_cache
-@lru_cache(maxsize=256)
-def get_cached_class_details(class_name: str):
+async def get_cached_class_details(class_name: str, repo: Optional[str] = None) -> dict:
     """
-    Returns cached class details for a given class name.
+    Returns cached class details for a given class name, as the JSON friendly dict (without
+    empty properties) the functional specification prompt is built from, with clipped pseudo code.
     """
-    return neo4j_controller.get_class_details(class_name)
+    key = (class_name, repo, await response_cache.version(repo))
+    if key in class_details_cache:
+        class_details_cache.move_to_end(key)
+        return class_details_cache[key]
+    class_details = jsonable_encoder(await neo4j_controller.get_class_details(
+        class_name, repo, text_limit=SPEC_TEXT_LIMIT, include_pseudo_code=True), exclude_none=True)
+    class_details_cache[key] = class_details
+    while len(class_details_cache) > CLASS_DETAILS_CACHE_SIZE:
+        class_details_cache.popitem(last=False)
+    return class_details
 
 @app.get(
     "/classes/functional-specification",
@@ -136,17 +392,19 @@ def get_cached_class_details(class_name: str):
 )
 async def get_functional_specification(
     class_name: str = Query(..., description="Name of the class"),
-    language: str = Query("english", description="Language for the specification")
+    language: str = Query("english", description="Language for the specification"),
+    repo: Optional[str] = Query(None, description=REPO_DESCRIPTION)
 ):
     """
     Retrieves the functional specification for a given class.
     """
     # Use cached class details
-    class_details = get_cached_class_details(class_name)
-    spec = genai_processor.get_class_description(
+    class_details = await get_cached_class_details(class_name, repo)
+    spec = await genai_processor.get_class_description(
         class_name=class_name,
         neo4j_description=class_details,
-        language=language
+        language=language,
+        repo=repo
     )
     return {"functional_specification": spec}
 
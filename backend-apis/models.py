@@ -1,17 +1,192 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class ClassDependency(BaseModel):
     """Model for a class, its package, and the number of dependencies it has."""
     package_name: str
     class_name: str
+    class_id: Optional[str] = None
+    repo: Optional[str] = None
     dependency_count: int
 
 class PackageClassCount(BaseModel):
     """Model for a package and the total number of classes within it."""
     package_name: str
+    repo: Optional[str] = None
     class_count: int
 
 class LabelCount(BaseModel):
     """Model for a label and the total number of nodes with that label."""
     label: str
-    count: int
\ No newline at end of file
+    count: int
+
+class Repository(BaseModel):
+    """Model for a loaded repository. key is the `repo` value on its nodes (name or name@branch)."""
+    key: str
+    name: Optional[str] = None
+    branch: Optional[str] = None
+    updated_at: Optional[str] = None
+    #Generation the APIs read, and a counter bumped every time a new one is published
+    active_generation: Optional[int] = None
+    version: Optional[int] = None
+
+class ClassFanIn(BaseModel):
+    """Model for a class and the number of classes that depend on it."""
+    package_name: Optional[str] = None
+    class_name: Optional[str] = None
+    class_id: Optional[str] = None
+    repo: Optional[str] = None
+    dependent_count: int
+
+class LayerCount(BaseModel):
+    """Model for an architecture layer and the number of classes in it."""
+    layer: str
+    class_count: int
+
+class PackageCoupling(BaseModel):
+    """Model for a package's afferent / efferent coupling (distinct packages) and instability Ce / (Ca + Ce)."""
+    package_name: str
+    afferent: int
+    efferent: int
+    instability: float
+    repo: Optional[str] = None
+    #Class level dependencies into / out of the package, set by the architecture endpoints
+    incoming_dependencies: Optional[int] = None
+    outgoing_dependencies: Optional[int] = None
+
+class PackageDependency(BaseModel):
+    """Model for the number of class dependencies from one package to another."""
+    source_package: str
+    target_package: str
+    dependency_count: int
+
+class AnalyticsSummary(BaseModel):
+    """Model for the analytics computed by ingest for the active generation of a repository."""
+    repo: str
+    generation: int
+    computed_at: str
+    total_classes: int
+    defined_classes: int
+    internal_dependencies: int
+    average_fan_out: float
+    node_counts: List[LabelCount]
+    classes_with_dependencies: List[ClassDependency]
+    fan_in: List[ClassFanIn]
+    classes_per_package: List[PackageClassCount]
+    layer_distribution: List[LayerCount]
+    package_coupling: List[PackageCoupling]
+    package_dependencies: List[PackageDependency]
+
+class TraversalNode(BaseModel):
+    """Model for a class reached by a dependency traversal, at its shortest depth. via is the class it was reached from."""
+    class_id: str
+    class_name: Optional[str] = None
+    package_name: Optional[str] = None
+    layer: Optional[str] = None
+    depth: int
+    via: Optional[str] = None
+
+class TraversalEdge(BaseModel):
+    """Model for a HAS_INTERNAL_DEPENDENCY_ON edge between two classes of a traversal (source depends on target)."""
+    source: str
+    target: str
+
+class DependencyTraversal(BaseModel):
+    """Model for the classes reachable from a class, each once, and the dependency edges between them."""
+    root: TraversalNode
+    repo: Optional[str] = None
+    direction: str
+    max_depth: int
+    truncated: bool
+    nodes: List[TraversalNode]
+    edges: List[TraversalEdge]
+
+class ClassDependencyMetrics(BaseModel):
+    """Model for the dependency metrics of one class. The transitive counts and cycle size need the dependency snapshot, they are None without it."""
+    class_id: str
+    class_name: Optional[str] = None
+    package_name: Optional[str] = None
+    layer: Optional[str] = None
+    repo: Optional[str] = None
+    fan_in: int
+    fan_out: int
+    transitive_dependencies: Optional[int] = None
+    transitive_dependents: Optional[int] = None
+    #Size of the dependency cycle (strongly connected component) the class is part of, 1 when it is in none
+    cycle_size: Optional[int] = None
+
+class DependencyCycle(BaseModel):
+    """Model for a dependency cycle: a strongly connected component of the class dependency graph. class_ids is capped, size is not."""
+    repo: str
+    size: int
+    class_ids: List[str]
+    packages: List[str]
+
+class LayerViolation(BaseModel):
+    """Model for a dependency between two architecture layers that breaks a layering rule."""
+    repo: str
+    source_class_id: str
+    source_class_name: Optional[str] = None
+    source_layer: str
+    target_class_id: str
+    target_class_name: Optional[str] = None
+    target_layer: str
+    rule: str
+
+class ClassCentrality(BaseModel):
+    """Model for the PageRank centrality of a class in the dependency graph of its repository."""
+    repo: str
+    class_id: str
+    class_name: Optional[str] = None
+    package_name: Optional[str] = None
+    layer: Optional[str] = None
+    pagerank: float
+    fan_in: int
+    fan_out: int
+
+class ClassReference(BaseModel):
+    """Model for a class referenced from a class detail (a dependency or dependent)."""
+    class_id: str
+    class_name: Optional[str] = None
+    package_name: Optional[str] = None
+
+class ClassFieldDetail(BaseModel):
+    """Model for a field of a class."""
+    name: Optional[str] = None
+    type: Optional[str] = None
+    is_primary_key: Optional[bool] = None
+    is_public: Optional[bool] = None
+    is_static: Optional[bool] = None
+    annotations: List[str] = []
+
+class ClassMethodDetail(BaseModel):
+    """Model for a method of a class. description is clipped, pseudo_code is only set when asked for."""
+    name: Optional[str] = None
+    return_type: Optional[str] = None
+    parameters: List[str] = []
+    annotations: List[str] = []
+    exceptions: List[str] = []
+    description: Optional[str] = None
+    pseudo_code: Optional[str] = None
+
+class ClassDetails(BaseModel):
+    """Model for a class and its direct neighbourhood. Each list is capped, the *_count fields hold the full sizes."""
+    class_id: str
+    class_name: Optional[str] = None
+    package_name: Optional[str] = None
+    repo: Optional[str] = None
+    layer: Optional[str] = None
+    file_name: Optional[str] = None
+    file_path: Optional[str] = None
+    summary: Optional[str] = None
+    annotations: List[str] = []
+    fields: List[ClassFieldDetail] = []
+    field_count: int = 0
+    methods: List[ClassMethodDetail] = []
+    method_count: int = 0
+    dependencies: List[ClassReference] = []
+    dependency_count: int = 0
+    dependents: List[ClassReference] = []
+    dependent_count: int = 0
+    external_dependencies: List[ClassReference] = []
+    external_dependency_count: int = 0
\ No newline at end of file
@@ -0,0 +1,38 @@
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+#Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """Sort key from a cursor made by encode_cursor, None for the first page. 400 when it is not one."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+def next_cursor_headers(limit: int, key: Callable[[Any], Sequence[Any]]) -> Callable[[List[Any]], Dict[str, str]]:
+    """
+    Header builder for ResponseCache.respond: a full page gets the cursor of its last row, so the
+    client passes it back as ?cursor= to continue after it.
+    """
+    def headers(page: List[Any]) -> Dict[str, str]:
+        if len(page) < limit:
+            return {}
+        return {NEXT_CURSOR_HEADER: encode_cursor(key(page[-1]))}
+    return headers
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+DEFAULT_MAX_ENTRIES = 512
+#How long a graph version read from Neo4j is trusted before it is read again
+DEFAULT_VERSION_TTL_SECONDS = 2.0
+
+
+class ResponseCache:
+    """
+    Shared cache of JSON responses for the read endpoints, keyed by path and query string.
+
+    Entries are tagged with the graph version of the repository they were computed for
+    (Repository.version, bumped by every ingest that changes what readers see). When the
+    version moves on, entries are recomputed. The version itself is polled at most once
+    per `version_ttl` seconds, so a cache hit does not touch Neo4j at all.
+
+    Responses carry an ETag derived from key + version, and a matching If-None-Match
+    gets a 304 without a body.
+    """
+
+    def __init__(self, graph_version: Callable[[Optional[str]], Awaitable[str]], max_entries: int = None,
+                 version_ttl: float = None):
+        self.graph_version = graph_version
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.version_ttl = version_ttl if version_ttl is not None else float(os.getenv("GRAPH_VERSION_TTL_SECONDS", DEFAULT_VERSION_TTL_SECONDS))
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    async def version(self, repo: Optional[str]) -> str:
+        """Graph version marker of the repository (or of every repository), re-read at most every version_ttl seconds."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(repo)
+            if cached is not None and now - cached[1] < self.version_ttl:
+                return cached[0]
+        version = await self.graph_version(repo)
+        with self._lock:
+            self._versions[repo] = (version, now)
+        return version
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        return f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+
+    async def respond(self, request: Request, repo: Optional[str], compute: Callable[[], Awaitable],
+                      headers: Callable[[Any], Dict[str, str]] = None) -> Response:
+        """
+        Cached JSON response for `request`, awaiting compute() on a miss. headers(result) adds
+        response headers (e.g. the next page cursor), cached along with the body.
+        """
+        key = self._key(request)
+        etag = '"' + hashlib.sha1(f"{key}|{await self.version(repo)}".encode()).hexdigest()[:20] + '"'
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            self.hits += 1
+            return Response(status_code=304, headers=cache_headers)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return Response(content=entry[1], media_type="application/json", headers={**entry[2], **cache_headers})
+
+        self.misses += 1
+        result = await compute()
+        body = json.dumps(jsonable_encoder(result)).encode()
+        extra_headers = headers(result) if headers else {}
+        with self._lock:
+            self._entries[key] = (etag, body, extra_headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return Response(content=body, media_type="application/json", headers={**extra_headers, **cache_headers})
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
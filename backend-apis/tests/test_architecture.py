@@ -0,0 +1,25 @@
+from pytest import approx
+
+from database.architecture import pagerank
+from database.dependency_graph import DependencySnapshot
+
+
+def snapshot(edges):
+    classes = sorted({class_id for edge in edges for class_id in edge})
+    return DependencySnapshot("repo", 1, 1, [{"id": class_id} for class_id in classes], edges)
+
+
+def test_pagerank_of_a_cycle_is_uniform():
+    ranks = pagerank(snapshot([("A", "B"), ("B", "C"), ("C", "A")]))
+
+    assert ranks == approx([1 / 3] * 3)
+
+
+def test_pagerank_flows_to_the_depended_upon_class():
+    #A and B depend on C, C has no dependencies so its rank is spread evenly:
+    #a = b = (1 - d) / 3 + d * c / 3 and c = a + d * (a + b) = a * (1 + 2d); with a + b + c = 1, a = 1 / (3 + 2d)
+    ranks = pagerank(snapshot([("A", "C"), ("B", "C")]))
+
+    a = 1 / (3 + 2 * 0.85)
+    assert ranks == approx([a, a, a * (1 + 2 * 0.85)], abs=1e-6)
+    assert sum(ranks) == approx(1.0)
@@ -1,7 +1,7 @@
 from google.adk.agents import LlmAgent
 from . import prompt
 
-from chat_agent.tools.neo4j_tools import get_neo4j_schema, execute_cypher_query, get_internal_dependencies
+from chat_agent.tools.neo4j_tools import get_neo4j_schema, execute_cypher_query, get_internal_dependencies, list_repositories
 
 
 #MODEL = "gemini-2.5-pro"
@@ -13,5 +13,5 @@ cypher_query_agent = LlmAgent(
     name=AGENT_NAME,
     description="Agent to convert natural language queries into Cypher queries for Neo4j and execute them",
     instruction=prompt.CYHER_QUERY_AGENT_PROMPT,
-    tools=[get_neo4j_schema, execute_cypher_query, get_internal_dependencies]
+    tools=[get_neo4j_schema, execute_cypher_query, get_internal_dependencies, list_repositories]
 )
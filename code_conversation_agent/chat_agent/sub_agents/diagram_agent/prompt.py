@@ -10,7 +10,7 @@ DIAGRAM_AGENT_PROMPT = """
         * Tools:
             ** get_neo4j_schema(): Use this tool to retrieve and understand the current schema of the Neo4j database (e.g., node labels, relationship types, property keys).
             ** execute_cypher_query(query): Use this tool to directly execute a well-formed Cypher query on the Neo4j database, returning raw results.
-            ** get_internal_dependencies(class_name: str, level: int = 4): Use this tool to retrieve the outward facing internal dependencies for a given class name. 
+            ** get_internal_dependencies(class_name: str, level: int = 4, repo: str = "", direction: str = "dependencies", limit: int = 500): Use this tool to retrieve the internal dependencies ("dependencies") or dependents ("dependents") of a given class name, up to level hops. It returns every reachable class once (nodes, with depth) and the dependency edges between them (edges, source depends on target); draw the diagram from nodes and edges.
             ** convert_mermaid_to_bytes(mermaid_code: str) -> bytes: Use this tool to convert Mermaid diagram code to an image (bytes) in the specified format.
 
     Workflow and Instructions:
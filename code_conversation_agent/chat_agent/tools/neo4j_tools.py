@@ -1,5 +1,9 @@
 import os
+import json
 import logging
+import urllib.error
+import urllib.parse
+import urllib.request
 from typing import Any
 from dotenv import load_dotenv
 from langchain_neo4j import Neo4jGraph
@@ -53,27 +57,65 @@ def execute_cypher_query(query: str) -> str:
         results = f"Error executing query : {str(e)}"
     return results
 
-# Get the outward facing internal dependencies for a given class name (logic unchanged)
-def get_internal_dependencies(class_name: str, level: int = 4) -> str:
-    logger.info("get_internal_dependencies: class=%s level=%s", class_name, level)
+# List the repositories (and branches) loaded into the graph
+def list_repositories() -> str:
+    logger.info("list_repositories: start")
     try:
         graph = _get_graph()
-        query = f"""
-        MATCH (startNode:Class) WHERE startNode.name = '{class_name}'
-        MATCH p = (startNode)-[:HAS_INTERNAL_DEPENDENCY_ON*1..{level}]->(dependencyNode)
-        RETURN 
-            startNode, 
-            relationships(p) AS relationships,
-            dependencyNode, 
-            length(p) AS dependency_level
-        ORDER BY dependency_level ASC
-        """
-        results = graph.query(query)
-        logger.info(
-            "get_internal_dependencies: success (type=%s, preview=%s)",
-            type(results),
-            _preview(results),
-        )
+        results = graph.query("""
+        MATCH (r:Repository)
+        RETURN r.key AS repo, r.name AS name, r.branch AS branch, toString(r.updatedAt) AS updated_at,
+               r.activeGeneration AS active_generation
+        ORDER BY r.key
+        """)
+        logger.info("list_repositories: success (preview=%s)", _preview(results))
+    except Exception as e:
+        logger.exception("list_repositories: error")
+        results = f"Error executing query : {str(e)}"
+    return results
+
+_TRAVERSAL_DIRECTIONS = ("dependencies", "dependents", "both")
+_MAX_LEVEL = 20
+_MAX_LIMIT = 5000
+# Backend API that runs the traversal (from its in-memory dependency snapshot, or Neo4j)
+_BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://127.0.0.1:8085")
+_BACKEND_TIMEOUT_SECONDS = 10
+
+def _traversal_from_backend(class_name: str, level: int, repo: str, direction: str, limit: int):
+    """Traversal from the backend API, or an error string when it is not configured or not reachable."""
+    if not _BACKEND_API_URL:
+        return "Error executing query : BACKEND_API_URL is not set"
+    params = {"class_name": class_name, "depth": level, "direction": direction, "limit": limit}
+    if repo:
+        params["repo"] = repo
+    url = f"{_BACKEND_API_URL.rstrip('/')}/classes/dependency-traversal?{urllib.parse.urlencode(params)}"
+    try:
+        with urllib.request.urlopen(url, timeout=_BACKEND_TIMEOUT_SECONDS) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return f"Class not found : {class_name}"
+        logger.warning("get_internal_dependencies: backend API returned %s", e.code)
+        return f"Error executing query : backend API returned {e.code}"
+
+# Get the internal dependencies of a class (fully qualified id or simple name), breadth first up to `level` hops.
+# The traversal runs in the backend API (one implementation, answered from its in-memory dependency snapshot).
+# direction: "dependencies" (what the class uses), "dependents" (what uses it) or "both".
+# Every reachable class is returned once at its shortest depth (via = the class it was reached from), with the
+# dependency edges between the returned classes; at most `limit` classes, `truncated` is set when cut.
+# repo limits the traversal to one repository (name or name@branch); empty searches all repositories.
+# Only the active generation of a repository is read, builds in progress and old generations are skipped
+def get_internal_dependencies(class_name: str, level: int = 4, repo: str = "", direction: str = "dependencies",
+                              limit: int = 500) -> str:
+    logger.info("get_internal_dependencies: class=%s level=%s repo=%s direction=%s limit=%s",
+                class_name, level, repo, direction, limit)
+    try:
+        if direction not in _TRAVERSAL_DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(_TRAVERSAL_DIRECTIONS)}")
+        level = max(1, min(int(level), _MAX_LEVEL))
+        limit = max(1, min(int(limit), _MAX_LIMIT))
+        results = _traversal_from_backend(class_name, level, repo, direction, limit)
+        logger.info("get_internal_dependencies: done (preview=%s)", _preview(results))
     except Exception as e:
         logger.exception("get_internal_dependencies: error")
         results = f"Error executing query : {str(e)}"
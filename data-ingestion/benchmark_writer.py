@@ -0,0 +1,80 @@
+"""
+Benchmarks the batched Neo4j writer against a local Neo4j with synthetic metadata.
+
+Writes into the `benchmark` repository scope (--repo to change it). Every run wipes
+that repository, other repositories in the database are untouched.
+
+    python benchmark_writer.py --classes 2000 --batch-sizes 1 50 200 500 --confirm
+"""
+import argparse
+import time
+
+from model.CodeMetadata import CodeMetadata, MethodMetadata, FieldMetadata, ParameterMetadata, LayerEnum
+from graphdb.Neo4jConnector import Neo4jConnector
+
+
+def synthetic_metadata(count: int, methods_per_class: int = 10, fields_per_class: int = 6):
+    layers = list(LayerEnum)
+    collection = []
+    for i in range(count):
+        package = f"com.bench.module{i % 50}"
+        class_name = f"Class{i}"
+        dependencies = [f"com.bench.module{(i + d) % 50}.Class{(i + d) % count}" for d in range(1, 4)]
+        methods = [
+            MethodMetadata(
+                name=f"method{m}",
+                annotations=["Override"] if m % 3 == 0 else [],
+                parameters=[ParameterMetadata(name=f"arg{p}", type="String") for p in range(2)],
+                return_type="void",
+                description=f"Method {m} of {class_name}",
+                pseudo_code="do something",
+                throws_exceptions=["IllegalStateException"] if m % 4 == 0 else [],
+                internal_dependencies=[dependencies[0].rsplit('.', 1)[1]],
+            )
+            for m in range(methods_per_class)
+        ]
+        fields = [
+            FieldMetadata(name=f"field{f}", type="String", annotations=["Column"], description=None)
+            for f in range(fields_per_class)
+        ]
+        collection.append(CodeMetadata(
+            file_name=f"{class_name}.java",
+            file_path=f"src/main/java/{package.replace('.', '/')}/{class_name}.java",
+            package=package,
+            class_name=class_name,
+            class_annotations=["Service"],
+            internal_dependencies=dependencies,
+            external_dependencies=["org.slf4j.Logger"],
+            methods=methods,
+            fields=fields,
+            functionality_summary=f"Synthetic class {i}",
+            architecture_layer=layers[i % len(layers)],
+        ))
+    return collection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batched Neo4j writer")
+    parser.add_argument("--classes", type=int, default=1000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--repo", default="benchmark", help="Repository scope to write to (it is wiped on every run)")
+    parser.add_argument("--confirm", action="store_true", help="Confirm that the repository scope can be wiped")
+    args = parser.parse_args()
+
+    if not args.confirm:
+        raise SystemExit(f"This benchmark wipes the '{args.repo}' repository in DB_URI. Re-run with --confirm.")
+
+    collection = synthetic_metadata(args.classes)
+    connector = Neo4jConnector(repo=args.repo)
+    try:
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            connector.save_code_metadata_collection(collection, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            print(f"batch_size={batch_size}: {elapsed:.2f}s, {len(collection) / elapsed:.1f} classes/s")
+    finally:
+        connector.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,32 @@
 from google import genai
-from model.CodeMetadata import CodeMetadata
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from model.CodeMetadata import CodeMetadata, LayerEnum
+from parsing.java_parser import parse_java_structure, method_key
 
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
-os.environ["GOOGLE_API_KEY"] = os.getenv('GOOGLE_API_KEY')
+if os.getenv('GOOGLE_API_KEY'):
+    os.environ["GOOGLE_API_KEY"] = os.getenv('GOOGLE_API_KEY')
 
-client = genai.Client()
+#Created on first use so structure-only runs work without an API key
+client = None
+
+def _get_client():
+    global client
+    if client is None:
+        client = genai.Client()
+    return client
+
+#Model and prompt version are part of the extraction cache key.
+#Bump PROMPT_VERSION whenever system_instructions change.
+MODEL_NAME = os.getenv("EXTRACTION_MODEL_NAME", "gemini-2.5-pro")
+PROMPT_VERSION = "1"
+ENRICHMENT_PROMPT_VERSION = "2"
+#Bump when the Python class outline changes, it is part of the Python cache key
+PYTHON_OUTLINE_VERSION = "1"
 
 system_instructions = """
     You are a highly skilled Java code analysis and data extraction assistant. Your task is to analyze the provided Java code snippet and extract specific metadata. 
@@ -25,9 +44,9 @@ def extract_java_metadata(java_file_content: str):
     
     inputs = f"Java File: {java_file_content}" 
 
-    response = client.models.generate_content(
+    response = _get_client().models.generate_content(
         #model="gemini-2.5-flash",
-        model="gemini-2.5-pro",
+        model=MODEL_NAME,
         contents=inputs,
 
         config = {
@@ -39,4 +58,161 @@ def extract_java_metadata(java_file_content: str):
 
     print(f"Extracted data: \n {response.text}")
 
-    return response.parsed
\ No newline at end of file
+    return response.parsed
+
+
+class MethodEnrichment(BaseModel):
+    key: str = Field(..., title="Method key exactly as given in the input, e.g. findById(Long)")
+    description: Optional[str] = Field(..., title="Description of the method")
+    pseudo_code: Optional[str] = Field(..., title="Pseudo code / Logic of the method. Includes business rules if any")
+
+class ClassEnrichment(BaseModel):
+    functionality_summary: str = Field(..., title="Brief functional summary of the class")
+    architecture_layer: LayerEnum = Field(..., title="Classification of the java class in Architecture Layer")
+    methods: List[MethodEnrichment]
+
+
+enrichment_instructions = """
+    You are a highly skilled {language} code analysis assistant. The structure of the class (package, imports, fields,
+    method signatures) has already been extracted. You get the class outline and the source of some or all of its methods.
+    **Instructions:**
+    1.  Write a brief functional summary of the class and classify its architecture layer.
+    2.  For every method given with its source, return its `key` exactly as given, a description and pseudo code including business rules.
+    3.  Output only a JSON object that strictly conforms to the given schema.
+"""
+
+#Large classes are enriched in method chunks so no single call blows the output limit.
+#Bump ENRICHMENT_PROMPT_VERSION when the chunking defaults change, results differ per chunk layout.
+DEFAULT_CHUNK_TOKENS = 8000
+DEFAULT_CHUNK_METHODS = 25
+
+
+def chunk_method_sources(method_sources: dict, max_tokens: int = None, max_methods: int = None) -> List[dict]:
+    """
+    Splits method_sources into ordered groups of at most max_tokens (~4 characters per
+    token, same estimate as the extraction pool) and max_methods methods. A method bigger
+    than the budget gets a chunk of its own.
+    """
+    max_tokens = max_tokens or int(os.getenv("EXTRACTION_CHUNK_TOKENS", DEFAULT_CHUNK_TOKENS))
+    max_methods = max_methods or int(os.getenv("EXTRACTION_CHUNK_METHODS", DEFAULT_CHUNK_METHODS))
+    chunks, chunk, chunk_tokens = [], {}, 0
+    for key, source in method_sources.items():
+        tokens = len(source) // 4 + 1
+        if chunk and (chunk_tokens + tokens > max_tokens or len(chunk) >= max_methods):
+            chunks.append(chunk)
+            chunk, chunk_tokens = {}, 0
+        chunk[key] = source
+        chunk_tokens += tokens
+    if chunk or not chunks:
+        chunks.append(chunk)
+    return chunks
+
+
+def _class_outline(metadata: CodeMetadata, language: str = "Java") -> str:
+    if language == "Python":
+        return _python_outline(metadata)
+    annotations = " ".join(f"@{name}" for name in metadata.class_annotations or [])
+    fields = "\n".join(f"    {field.type} {field.name};" for field in metadata.fields)
+    methods = "\n".join(f"    {method_key(method)}" for method in metadata.methods)
+    return (
+        f"package {metadata.package};\n"
+        f"{annotations}\nclass {metadata.class_name} implements {', '.join(metadata.interfaces or []) or '-'}\n"
+        f"Fields:\n{fields or '    -'}\n"
+        f"Methods:\n{methods or '    -'}"
+    )
+
+
+def _python_outline(metadata: CodeMetadata) -> str:
+    #Module level functions and variables come as a record named after the module
+    if metadata.class_name == os.path.splitext(metadata.file_name)[0] or metadata.file_name == "__init__.py":
+        header = f"module {'.'.join(filter(None, [metadata.package, metadata.class_name]))}"
+    else:
+        decorators = "".join(f"@{name}\n" for name in metadata.class_annotations or [])
+        bases = f"({', '.join(metadata.interfaces)})" if metadata.interfaces else ""
+        header = f"module {metadata.package}\n{decorators}class {metadata.class_name}{bases}:"
+    fields = "\n".join(f"    {field.name}: {field.type}" for field in metadata.fields)
+    methods = "\n".join(f"    {method_key(method)}" for method in metadata.methods)
+    return (
+        f"{header}\n"
+        f"Attributes:\n{fields or '    -'}\n"
+        f"Functions:\n{methods or '    -'}"
+    )
+
+
+def _enrichment_inputs(outline: str, method_sources: dict, part: int, parts: int) -> str:
+    method_blocks = "\n\n".join(f"Method key: {key}\n{source}" for key, source in method_sources.items())
+    header = f"Method sources (part {part} of {parts}):" if parts > 1 else "Method sources:"
+    return f"Class outline:\n{outline}\n\n{header}\n{method_blocks}"
+
+
+def generate_enrichment(inputs: str, language: str = "Java") -> ClassEnrichment:
+    response = _get_client().models.generate_content(
+        model=MODEL_NAME,
+        contents=inputs,
+
+        config = {
+            "response_mime_type": "application/json",
+            "response_schema": ClassEnrichment,
+            "system_instruction": enrichment_instructions.format(language=language)
+        }
+    )
+
+    if response.parsed is None:
+        raise ValueError("Could not parse enrichment response")
+    return response.parsed
+
+
+def merge_enrichments(metadata: CodeMetadata, enrichments: List[ClassEnrichment]) -> CodeMetadata:
+    """
+    Folds per-chunk enrichments into metadata. The class summary and layer come from
+    the first chunk; methods are matched back by name(types).
+    """
+    metadata.functionality_summary = enrichments[0].functionality_summary
+    metadata.architecture_layer = enrichments[0].architecture_layer
+    by_key = {method.key: method for enrichment in enrichments for method in enrichment.methods}
+    for method in metadata.methods:
+        method_enrichment = by_key.get(method_key(method))
+        if method_enrichment is not None:
+            method.description = method_enrichment.description
+            method.pseudo_code = method_enrichment.pseudo_code
+    return metadata
+
+
+def enrich_metadata(metadata: CodeMetadata, method_sources: dict, pool=None, language: str = "Java") -> CodeMetadata:
+    """
+    Asks the LLM only for the fields that need understanding (summary, layer, method
+    description and pseudo code) of a locally parsed class. Big classes are split into
+    method chunks; with a pool the chunks run in parallel through its rate limiter,
+    otherwise one after the other.
+    """
+    outline = _class_outline(metadata, language)
+    chunks = chunk_method_sources(method_sources)
+    inputs = [_enrichment_inputs(outline, chunk, part, len(chunks)) for part, chunk in enumerate(chunks, start=1)]
+    if len(chunks) > 1:
+        print(f"Enriching {metadata.class_name} in {len(chunks)} chunks")
+
+    generate = lambda chunk_inputs: generate_enrichment(chunk_inputs, language)
+    if pool is not None:
+        enrichments = pool.extract_all(inputs, extract_fn=generate)
+    else:
+        enrichments = [generate(chunk_inputs) for chunk_inputs in inputs]
+    return merge_enrichments(metadata, enrichments)
+
+
+def extract_java_metadata_hybrid(java_file_content: str, file_name: str = None, use_llm: bool = True, pool=None):
+    """
+    Local parser for the structure, LLM only for summaries. Falls back to the full
+    LLM extraction when the file cannot be parsed locally (or javalang is missing).
+    With use_llm=False the structure is returned as is (None if it cannot be parsed).
+    When given, every LLM call goes through the ExtractionPool.
+    """
+    parsed = parse_java_structure(java_file_content, file_name)
+    if parsed is None:
+        if not use_llm:
+            return None
+        return pool.extract(java_file_content) if pool is not None else extract_java_metadata(java_file_content)
+
+    metadata, method_sources = parsed
+    if not use_llm:
+        return metadata
+    return enrich_metadata(metadata, method_sources, pool)
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from model.CodeMetadata import CodeMetadata
+
+DEFAULT_CACHE_DIR = ".extraction_cache"
+DEFAULT_MAX_SIZE_MB = 1024
+DEFAULT_MAX_AGE_DAYS = 90
+
+
+def schema_hash() -> str:
+    """
+    Hash of the CodeMetadata JSON schema, so any model change invalidates old entries.
+    """
+    schema = json.dumps(CodeMetadata.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode('utf-8')).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent on-disk cache of extracted CodeMetadata.
+
+    Entries are keyed by SHA-256 of the file content, the model name, the prompt
+    version and the CodeMetadata schema hash (plus an optional namespace, e.g. the
+    module path for Python files, whose ids depend on it). Each entry is one JSON file under
+    `cache_dir/<2 char prefix>/<key>.json`; its mtime is refreshed on every hit
+    and used for size/age eviction.
+    """
+
+    def __init__(self, model_name: str, prompt_version: str, cache_dir: str = None,
+                 max_size_mb: int = None, max_age_days: int = None,
+                 read: bool = True, write: bool = True):
+        self.cache_dir = cache_dir or os.getenv("EXTRACTION_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_size_bytes = (max_size_mb or int(os.getenv("EXTRACTION_CACHE_MAX_SIZE_MB", DEFAULT_MAX_SIZE_MB))) * 1024 * 1024
+        self.max_age_seconds = (max_age_days or int(os.getenv("EXTRACTION_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS))) * 24 * 3600
+        self.read = read
+        self.write = write
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self._salt = f"{model_name}\0{prompt_version}\0{schema_hash()}"
+
+    def key(self, file_content: str, namespace: str = "") -> str:
+        content_hash = hashlib.sha256(file_content.encode('utf-8')).hexdigest()
+        salt = f"{self._salt}\0{namespace}" if namespace else self._salt
+        return hashlib.sha256(f"{content_hash}\0{salt}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, file_content: str):
+        """
+        Returns the cached CodeMetadata for the content, or None on a miss.
+        """
+        return self._get(self.key(file_content), CodeMetadata.model_validate_json)
+
+    def get_records(self, file_content: str, namespace: str = ""):
+        """
+        Returns the cached list of CodeMetadata for a multi-class file, or None on a miss.
+        """
+        return self._get(self.key(file_content, namespace),
+                         lambda text: [CodeMetadata.model_validate(record) for record in json.loads(text)])
+
+    def _get(self, key: str, decode):
+        if not self.read:
+            self._count(hit=False)
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                metadata = decode(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        except Exception as e:
+            #Corrupt or outdated entry, drop it and extract again
+            print(f"Discarding unreadable cache entry {path}. Exception: {e}")
+            self._remove(path)
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return metadata
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, file_content: str, metadata: CodeMetadata):
+        if not self.write or metadata is None:
+            return
+        self._put(self.key(file_content), metadata.model_dump_json())
+
+    def put_records(self, file_content: str, records, namespace: str = ""):
+        if not self.write or records is None:
+            return
+        self._put(self.key(file_content, namespace), json.dumps([record.model_dump(mode='json') for record in records]))
+
+    def _put(self, key: str, payload: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        #Write to a temp file and rename so concurrent readers never see partial JSON
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Removes entries older than max age, then least recently used entries until
+        the cache is under the size limit. Returns the number of removed entries.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(path)
+                    removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+            removed += 1
+
+        return removed
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
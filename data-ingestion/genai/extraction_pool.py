@@ -0,0 +1,157 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from genai.extract_java_metadata import extract_java_metadata
+
+#Defaults, can be overridden from ENV
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_OUTPUT_TOKENS_ESTIMATE = 2048
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (~4 characters per token) used for TPM budgeting.
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket. Capacity is the per-minute quota and it refills continuously.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` from the bucket and returns how long the caller has to wait
+        before the reservation is covered (0 if it is available now).
+        """
+        #Requests bigger than the whole bucket can never be satisfied, clamp them
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, sleep=time.sleep):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.sleep = sleep
+
+    def acquire(self, tokens: int):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            self.sleep(wait)
+
+
+def _status_code(error: Exception):
+    """
+    Pulls the HTTP status out of google-genai / httpx style exceptions.
+    """
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class ExtractionPool:
+    """
+    Bounded worker pool around the LLM extraction call.
+
+    Every call goes through the shared RateLimiter, at most `concurrency` calls are in
+    flight whichever thread makes them, and calls are retried with exponential backoff
+    on 429/5xx. `extract_fn` can be replaced with a stub for testing.
+    """
+
+    def __init__(self, extract_fn=None, concurrency: int = None,
+                 requests_per_minute: int = None, tokens_per_minute: int = None,
+                 max_retries: int = None, backoff_base: float = 2.0, backoff_max: float = 60.0,
+                 sleep=time.sleep):
+        self.extract_fn = extract_fn or extract_java_metadata
+        self.concurrency = concurrency or int(os.getenv("LLM_CONCURRENCY", DEFAULT_CONCURRENCY))
+        requests_per_minute = requests_per_minute or int(os.getenv("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+        tokens_per_minute = tokens_per_minute or int(os.getenv("LLM_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        self.output_tokens_estimate = int(os.getenv("LLM_OUTPUT_TOKENS_ESTIMATE", DEFAULT_OUTPUT_TOKENS_ESTIMATE))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute, sleep=sleep)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        #Chunks of one file are fanned out on their own executor, the pipeline's extraction
+        #worker that asked for them waits for the results
+        self._chunk_executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="extract-chunk")
+
+    def extract(self, file_content: str, extract_fn=None):
+        """
+        Rate limited, retried LLM call. Safe to call from any worker thread.
+        extract_fn overrides the pool's extraction function for this call.
+        """
+        extract_fn = extract_fn or self.extract_fn
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimate_tokens(file_content) + self.output_tokens_estimate)
+            try:
+                with self._slots:
+                    return extract_fn(file_content)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay = delay * (0.5 + random.random() / 2)
+                print(f"LLM call failed with {_status_code(e)}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                self.sleep(delay)
+                attempt += 1
+
+    def extract_all(self, contents, extract_fn=None):
+        """
+        Extracts several payloads (e.g. the method chunks of one file) in parallel and
+        returns the results in input order. Raises the first failure.
+        """
+        if len(contents) == 1:
+            return [self.extract(contents[0], extract_fn)]
+        futures = [self._chunk_executor.submit(self.extract, content, extract_fn) for content in contents]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._chunk_executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
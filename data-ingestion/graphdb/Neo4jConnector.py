@@ -1,211 +1,420 @@
 from neo4j import GraphDatabase
 import os
+import time
 from dotenv import load_dotenv
+from typing import List
 from model.CodeMetadata import CodeMetadata
+from graphdb.batch_writer import WRITE_STATEMENTS, DEFAULT_REPO, build_rows, batches
+from graphdb.schema import ensure_schema, schema_report
+from graphdb.analytics import analytics_json
+
+DEFAULT_WRITE_BATCH_SIZE = 200
+#Nodes removed per transaction by the batched deletes (repository wipe, garbage collection)
+DEFAULT_DELETE_BATCH_SIZE = 10000
+#Files whose subgraph is dropped per transaction
+DEFAULT_DELETE_FILE_BATCH_SIZE = 100
+#A new generation with fewer classes than this share of the active one is not published
+DEFAULT_MIN_GENERATION_RATIO = 0.5
+
+#Labels of the nodes owned by a repository, dependents first. Deleting in this order keeps
+#the relationships removed with each node few, since the leaves go before the hubs
+REPO_LABELS = ["Parameter", "Method", "Field", "File", "Class", "Package", "Annotation", "Exception"]
 
 class Neo4jConnector:
-
-    def __init__(self):
+    """
+    Writes CodeMetadata for one repository. Every node carries `repo` (name or
+    name@branch) and every read / write / delete is scoped by it, so several
+    repositories can be loaded into the same database concurrently.
+
+    Nodes also carry a `generation`. A full load builds a new generation next to the
+    one readers see, checks it and then flips Repository.activeGeneration in one
+    transaction, so the APIs never see a half loaded or empty graph. Old generations
+    are garbage collected afterwards in batches.
+    """
+
+    def __init__(self, batch_size: int = None, setup_schema: bool = True, repo: str = None):
         load_dotenv()
         uri = os.getenv('DB_URI')
         user = os.getenv('DB_USER')
         password = os.getenv('DB_PASSWORD')
         self._driver = GraphDatabase.driver(uri, auth=(user, password))
+        #Number of classes written per transaction
+        self.batch_size = batch_size or int(os.getenv('NEO4J_WRITE_BATCH_SIZE', DEFAULT_WRITE_BATCH_SIZE))
+        self.repo = repo or os.getenv('REPO_NAME') or DEFAULT_REPO
+        #Generation written to, set by begin_generation / use_active_generation.
+        #shadow is True while it is a new generation that still has to be published
+        self.generation = 0
+        self.shadow = False
+        #Class ids written into self.generation by this process, checked before publishing
+        self._written_classes = set()
+        self.delete_batch_size = int(os.getenv('NEO4J_DELETE_BATCH_SIZE', DEFAULT_DELETE_BATCH_SIZE))
+        self.delete_file_batch_size = int(os.getenv('NEO4J_DELETE_FILE_BATCH_SIZE', DEFAULT_DELETE_FILE_BATCH_SIZE))
+        self.min_generation_ratio = float(os.getenv('MIN_GENERATION_RATIO', DEFAULT_MIN_GENERATION_RATIO))
+
+        #Constraints and indexes for every MERGE key, idempotent
+        if setup_schema:
+            ensure_schema(self._driver)
 
     def close(self):
         self._driver.close()
 
-    def _delete_all(self, tx):
+    def ensure_schema(self):
+        return ensure_schema(self._driver)
+
+    def schema_report(self):
+        return schema_report(self._driver)
+
+    def _delete_batch(self, tx, label: str, generation: int = None):
+        """Deletes up to delete_batch_size `label` nodes of this repository (of one generation when given)."""
+        scope = "{repo: $repo}" if generation is None else "{repo: $repo, generation: $generation}"
+        return tx.run(f"""
+            MATCH (n:{label} {scope})
+            WITH n LIMIT $limit
+            DETACH DELETE n
+            RETURN count(*) AS deleted
+        """, repo=self.repo, generation=generation, limit=self.delete_batch_size).single()["deleted"]
+
+    def _delete_in_batches(self, description: str, generation: int = None) -> int:
+        """
+        Deletes this repository's nodes, or only those of one generation, label by label,
+        in transactions of at most delete_batch_size nodes. Each batch commits on its own,
+        so the server's transaction memory stays bounded whatever the graph size. The
+        generation is an equality match, served by the (repo, generation, key) indexes.
+        """
+        started = time.monotonic()
+        deleted = 0
+        print(f"Deleting {description}")
+        with self._driver.session() as session:
+            for label in REPO_LABELS:
+                while True:
+                    count = session.execute_write(self._delete_batch, label, generation)
+                    if not count:
+                        break
+                    deleted += count
+                    print(f"Deleting {description}: {deleted} nodes deleted ({label})")
+        print(f"Deleted {deleted} nodes of {description} in {time.monotonic() - started:.1f}s")
+        return deleted
+
+    def _delete_repository_node(self, tx):
+        tx.run("MATCH (r:Repository {key: $repo}) DELETE r", repo=self.repo)
+
+    def _register_repository(self, tx, name: str, branch: str = None):
         tx.run("""
-            MATCH (n) DETACH DELETE n
-        """)
-        print("All nodes deleted")
-
-    def _create_class_node(self, tx, metadata: CodeMetadata):
-        
-        #Delete all
-        #tx.run("""
-        #    MATCH (n) DETACH DELETE n
-        #""")
-
-        # Create Class and link to Package
+            MERGE (r:Repository {key: $repo})
+            ON CREATE SET r.activeGeneration = 0, r.version = 0
+            SET r.name = $name, r.branch = $branch, r.updatedAt = datetime()
+        """, repo=self.repo, name=name, branch=branch)
+
+    def _tag_unversioned(self, tx, label: str):
+        """Moves one batch of nodes written before generations existed into generation 0."""
+        return tx.run(f"""
+            MATCH (n:{label} {{repo: $repo}}) WHERE n.generation IS NULL
+            WITH n LIMIT $limit
+            SET n.generation = 0
+            RETURN count(n) AS tagged
+        """, repo=self.repo, limit=self.delete_batch_size).single()["tagged"]
+
+    def _repository_state(self, tx):
+        return tx.run("""
+            MATCH (r:Repository {key: $repo})
+            RETURN r.activeGeneration AS active, r.buildingGeneration AS building,
+                   r.nextGeneration AS next, r.collectedGeneration AS collected
+        """, repo=self.repo).single()
+
+    def _mark_collected(self, tx, generation: int):
         tx.run("""
-            MERGE (c:Class {name: $class_name})
-            SET c.file_name = $file_name,
-                c.type = $class_type,
-                c.functionalitySummary = $summary,
-                c.layer = $layer
-            WITH c
-            MERGE (p1:Package {name: $package_name})
-            MERGE (c)-[:BELONGS_TO_PACKAGE]->(p1)
-            MERGE (f:File {name: $file_name})
-            MERGE (f)-[:DEFINES_CLASS]->(c)
-        """,
-        class_name=metadata.class_name, file_name=metadata.file_name,
-        package_name=metadata.package, class_type="Class",
-        summary=metadata.functionality_summary, layer=metadata.architecture_layer
-        )
-
-        print("Class Created")
-
-        #Add Class Annotations
-        for anno_name in metadata.class_annotations:
-            tx.run("""
-                MATCH (c:Class {name: $class_name})
-                MERGE (a:Annotation {name: $anno_name})
-                MERGE (c)-[:HAS_ANNOTATION]->(a)
-            """, class_name=metadata.class_name, anno_name=anno_name)
-
-        print("Annotations Added")
-
-        #Add Internal Dependencies
-        internal_dependency_classes = []
-        for internal_dependency in metadata.internal_dependencies:
-
-            if '.' not in internal_dependency:
-                #DONT add package
-                internal_dependency_classes.append(internal_dependency)
-                tx.run("""
-                    MATCH (c1:Class {name: $class_name})
-                    MERGE(c2:Class {name: $dep_class_name})
-                    MERGE (c1)-[:HAS_INTERNAL_DEPENDENCY_ON]->(c2)
-                """, class_name=metadata.class_name, dep_class_name=internal_dependency)
-                # MERGE (c1)-[:HAS_DEPENDENCY_ON {type:'INTERNAL'}]->(c2)
-            else:
-                last_dot_index = internal_dependency.rfind('.')
-                dep_package = internal_dependency[:last_dot_index]
-                dep_class_name = internal_dependency[last_dot_index + 1:]
-
-                #print(f"------------------\n")
-                #print(f"internal_dependency: {internal_dependency}, dep_package: {dep_package}, dep_class_name: {dep_class_name}")
-
-                #Use this to cross check method level dependency
-                internal_dependency_classes.append(dep_class_name)
-
-                tx.run("""
-                    MATCH (c1:Class {name: $class_name})
-                    MERGE(c2:Class {name: $dep_class_name})
-                    MERGE (c1)-[:HAS_INTERNAL_DEPENDENCY_ON]->(c2)
-                    MERGE (p2: Package {name: $dep_package})
-                    MERGE (c2)-[:BELONGS_TO_PACKAGE]->(p2)
-                """, class_name=metadata.class_name, dep_class_name=dep_class_name, dep_package=dep_package)
+            MATCH (r:Repository {key: $repo})
+            SET r.collectedGeneration = CASE WHEN $generation > coalesce(r.collectedGeneration, 0)
+                                             THEN $generation ELSE r.collectedGeneration END
+        """, repo=self.repo, generation=generation)
+
+    def _begin_generation(self, tx, resume: bool):
+        """
+        Reserves the generation a full load writes into. With resume an unfinished
+        build is continued, otherwise a fresh number is taken and an abandoned build
+        is left to the garbage collection.
+        """
+        return tx.run("""
+            MERGE (r:Repository {key: $repo})
+            ON CREATE SET r.name = $repo, r.activeGeneration = 0, r.version = 0
+            WITH r, CASE WHEN $resume AND r.buildingGeneration IS NOT NULL THEN r.buildingGeneration
+                         ELSE coalesce(r.nextGeneration, coalesce(r.activeGeneration, 0) + 1) END AS generation
+            SET r.buildingGeneration = generation,
+                r.nextGeneration = CASE WHEN generation + 1 > coalesce(r.nextGeneration, 0)
+                                        THEN generation + 1 ELSE r.nextGeneration END
+            RETURN generation
+        """, repo=self.repo, resume=resume).single()["generation"]
+
+    def _generation_counts(self, tx, generation: int):
+        record = tx.run("""
+            MATCH (c:Class {repo: $repo, generation: $generation})
+            WITH count(c) AS classes, count(c.file_name) AS defined
+            OPTIONAL MATCH (:Class {repo: $repo, generation: $generation})-[d]->()
+            RETURN classes, defined, count(d) AS relationships
+        """, repo=self.repo, generation=generation).single()
+        return {"classes": record["classes"], "defined": record["defined"], "relationships": record["relationships"]}
+
+    def _activate_generation(self, tx, generation: int, analytics: str):
+        """
+        The swap. Readers resolve Repository.activeGeneration at the start of every
+        query, so flipping it in one transaction switches them over without a gap.
+        The analytics document of the new generation is published with it.
+        """
+        return tx.run("""
+            MATCH (r:Repository {key: $repo}) WHERE r.buildingGeneration = $generation
+            SET r.previousGeneration = r.activeGeneration,
+                r.activeGeneration = $generation,
+                r.buildingGeneration = null,
+                r.version = coalesce(r.version, 0) + 1,
+                r.updatedAt = datetime(),
+                r.analytics = $analytics
+            SET r.analyticsVersion = r.version
+            RETURN r.version AS version
+        """, repo=self.repo, generation=generation, analytics=analytics).single()
+
+    def _bump_version(self, tx, analytics: str):
+        return tx.run("""
+            MATCH (r:Repository {key: $repo})
+            SET r.version = coalesce(r.version, 0) + 1, r.updatedAt = datetime(), r.analytics = $analytics
+            SET r.analyticsVersion = r.version
+            RETURN r.version AS version
+        """, repo=self.repo, analytics=analytics).single()
+
+    def _write_batch(self, tx, batch: List[CodeMetadata]):
+        """
+        Writes a batch of CodeMetadata with one UNWIND statement per node / relationship type.
+        """
+        rows = build_rows(batch)
+        for key, statement in WRITE_STATEMENTS:
+            if rows[key]:
+                tx.run(statement, rows=rows[key], repo=self.repo, generation=self.generation)
+
+    def _replace_batch(self, tx, batch: List[CodeMetadata]):
+        """
+        Drops the current subgraph of every file in the batch, then writes the batch.
+        """
+        self._delete_file_subgraph(tx, [metadata.file_path or metadata.file_name for metadata in batch])
+        self._write_batch(tx, batch)
+
+    def _save_in_batches(self, session, metadata_collection, batch_size: int = None):
+        batch_size = batch_size or self.batch_size
+        saved = 0
+        for batch in batches(metadata_collection, batch_size):
+            session.execute_write(self._write_batch, batch)
+            self._track_written(batch)
+            saved += len(batch)
+            print(f"Saved {saved}/{len(metadata_collection)} classes")
+
+    def _track_written(self, batch: List[CodeMetadata]):
+        self._written_classes.update(row["class_id"] for row in build_rows(batch)["classes"])
+
+    def _delete_file_subgraph(self, tx, file_paths: List[str]):
+        """
+        Removes everything owned by the given source files: the File nodes, the Methods/
+        Fields/Parameters of the classes they define and the outgoing edges of those classes.
+        Classes other files still depend on are kept as bare stubs.
+        """
+        scope = {"repo": self.repo, "generation": self.generation}
+
+        #Methods, Fields and Parameters are keyed by their owning class, so they can go
+        record = tx.run("""
+            MATCH (f:File {repo: $repo, generation: $generation}) WHERE f.path IN $file_paths
+            MATCH (f)-[:DEFINES_CLASS]->(c:Class)
+            OPTIONAL MATCH (c)-[:HAS_METHOD|HAS_FIELD]->(owned)
+            OPTIONAL MATCH (owned)-[:HAS_PARAMETER]->(pa:Parameter)
+            DETACH DELETE pa, owned
+            RETURN collect(DISTINCT c.id) AS classes
+        """, file_paths=file_paths, **scope).single()
+        classes = record["classes"] if record else []
 
-        print("Internal dependencies added")
-
-        #Add External Dependencies
-        for external_dependency in metadata.external_dependencies:
+        tx.run("""
+            MATCH (c:Class {repo: $repo, generation: $generation}) WHERE c.id IN $classes
+            MATCH (c)-[r]->()
+            DELETE r
+        """, classes=classes, **scope)
 
-            if '.' not in external_dependency:
-                tx.run("""
-                    MATCH (c1:Class {name: $class_name})
-                    MERGE(c2:Class {name: $dep_class_name})
-                    MERGE (c1)-[:HAS_EXTERNAL_DEPENDENCY_ON]->(c2)
-                """, class_name=metadata.class_name, dep_class_name=external_dependency)
-                #MERGE (c1)-[:HAS_DEPENDENCY_ON {type:'EXTERNAL'}]->(c2)
+        tx.run("""
+            MATCH (f:File {repo: $repo, generation: $generation}) WHERE f.path IN $file_paths
+            DETACH DELETE f
+        """, file_paths=file_paths, **scope)
 
+        #Classes nobody depends on are deleted, referenced ones are kept as bare stubs
+        tx.run("""
+            MATCH (c:Class {repo: $repo, generation: $generation}) WHERE c.id IN $classes AND NOT ()-->(c)
+            DELETE c
+        """, classes=classes, **scope)
+        tx.run("""
+            MATCH (c:Class {repo: $repo, generation: $generation}) WHERE c.id IN $classes
+            REMOVE c.file_name, c.type, c.functionalitySummary, c.layer
+        """, classes=classes, **scope)
+
+    def write_batch(self, batch: List[CodeMetadata], replace_files: bool = False):
+        """
+        Writes one micro-batch in a single transaction. With replace_files the
+        previous subgraph of each file is dropped in the same transaction.
+        """
+        with self._driver.session() as session:
+            if replace_files:
+                session.execute_write(self._replace_batch, batch)
             else:
-                last_dot_index = external_dependency.rfind('.')
-                dep_package = external_dependency[:last_dot_index]
-                dep_class_name = external_dependency[last_dot_index + 1:]
-
-                #print(f"------------------\n")
-                #print(f"external_dependency: {external_dependency}, dep_package: {dep_package}, dep_class_name: {dep_class_name}")
-
-
-                tx.run("""
-                    MATCH (c1:Class {name: $class_name})
-                    MERGE(c2:Class {name: $dep_class_name})
-                    MERGE (c1)-[:HAS_EXTERNAL_DEPENDENCY_ON]->(c2)
-                    MERGE (p3: Package {name: $dep_package})
-                    MERGE (c2)-[:BELONGS_TO_PACKAGE]->(p3)
-            """, class_name=metadata.class_name, dep_class_name=dep_class_name, dep_package=dep_package)
-
-        print("External dependencies added")
-
-        #Add Fields / Attributes
-        for field in metadata.fields:
-            tx.run("""
-                MATCH (c:Class {name: $class_name})
-                MERGE (f:Field {name: $field_name, type: $field_type})
-                SET f.isPrimaryKey = $is_primary_key, f.isPublic = $is_public, f.isStatic = $is_static
-                MERGE (c)-[:HAS_FIELD]->(f)
-            """, class_name=metadata.class_name, field_name=field.name,
-            field_type=field.type, is_primary_key=field.is_primary, is_public=field.is_public, is_static=field.is_static)
-            for anno_name in field.annotations:
-                 tx.run("""
-                    MATCH (f:Field {name: $field_name, type: $field_type})
-                    MERGE (a:Annotation {name: $anno_name})
-                    MERGE (f)-[:HAS_ANNOTATION]->(a)
-                """, field_name=field.name, field_type=field.type, anno_name=anno_name)        
-
-        print("Fields added")
-
-        #Add Methods, Parameters and Method Annotations
-        for method in metadata.methods:
-            
-            local_pseudo_code = method.pseudo_code
-            if local_pseudo_code is None:
-                #print(f"Didnt get Pseudo code for {method.name}. Setting Blank")
-                local_pseudo_code = "NA"
-
-            local_description = method.description
-            if local_description is None:
-                local_description = "NA"
-            
-            tx.run("""
-                MATCH (c:Class {name: $class_name})
-                MERGE (m:Method {name: $method_name, returnType: $return_type, description: $description, pseudoCode: $pseudo_code})
-                MERGE (c)-[:HAS_METHOD]->(m)
-            """, class_name=metadata.class_name, method_name=method.name,
-            return_type=method.return_type, description=local_description, pseudo_code=local_pseudo_code)
-
-            #Parameters
-            for param in method.parameters:
-                tx.run("""
-                    MATCH (m:Method {name: $method_name})
-                    MERGE (pa:Parameter {name: $param_name, type: $param_type})
-                    MERGE (m)-[:HAS_PARAMETER]->(pa)
-                """, method_name=method.name, param_name=param.name, param_type=param.type)
-
-            #Annotations
-            for anno_name in method.annotations:
-                tx.run("""
-                    MATCH (m:Method {name: $method_name})
-                    MERGE (a:Annotation {name: $anno_name})
-                    MERGE (m)-[:HAS_ANNOTATION]->(a)
-                """, method_name=method.name, anno_name=anno_name)  
-
-            #Exceptions
-            for excep_name in method.throws_exceptions:
-                tx.run("""
-                    MATCH (m:Method {name: $method_name})
-                    MERGE (e:Exception {name: $excep_name})
-                    MERGE (m)-[:THROWS_EXCEPTION]->(e)
-                """, method_name=method.name, excep_name=excep_name)
-
-            #Dependencies      
-            for dependency_name in method.internal_dependencies:
-                if (dependency_name in internal_dependency_classes):
-                    tx.run(""" 
-                        MATCH (m:Method {name: $method_name})
-                        MERGE(c:Class {name: $class_name})
-                        MERGE (m)-[:HAS_DEPENDENCY_ON]->(c)            
-                    """, method_name=method.name, class_name=dependency_name)
-        
-        print("Methods added")
-
-        #Add Interfaces
-
-
-    def save_code_metadata_collection(self, metadata_collection):
-
+                session.execute_write(self._write_batch, batch)
+        self._track_written(batch)
+
+    def delete_files(self, file_paths):
+        """Drops the subgraph of a set of files from the current generation, delete_file_batch_size files per transaction."""
+        file_paths = list(file_paths)
+        if not file_paths:
+            return
+        deleted = 0
+        with self._driver.session() as session:
+            for chunk in batches(file_paths, self.delete_file_batch_size):
+                session.execute_write(self._delete_file_subgraph, chunk)
+                deleted += len(chunk)
+                print(f"Deleted the subgraph of {deleted}/{len(file_paths)} files of repository {self.repo}")
+
+    def delete_all(self) -> int:
+        """
+        Deletes every node of this connector's repository (all generations) in batches,
+        other repositories are untouched.
+        """
+        return self._delete_in_batches(f"repository {self.repo}")
+
+    def delete_repository(self) -> int:
+        """delete_all plus the Repository node, so the repository is no longer listed."""
+        deleted = self.delete_all()
+        with self._driver.session() as session:
+            session.execute_write(self._delete_repository_node)
+        return deleted
+
+    def register_repository(self, name: str, branch: str = None):
+        """
+        Creates / updates the Repository node listing this repository for the APIs.
+        Nodes loaded before generations existed are moved into generation 0, the
+        initial active generation.
+        """
         with self._driver.session() as session:
-            session.execute_write(self._delete_all)
+            session.execute_write(self._register_repository, name, branch)
+            for label in REPO_LABELS:
+                while session.execute_write(self._tag_unversioned, label):
+                    pass
 
+    def use_active_generation(self):
+        """Incremental loads patch the active generation in place."""
+        with self._driver.session() as session:
+            state = session.execute_read(self._repository_state)
+        self.generation = state["active"] if state and state["active"] is not None else 0
+        self.shadow = False
+        self._written_classes = set()
+        return self.generation
+
+    def begin_generation(self, resume: bool = False):
+        """
+        Starts (or with resume continues) the shadow build of a full load. Resuming a run
+        that was not building a generation, e.g. one started before generations existed,
+        carries on in the active generation.
+        """
+        with self._driver.session() as session:
+            if resume:
+                state = session.execute_read(self._repository_state)
+                if not state or state["building"] is None:
+                    print(f"No unfinished build of repository {self.repo}, resuming in the active generation")
+                    return self.use_active_generation()
+            self.generation = session.execute_write(self._begin_generation, resume)
+        self.shadow = True
+        self._written_classes = set()
+        print(f"Building generation {self.generation} of repository {self.repo}")
+        return self.generation
+
+    def validate_generation(self, generation: int = None) -> bool:
+        """
+        Checks a shadow build before it is published: every class written by this
+        process is there, it has relationships, and it did not shrink below
+        min_generation_ratio of the active generation.
+        """
+        generation = self.generation if generation is None else generation
+        with self._driver.session() as session:
+            state = session.execute_read(self._repository_state)
+            counts = session.execute_read(self._generation_counts, generation)
+            active = None
+            if state and state["active"] is not None and state["active"] != generation:
+                active = session.execute_read(self._generation_counts, state["active"])
+
+        print(f"Generation {generation}: {counts['defined']} classes ({counts['classes']} with dependency stubs), "
+              f"{counts['relationships']} relationships" +
+              (f". Active generation {state['active']}: {active['defined']} classes" if active else ""))
+
+        problems = []
+        if counts["defined"] == 0:
+            problems.append("it has no classes")
+        elif counts["relationships"] == 0:
+            problems.append("it has no relationships")
+        if counts["defined"] < len(self._written_classes):
+            problems.append(f"{len(self._written_classes) - counts['defined']} written classes are missing")
+        if active and active["defined"] and counts["defined"] < active["defined"] * self.min_generation_ratio:
+            problems.append(f"it has less than {self.min_generation_ratio:.0%} of the active generation's classes")
+
+        for problem in problems:
+            print(f"Generation {generation} not published: {problem}")
+        return not problems
+
+    def activate_generation(self, generation: int = None):
+        """Atomically makes the shadow build the generation every reader sees."""
+        generation = self.generation if generation is None else generation
+        with self._driver.session() as session:
+            #The generation is complete, so its analytics are computed before the short swap transaction
+            analytics = session.execute_read(analytics_json, self.repo, generation)
+            record = session.execute_write(self._activate_generation, generation, analytics)
+        if record is None:
+            raise RuntimeError(f"Generation {generation} of repository {self.repo} is not being built")
+        self.shadow = False
+        print(f"Generation {generation} of repository {self.repo} is active (version {record['version']})")
+
+    def collect_garbage(self) -> int:
+        """
+        Deletes old and abandoned generations of this repository in batched transactions,
+        one generation at a time. The active generation and a build in progress are kept.
+        Generations are numbered in order, so everything below the oldest kept one is gone
+        afterwards and is not looked at again (Repository.collectedGeneration).
+        """
+        with self._driver.session() as session:
+            state = session.execute_read(self._repository_state)
+        if not state or state["active"] is None:
+            return 0
+        keep = [generation for generation in (state["active"], state["building"]) if generation is not None]
+        newest = max(keep + [(state["next"] or 0) - 1])
+        deleted = 0
+        for generation in range(state["collected"] or 0, newest + 1):
+            if generation not in keep:
+                deleted += self._delete_in_batches(f"generation {generation} of repository {self.repo}", generation)
+        with self._driver.session() as session:
+            session.execute_write(self._mark_collected, min(keep))
+        return deleted
+
+    def bump_version(self):
+        """
+        Marks an in place change of the active generation (incremental load, file delete),
+        so caches keyed by the repository version refresh, and recomputes its analytics.
+        Publishing a generation does both too.
+        """
+        with self._driver.session() as session:
+            analytics = session.execute_read(analytics_json, self.repo, self.generation)
+            session.execute_write(self._bump_version, analytics)
+
+    def publish_generation(self, garbage_collect: bool = True) -> bool:
+        """validate -> swap -> garbage collect. The previous generation stays active when the check fails."""
+        if not self.validate_generation():
+            return False
+        self.activate_generation()
+        if garbage_collect:
+            self.collect_garbage()
+        return True
+
+    def save_code_metadata_collection(self, metadata_collection, batch_size: int = None):
+        """Full reload as a shadow build, readers keep the active generation until it is published."""
+        self.begin_generation()
 
         print(f"Saving Metadata to Neo4j DB. Collection Size: {len(metadata_collection)}")
         with self._driver.session() as session:
-            for metadata in metadata_collection:
-                #self.save_code_metadata(metadata=metadata)
-                session.execute_write(self._create_class_node, metadata)
-        
\ No newline at end of file
+            self._save_in_batches(session, metadata_collection, batch_size)
+
+        return self.publish_generation()
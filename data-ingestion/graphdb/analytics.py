@@ -0,0 +1,115 @@
+import datetime
+import json
+import os
+
+#Bump when the document layout changes, readers fall back to live queries on a mismatch
+ANALYTICS_VERSION = 1
+#Length of the ranked lists (dependency counts, fan-in, coupled package pairs)
+DEFAULT_ANALYTICS_TOP_N = 20
+
+#Labels counted for the node count summary
+COUNTED_LABELS = ["Class", "Method", "Field", "Parameter", "Package", "File", "Annotation", "Exception"]
+
+
+def _rows(tx, query: str, **params):
+    return [dict(record) for record in tx.run(query, **params)]
+
+
+def compute_analytics(tx, repo: str, generation: int, top_n: int = None) -> dict:
+    """
+    Dashboard aggregates and architecture metrics of one generation of a repository,
+    computed once per load so the APIs read a document instead of scanning the graph.
+    Runs in the given transaction (read or write).
+    """
+    top_n = top_n or int(os.getenv("ANALYTICS_TOP_N", DEFAULT_ANALYTICS_TOP_N))
+    scope = {"repo": repo, "generation": generation}
+
+    #Same aggregate as the /classes/dependencies live query, i.e. fan-out
+    classes_with_dependencies = _rows(tx, """
+        MATCH (p:Package)<-[:BELONGS_TO_PACKAGE]-(c:Class {repo: $repo, generation: $generation})-[r:HAS_INTERNAL_DEPENDENCY_ON]->(:Class)
+        RETURN p.name AS package_name, c.name AS class_name, c.id AS class_id, count(r) AS dependency_count
+        ORDER BY dependency_count DESC LIMIT $top_n
+    """, top_n=top_n, **scope)
+
+    fan_in = _rows(tx, """
+        MATCH (c:Class {repo: $repo, generation: $generation})<-[r:HAS_INTERNAL_DEPENDENCY_ON]-(:Class)
+        WITH c, count(r) AS dependent_count
+        ORDER BY dependent_count DESC LIMIT $top_n
+        OPTIONAL MATCH (c)-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN p.name AS package_name, c.name AS class_name, c.id AS class_id, dependent_count
+        ORDER BY dependent_count DESC
+    """, top_n=top_n, **scope)
+
+    classes_per_package = _rows(tx, """
+        MATCH (c:Class {repo: $repo, generation: $generation})-[:BELONGS_TO_PACKAGE]->(p:Package)
+        RETURN p.name AS package_name, count(c) AS class_count
+        ORDER BY class_count DESC
+    """, **scope)
+
+    #One index backed count per label instead of a label-less scan
+    node_counts = []
+    for label in COUNTED_LABELS:
+        count = tx.run(f"MATCH (n:{label} {{repo: $repo, generation: $generation}}) RETURN count(n) AS count",
+                       **scope).single()["count"]
+        if count:
+            node_counts.append({"label": label, "count": count})
+    total_classes = next((item["count"] for item in node_counts if item["label"] == "Class"), 0)
+
+    layer_distribution = _rows(tx, """
+        MATCH (c:Class {repo: $repo, generation: $generation}) WHERE c.layer IS NOT NULL
+        RETURN c.layer AS layer, count(c) AS class_count
+        ORDER BY class_count DESC
+    """, **scope)
+
+    dependency_totals = tx.run("""
+        MATCH (c:Class {repo: $repo, generation: $generation})
+        OPTIONAL MATCH (c)-[r:HAS_INTERNAL_DEPENDENCY_ON]->()
+        RETURN count(r) AS dependencies, count(DISTINCT CASE WHEN c.file_name IS NULL THEN null ELSE c END) AS defined
+    """, **scope).single()
+
+    package_dependencies = _rows(tx, """
+        MATCH (p1:Package)<-[:BELONGS_TO_PACKAGE]-(:Class {repo: $repo, generation: $generation})
+              -[:HAS_INTERNAL_DEPENDENCY_ON]->(:Class)-[:BELONGS_TO_PACKAGE]->(p2:Package)
+        WHERE p1 <> p2
+        RETURN p1.name AS source_package, p2.name AS target_package, count(*) AS dependency_count
+        ORDER BY dependency_count DESC
+    """, **scope)
+
+    #Afferent (Ca) / efferent (Ce) coupling and instability Ce / (Ca + Ce) per package
+    coupling = {item["package_name"]: {"afferent": set(), "efferent": set()} for item in classes_per_package}
+    for item in package_dependencies:
+        coupling.setdefault(item["source_package"], {"afferent": set(), "efferent": set()})["efferent"].add(item["target_package"])
+        coupling.setdefault(item["target_package"], {"afferent": set(), "efferent": set()})["afferent"].add(item["source_package"])
+    package_coupling = []
+    for package_name, edges in coupling.items():
+        afferent, efferent = len(edges["afferent"]), len(edges["efferent"])
+        package_coupling.append({
+            "package_name": package_name,
+            "afferent": afferent,
+            "efferent": efferent,
+            "instability": round(efferent / (afferent + efferent), 3) if afferent + efferent else 0.0,
+        })
+    package_coupling.sort(key=lambda item: (-(item["afferent"] + item["efferent"]), item["package_name"]))
+
+    defined = dependency_totals["defined"]
+    return {
+        "analytics_version": ANALYTICS_VERSION,
+        "repo": repo,
+        "generation": generation,
+        "computed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "total_classes": total_classes,
+        "defined_classes": defined,
+        "internal_dependencies": dependency_totals["dependencies"],
+        "average_fan_out": round(dependency_totals["dependencies"] / defined, 3) if defined else 0.0,
+        "node_counts": node_counts,
+        "classes_with_dependencies": classes_with_dependencies,
+        "fan_in": fan_in,
+        "classes_per_package": classes_per_package,
+        "layer_distribution": layer_distribution,
+        "package_coupling": package_coupling,
+        "package_dependencies": package_dependencies[:top_n],
+    }
+
+
+def analytics_json(tx, repo: str, generation: int) -> str:
+    return json.dumps(compute_analytics(tx, repo, generation))
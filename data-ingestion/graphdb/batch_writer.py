@@ -0,0 +1,230 @@
+from typing import Dict, List
+
+from model.CodeMetadata import CodeMetadata
+
+#One parameterised UNWIND statement per node / relationship type.
+#Statements run in this order inside a single transaction per batch.
+#Every node is scoped by $repo, so repositories never share or touch each other's nodes,
+#and tagged with $generation, so a full reload builds next to the graph readers see.
+WRITE_STATEMENTS = [
+    ("classes", """
+        UNWIND $rows AS row
+        MERGE (c:Class {repo: $repo, generation: $generation, id: row.class_id})
+        SET c.name = row.class_name,
+            c.file_name = row.file_name,
+            c.type = 'Class',
+            c.functionalitySummary = row.summary,
+            c.layer = row.layer
+        MERGE (p:Package {repo: $repo, generation: $generation, name: row.package_name})
+        MERGE (c)-[:BELONGS_TO_PACKAGE]->(p)
+        MERGE (f:File {repo: $repo, generation: $generation, path: row.file_path})
+        SET f.name = row.file_name
+        MERGE (f)-[:DEFINES_CLASS]->(c)
+    """),
+    ("class_annotations", """
+        UNWIND $rows AS row
+        MATCH (c:Class {repo: $repo, generation: $generation, id: row.class_id})
+        MERGE (a:Annotation {repo: $repo, generation: $generation, name: row.anno_name})
+        MERGE (c)-[:HAS_ANNOTATION]->(a)
+    """),
+    ("internal_dependencies", """
+        UNWIND $rows AS row
+        MATCH (c1:Class {repo: $repo, generation: $generation, id: row.class_id})
+        MERGE (c2:Class {repo: $repo, generation: $generation, id: row.dep_class_id})
+        ON CREATE SET c2.name = row.dep_class_name
+        MERGE (c1)-[:HAS_INTERNAL_DEPENDENCY_ON]->(c2)
+        FOREACH (_ IN CASE WHEN row.dep_package IS NULL THEN [] ELSE [1] END |
+            MERGE (p:Package {repo: $repo, generation: $generation, name: row.dep_package})
+            MERGE (c2)-[:BELONGS_TO_PACKAGE]->(p)
+        )
+    """),
+    ("external_dependencies", """
+        UNWIND $rows AS row
+        MATCH (c1:Class {repo: $repo, generation: $generation, id: row.class_id})
+        MERGE (c2:Class {repo: $repo, generation: $generation, id: row.dep_class_id})
+        ON CREATE SET c2.name = row.dep_class_name
+        MERGE (c1)-[:HAS_EXTERNAL_DEPENDENCY_ON]->(c2)
+        FOREACH (_ IN CASE WHEN row.dep_package IS NULL THEN [] ELSE [1] END |
+            MERGE (p:Package {repo: $repo, generation: $generation, name: row.dep_package})
+            MERGE (c2)-[:BELONGS_TO_PACKAGE]->(p)
+        )
+    """),
+    ("fields", """
+        UNWIND $rows AS row
+        MATCH (c:Class {repo: $repo, generation: $generation, id: row.class_id})
+        MERGE (f:Field {repo: $repo, generation: $generation, id: row.field_id})
+        SET f.name = row.field_name, f.type = row.field_type,
+            f.isPrimaryKey = row.is_primary_key, f.isPublic = row.is_public, f.isStatic = row.is_static
+        MERGE (c)-[:HAS_FIELD]->(f)
+    """),
+    ("field_annotations", """
+        UNWIND $rows AS row
+        MATCH (f:Field {repo: $repo, generation: $generation, id: row.field_id})
+        MERGE (a:Annotation {repo: $repo, generation: $generation, name: row.anno_name})
+        MERGE (f)-[:HAS_ANNOTATION]->(a)
+    """),
+    ("methods", """
+        UNWIND $rows AS row
+        MATCH (c:Class {repo: $repo, generation: $generation, id: row.class_id})
+        MERGE (m:Method {repo: $repo, generation: $generation, id: row.method_id})
+        SET m.name = row.method_name, m.returnType = row.return_type,
+            m.description = row.description, m.pseudoCode = row.pseudo_code
+        MERGE (c)-[:HAS_METHOD]->(m)
+    """),
+    ("parameters", """
+        UNWIND $rows AS row
+        MATCH (m:Method {repo: $repo, generation: $generation, id: row.method_id})
+        MERGE (pa:Parameter {repo: $repo, generation: $generation, id: row.param_id})
+        SET pa.name = row.param_name, pa.type = row.param_type
+        MERGE (m)-[:HAS_PARAMETER]->(pa)
+    """),
+    ("method_annotations", """
+        UNWIND $rows AS row
+        MATCH (m:Method {repo: $repo, generation: $generation, id: row.method_id})
+        MERGE (a:Annotation {repo: $repo, generation: $generation, name: row.anno_name})
+        MERGE (m)-[:HAS_ANNOTATION]->(a)
+    """),
+    ("exceptions", """
+        UNWIND $rows AS row
+        MATCH (m:Method {repo: $repo, generation: $generation, id: row.method_id})
+        MERGE (e:Exception {repo: $repo, generation: $generation, name: row.excep_name})
+        MERGE (m)-[:THROWS_EXCEPTION]->(e)
+    """),
+    ("method_dependencies", """
+        UNWIND $rows AS row
+        MATCH (m:Method {repo: $repo, generation: $generation, id: row.method_id})
+        MERGE (c:Class {repo: $repo, generation: $generation, id: row.dep_class_id})
+        ON CREATE SET c.name = row.dep_class_name
+        MERGE (m)-[:HAS_DEPENDENCY_ON]->(c)
+    """),
+]
+
+
+#Repository used when none is given (single code base setups)
+DEFAULT_REPO = "default"
+
+
+def repo_key(name: str, branch: str = None) -> str:
+    """
+    Value of the `repo` property on every node, e.g. shop-service or shop-service@develop
+    """
+    return f"{name}@{branch}" if branch else name
+
+
+def class_id(package: str, class_name: str) -> str:
+    """
+    Fully qualified class name, e.g. com.app.service.UserService
+    """
+    return f"{package}.{class_name}" if package else class_name
+
+
+def method_id(owner_id: str, method_name: str, parameter_types: List[str]) -> str:
+    """
+    e.g. com.app.service.UserService#findById(Long)
+    """
+    return f"{owner_id}#{method_name}({','.join(parameter_types)})"
+
+
+def field_id(owner_id: str, field_name: str) -> str:
+    """
+    e.g. com.app.model.User.email
+    """
+    return f"{owner_id}.{field_name}"
+
+
+def parameter_id(owner_method_id: str, param_name: str) -> str:
+    return f"{owner_method_id}/{param_name}"
+
+
+def _split_dependency(dependency: str):
+    """
+    'com.app.model.User' -> ('com.app.model', 'User'), 'User' -> (None, 'User')
+    """
+    if '.' not in dependency:
+        return None, dependency
+    last_dot_index = dependency.rfind('.')
+    return dependency[:last_dot_index], dependency[last_dot_index + 1:]
+
+
+def build_rows(batch: List[CodeMetadata]) -> Dict[str, List[dict]]:
+    """
+    Flattens a batch of CodeMetadata into one list of row parameters per statement.
+    """
+    rows = {key: [] for key, _ in WRITE_STATEMENTS}
+
+    for metadata in batch:
+        owner_id = class_id(metadata.package, metadata.class_name)
+        layer = metadata.architecture_layer
+
+        rows["classes"].append({
+            "class_id": owner_id,
+            "class_name": metadata.class_name,
+            "file_name": metadata.file_name,
+            "file_path": metadata.file_path or metadata.file_name,
+            "package_name": metadata.package,
+            "summary": metadata.functionality_summary,
+            "layer": getattr(layer, "value", layer),
+        })
+
+        for anno_name in metadata.class_annotations or []:
+            rows["class_annotations"].append({"class_id": owner_id, "anno_name": anno_name})
+
+        #Simple name -> id, used to cross check method level dependency
+        internal_dependency_ids = {}
+        for internal_dependency in metadata.internal_dependencies:
+            dep_package, dep_class_name = _split_dependency(internal_dependency)
+            #Unqualified internal references resolve to the class' own package
+            dep_class_id = class_id(dep_package or metadata.package, dep_class_name)
+            internal_dependency_ids[dep_class_name] = dep_class_id
+            rows["internal_dependencies"].append({
+                "class_id": owner_id, "dep_class_id": dep_class_id,
+                "dep_class_name": dep_class_name, "dep_package": dep_package
+            })
+
+        for external_dependency in metadata.external_dependencies:
+            dep_package, dep_class_name = _split_dependency(external_dependency)
+            rows["external_dependencies"].append({
+                "class_id": owner_id, "dep_class_id": external_dependency,
+                "dep_class_name": dep_class_name, "dep_package": dep_package
+            })
+
+        for field in metadata.fields:
+            owned_field_id = field_id(owner_id, field.name)
+            rows["fields"].append({
+                "class_id": owner_id, "field_id": owned_field_id, "field_name": field.name, "field_type": field.type,
+                "is_primary_key": field.is_primary, "is_public": field.is_public, "is_static": field.is_static
+            })
+            for anno_name in field.annotations:
+                rows["field_annotations"].append({"field_id": owned_field_id, "anno_name": anno_name})
+
+        for method in metadata.methods:
+            parameters = method.parameters or []
+            owned_method_id = method_id(owner_id, method.name, [param.type for param in parameters])
+            rows["methods"].append({
+                "class_id": owner_id, "method_id": owned_method_id,
+                "method_name": method.name, "return_type": method.return_type,
+                "description": method.description if method.description is not None else "NA",
+                "pseudo_code": method.pseudo_code if method.pseudo_code is not None else "NA",
+            })
+            for param in parameters:
+                rows["parameters"].append({
+                    "method_id": owned_method_id, "param_id": parameter_id(owned_method_id, param.name),
+                    "param_name": param.name, "param_type": param.type
+                })
+            for anno_name in method.annotations:
+                rows["method_annotations"].append({"method_id": owned_method_id, "anno_name": anno_name})
+            for excep_name in method.throws_exceptions:
+                rows["exceptions"].append({"method_id": owned_method_id, "excep_name": excep_name})
+            for dependency_name in method.internal_dependencies:
+                if dependency_name in internal_dependency_ids:
+                    rows["method_dependencies"].append({
+                        "method_id": owned_method_id,
+                        "dep_class_id": internal_dependency_ids[dependency_name], "dep_class_name": dependency_name
+                    })
+
+    return rows
+
+
+def batches(items: list, batch_size: int):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
@@ -0,0 +1,106 @@
+from neo4j.exceptions import Neo4jError
+
+#Constraints and indexes backing every MERGE / MATCH key used by the writer.
+#All statements are idempotent (IF [NOT] EXISTS) and safe to run on every start.
+SCHEMA_STATEMENTS = [
+    #Classes were keyed by simple name before fully qualified ids, drop the old keys
+    "DROP CONSTRAINT class_name_unique IF EXISTS",
+    "DROP INDEX field_name_type IF EXISTS",
+    "DROP INDEX parameter_name_type IF EXISTS",
+
+    #Keys are unique per repository since nodes are scoped by `repo`, drop the global ones
+    "DROP CONSTRAINT class_id_unique IF EXISTS",
+    "DROP CONSTRAINT method_id_unique IF EXISTS",
+    "DROP CONSTRAINT field_id_unique IF EXISTS",
+    "DROP CONSTRAINT parameter_id_unique IF EXISTS",
+    "DROP CONSTRAINT package_name_unique IF EXISTS",
+    "DROP CONSTRAINT file_path_unique IF EXISTS",
+    "DROP CONSTRAINT annotation_name_unique IF EXISTS",
+    "DROP CONSTRAINT exception_name_unique IF EXISTS",
+    "DROP INDEX class_name IF EXISTS",
+    "DROP INDEX method_name IF EXISTS",
+    "DROP INDEX file_name IF EXISTS",
+
+    #Keys became unique per (repo, generation) with shadow builds, drop the (repo, key) ones
+    "DROP CONSTRAINT class_repo_id_unique IF EXISTS",
+    "DROP CONSTRAINT method_repo_id_unique IF EXISTS",
+    "DROP CONSTRAINT field_repo_id_unique IF EXISTS",
+    "DROP CONSTRAINT parameter_repo_id_unique IF EXISTS",
+    "DROP CONSTRAINT package_repo_name_unique IF EXISTS",
+    "DROP CONSTRAINT file_repo_path_unique IF EXISTS",
+    "DROP CONSTRAINT annotation_repo_name_unique IF EXISTS",
+    "DROP CONSTRAINT exception_repo_name_unique IF EXISTS",
+    "DROP INDEX class_repo_name IF EXISTS",
+    "DROP INDEX method_repo_name IF EXISTS",
+    "DROP INDEX file_repo_name IF EXISTS",
+
+    #Composite uniqueness constraints on (repo, generation, identity key), each one also
+    #creates a range index that serves the (repo, generation) lookups of the read paths
+    "CREATE CONSTRAINT repository_key_unique IF NOT EXISTS FOR (r:Repository) REQUIRE r.key IS UNIQUE",
+    "CREATE CONSTRAINT class_scoped_id_unique IF NOT EXISTS FOR (c:Class) REQUIRE (c.repo, c.generation, c.id) IS UNIQUE",
+    "CREATE CONSTRAINT method_scoped_id_unique IF NOT EXISTS FOR (m:Method) REQUIRE (m.repo, m.generation, m.id) IS UNIQUE",
+    "CREATE CONSTRAINT field_scoped_id_unique IF NOT EXISTS FOR (f:Field) REQUIRE (f.repo, f.generation, f.id) IS UNIQUE",
+    "CREATE CONSTRAINT parameter_scoped_id_unique IF NOT EXISTS FOR (pa:Parameter) REQUIRE (pa.repo, pa.generation, pa.id) IS UNIQUE",
+    "CREATE CONSTRAINT package_scoped_name_unique IF NOT EXISTS FOR (p:Package) REQUIRE (p.repo, p.generation, p.name) IS UNIQUE",
+    "CREATE CONSTRAINT file_scoped_path_unique IF NOT EXISTS FOR (f:File) REQUIRE (f.repo, f.generation, f.path) IS UNIQUE",
+    "CREATE CONSTRAINT annotation_scoped_name_unique IF NOT EXISTS FOR (a:Annotation) REQUIRE (a.repo, a.generation, a.name) IS UNIQUE",
+    "CREATE CONSTRAINT exception_scoped_name_unique IF NOT EXISTS FOR (e:Exception) REQUIRE (e.repo, e.generation, e.name) IS UNIQUE",
+
+    #Range indexes for lookups by simple name within the active generation of a repository
+    "CREATE INDEX class_scoped_name IF NOT EXISTS FOR (c:Class) ON (c.repo, c.generation, c.name)",
+    "CREATE INDEX method_scoped_name IF NOT EXISTS FOR (m:Method) ON (m.repo, m.generation, m.name)",
+    "CREATE INDEX file_scoped_name IF NOT EXISTS FOR (f:File) ON (f.repo, f.generation, f.name)",
+
+    #Text indexes for CONTAINS / ENDS WITH lookups from the agent
+    "CREATE TEXT INDEX class_name_text IF NOT EXISTS FOR (c:Class) ON (c.name)",
+    "CREATE TEXT INDEX package_name_text IF NOT EXISTS FOR (p:Package) ON (p.name)",
+    "CREATE TEXT INDEX method_name_text IF NOT EXISTS FOR (m:Method) ON (m.name)",
+]
+
+
+def ensure_schema(driver):
+    """
+    Creates the constraints and indexes. A statement that fails (e.g. duplicate
+    keys left by an older load) is reported and skipped so the others still apply.
+    Returns the number of failed statements.
+    """
+    failed = 0
+    with driver.session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                session.run(statement).consume()
+            except Neo4jError as e:
+                failed += 1
+                print(f"Schema statement failed: {statement}. Exception: {e}")
+
+    print(f"Schema bootstrap done. {len(SCHEMA_STATEMENTS) - failed}/{len(SCHEMA_STATEMENTS)} statements applied")
+    return failed
+
+
+def schema_report(driver):
+    """
+    Current constraints and index state (ONLINE / POPULATING / FAILED and population %).
+    """
+    with driver.session() as session:
+        constraints = session.run("""
+            SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties
+            RETURN name, type, labelsOrTypes, properties
+            ORDER BY name
+        """).data()
+        indexes = session.run("""
+            SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state, populationPercent
+            RETURN name, type, labelsOrTypes, properties, state, populationPercent
+            ORDER BY name
+        """).data()
+    return {"constraints": constraints, "indexes": indexes}
+
+
+def print_schema_report(report):
+    print("Constraints:")
+    for constraint in report["constraints"]:
+        print(f"  {constraint['name']}: {constraint['type']} on {constraint['labelsOrTypes']} {constraint['properties']}")
+
+    print("Indexes:")
+    for index in report["indexes"]:
+        print(f"  {index['name']}: {index['type']} on {index['labelsOrTypes']} {index['properties']} "
+              f"- {index['state']} ({index['populationPercent']}%)")
@@ -1,107 +1,448 @@
 from model.CodeMetadata import CodeMetadata
-from genai.extract_java_metadata import extract_java_metadata
+from genai.extract_java_metadata import extract_java_metadata, extract_java_metadata_hybrid, enrich_metadata, MODEL_NAME, PROMPT_VERSION, ENRICHMENT_PROMPT_VERSION, PYTHON_OUTLINE_VERSION
+from parsing.java_parser import parse_java_structure, PARSER_VERSION, is_available as java_parser_available
+from parsing.python_parser import parse_python_file, PARSER_VERSION as PYTHON_PARSER_VERSION
+from genai.extraction_pool import ExtractionPool
+from genai.extraction_cache import ExtractionCache
 from graphdb.Neo4jConnector import Neo4jConnector
-import time
+from graphdb.batch_writer import repo_key
+from graphdb.schema import print_schema_report
+from pipeline.streaming import StreamingPipeline
+from pipeline.checkpoint import CheckpointJournal, content_hash, DISCOVERED, EXTRACTED, FAILED
+from pipeline.discovery import Discovery, WorkItem, JAVA, PYTHON
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pipeline.change_detection import ChangeSet, git_changes, build_manifest, load_manifest, save_manifest, manifest_changes
+import os
 
-def navigate_and_load(code_base: str):
+def navigate_and_load(code_base: str, concurrency: int = None, cache: ExtractionCache = None, changes: ChangeSet = None,
+                      journal: CheckpointJournal = None, resume: bool = False, use_ast: bool = True, use_llm: bool = True,
+                      include: list = None, exclude: list = None, use_gitignore: bool = True, languages=(JAVA, PYTHON),
+                      repo: str = None, repo_name: str = None, branch: str = None, pool: ExtractionPool = None,
+                      allow_failures: bool = False):
+    """
+    Streams the code base (or only the files in `changes`) through extraction into Neo4j.
+    A full load builds a new generation of the graph while readers keep the active one,
+    and publishes it (count check, atomic swap, garbage collection of the old one) when
+    no file failed or allow_failures is set. Incremental loads patch the active generation.
+    With a journal every file's progress is checkpointed; with resume, files already
+    written in the journal's current run are skipped and the unfinished build is continued.
+    use_ast extracts the structure with the local Java parser and only asks the LLM for
+    summaries; use_llm=False skips the LLM entirely (structure only).
+    include/exclude are glob lists applied on top of .gitignore and the default excludes.
+    Python files are parsed with ast in a process pool; the LLM only adds summaries.
+    Everything is written into the `repo` scope. A shared
+    ExtractionPool can be passed in when several repositories load in parallel.
+    Returns (loaded, failed_files); failed_files are paths relative to the code base and
+    loaded is False when a full load was not published.
+    """
     print(f"navigate_and_load started for {code_base}")
 
-    import os
-    metadata_collection = []
-
-    debug_mode = False
-    break_len = 3
-
-    #Navigate the code with WALK
-    for root, dirs, files in os.walk(code_base):
-        for file in files:
-            file_path = os.path.join(root, file)
-
-            #Extract metadata from Java file
-            if file.endswith('.java'):
-                metadata = parse_java_metadata(file_path)
-                time.sleep(0.25) #To avoid rate limit issues
-                #print(f"Extracted Metadata: {metadata}")
-                metadata_collection.append(metadata)
-            
-            #Extract metadata from Python 
-            #TODO - Change to POM 
-            elif file.endswith('.py'):
-                #Python extraction
-                print("Processing Python File")
-            
-            #Extract basic details of other types of files
-            else: 
-                #metadata = CodeMetadata(file_name=file)
-                print(f"Skipping file: {file_path}")
-
-            #Temporary break
-            if debug_mode and len(metadata_collection) >= break_len:
-                break;
-
-        #Temporary break
-        if debug_mode and len(metadata_collection) >= break_len:
-                break;
-
-    #Load data to Neo4j DB
-    if metadata_collection:
-        store_in_graphdb(metadata_collection)
-
-    return
-
-
-def parse_java_metadata(java_code_file: str):
+    #Work items are routed to the extractor for their kind
+    extractors = {
+        JAVA: lambda item: parse_java_metadata(item.path, pool, cache, code_base, use_ast=use_ast, use_llm=use_llm),
+        PYTHON: lambda item: parse_python_metadata(item, cpu_pool, pool, code_base, use_llm=use_llm, cache=cache),
+    }
+    extractors = {kind: extractor for kind, extractor in extractors.items() if kind in languages}
+    python_workers = int(os.getenv("PYTHON_PARSE_WORKERS", os.cpu_count() or 1)) if PYTHON in extractors else 0
+    cpu_pool = None
+
+    connector = Neo4jConnector(repo=repo)
+    try:
+        connector.register_repository(repo_name or connector.repo, branch)
+
+        discovery = Discovery(code_base, include=include, exclude=exclude, kinds=extractors.keys(),
+                              use_gitignore=use_gitignore)
+
+        #Incremental load only looks at the changed files, filtered like a full walk
+        if changes is not None:
+            print(f"Incremental load. Added/Modified: {len(changes.added_or_modified)}, Removed: {len(changes.removed)}")
+            connector.use_active_generation()
+            connector.delete_files(changes.removed)
+            items = (item for item in map(discovery.work_item, changes.added_or_modified) if item is not None)
+        else:
+            connector.begin_generation(resume=resume)
+            items = discovery.walk()
+
+        if journal is not None:
+            items = _journaled(items, journal, resume)
+
+        #Files may already be partially in the generation when resuming, so replace them
+        replace_files = changes is not None or resume
+
+        def extract(item: WorkItem):
+            metadata = extractors[item.kind](item)
+            if journal is not None and metadata is not None:
+                journal.record(item.relative_path, EXTRACTED)
+            return metadata
+
+        #discovery -> rate limited extraction -> micro-batched writes, all streaming
+        with (nullcontext(pool) if pool is not None else ExtractionPool(concurrency=concurrency)) as pool:
+            if python_workers:
+                cpu_pool = ProcessPoolExecutor(max_workers=python_workers)
+            #The pool caps in-flight LLM calls, the extra workers keep the parser processes busy
+            pipeline = StreamingPipeline(
+                extract=extract,
+                write_batch=lambda batch: connector.write_batch(batch, replace_files=replace_files),
+                workers=pool.concurrency + python_workers,
+                relative_path=lambda item: item.relative_path,
+                on_written=journal.record_written if journal is not None else None,
+                on_failed=(lambda path, error: journal.record(path, FAILED, error=error)) if journal is not None else None,
+            )
+            result = pipeline.run(items)
+
+        print(f"Extracted: {result.extracted}, Written: {result.written}, Failed: {len(result.failed_files)}")
+        published = True
+        if connector.shadow:
+            if result.failed_files and not allow_failures:
+                published = False
+                print(f"Generation {connector.generation} is not published because {len(result.failed_files)} files failed, "
+                      f"the active generation stays in place. Retry them with --resume")
+            else:
+                published = connector.publish_generation()
+        else:
+            #In place changes are visible right away, a new version refreshes the API caches
+            connector.bump_version()
+
+    except Exception as e:
+        print(f"Error in saving data to DB. Exception: {e}")
+        return False, []
+
+    finally:
+        connector.close()
+        if cpu_pool is not None:
+            cpu_pool.shutdown()
+
+    #A run with failures or an unpublished generation stays open so --resume can continue it
+    if journal is not None and published and not result.failed_files:
+        journal.finish_run()
+    if cache is not None:
+        print(f"Extraction cache hits: {cache.hits}, misses: {cache.misses}")
+        cache.evict()
+
+    #Files that failed to extract or write are reported so they are picked up again next run
+    return published, result.failed_files
+
+
+def _journaled(items, journal: CheckpointJournal, resume: bool):
+    """
+    Records every discovered file with its content hash and, when resuming,
+    drops files the current run has already written with the same content.
+    """
+    skipped = 0
+    for item in items:
+        file_hash = content_hash(item.path)
+        if resume and journal.is_complete(item.relative_path, file_hash):
+            skipped += 1
+            continue
+        journal.record(item.relative_path, DISCOVERED, file_hash)
+        yield item
+
+    journal.discovery_done()
+    if resume:
+        print(f"Resume skipped {skipped} files already written")
+
+
+def parse_java_metadata(java_code_file: str, pool: ExtractionPool = None, cache: ExtractionCache = None, code_base: str = None,
+                        use_ast: bool = True, use_llm: bool = True):
     
     #Read file 
     with open(java_code_file, 'r', encoding='utf-8') as f:
         file_content = f.read()
 
+    #Structure only, parsed locally without any LLM call
+    if not use_llm:
+        parsed = parse_java_structure(file_content, os.path.basename(java_code_file))
+        return _with_file_path(parsed[0] if parsed else None, java_code_file, code_base)
+
+    #Unchanged files are served from the extraction cache without an LLM call
+    if cache is not None:
+        metadata = cache.get(file_content)
+        if metadata is not None:
+            return _with_file_path(metadata, java_code_file, code_base)
+
     #print(f"\nJava File Content: {file_content}")
     #Call Gen AI powered solution to get the medatada
-    metadata = extract_java_metadata(file_content)
+    if use_ast:
+        #Every LLM call (one per method chunk) goes through the pool
+        metadata = extract_java_metadata_hybrid(file_content, os.path.basename(java_code_file), pool=pool)
+    elif pool is not None:
+        metadata = pool.extract(file_content)
+    else:
+        metadata = extract_java_metadata(file_content)
+
+    if cache is not None:
+        cache.put(file_content, metadata)
     #ok = input("\nPress enter to continue...") 
+    return _with_file_path(metadata, java_code_file, code_base)
+
+
+def parse_python_metadata(item: WorkItem, cpu_pool: ProcessPoolExecutor = None, pool: ExtractionPool = None,
+                          code_base: str = None, use_llm: bool = True, cache: ExtractionCache = None):
+    """
+    One CodeMetadata per class in the module (plus one for module level functions),
+    parsed with ast in the process pool. The LLM is only asked for summaries.
+    """
+    #Unchanged files are served from the extraction cache without an LLM call. The key
+    #carries the Python parser, enrichment prompt and outline versions, and the module
+    #path the ids are derived from
+    namespace = (f"{PYTHON}{PYTHON_PARSER_VERSION}-enrich{ENRICHMENT_PROMPT_VERSION}-outline{PYTHON_OUTLINE_VERSION}"
+                 f":{item.relative_path}")
+    file_content = None
+    if cache is not None and use_llm:
+        with open(item.path, 'r', encoding='utf-8', errors='replace') as f:
+            file_content = f.read()
+        records = cache.get_records(file_content, namespace=namespace)
+        if records is not None:
+            return [_with_file_path(metadata, item.path, code_base) for metadata in records]
+
+    if cpu_pool is not None:
+        parsed = cpu_pool.submit(parse_python_file, item.path, item.relative_path, use_llm).result()
+    else:
+        parsed = parse_python_file(item.path, item.relative_path, use_llm)
+    if parsed is None:
+        return None
+
+    records, method_sources = parsed
+    for metadata, sources in zip(records, method_sources):
+        if use_llm:
+            enrich_metadata(metadata, sources, pool, language="Python")
+        _with_file_path(metadata, item.path, code_base)
+
+    if file_content is not None:
+        cache.put_records(file_content, records, namespace=namespace)
+    return records
+
+
+def _relative_path(file_path: str, code_base: str = None):
+    relative_path = os.path.relpath(file_path, code_base) if code_base else file_path
+    return relative_path.replace(os.sep, '/')
+
+
+def _with_file_path(metadata: CodeMetadata, java_code_file: str, code_base: str = None):
+    #File identity comes from the loader, not from the LLM
+    if metadata is not None:
+        metadata.file_path = _relative_path(java_code_file, code_base)
+        metadata.file_name = os.path.basename(java_code_file)
     return metadata
 
 
-def store_in_graphdb(metadata_collection):
-    
+COMMANDS = ("load", "schema", "status", "delete")
+
+
+def run_load(args):
+    #Get the code base paths from arg
+    code_bases = args.code_base
+    if not code_bases:
+        print("Code Base Path not passed as ARG, using from ENV")
+        code_base = os.getenv('CODE_BASE_PATH')
+        code_bases = [code_base] if code_base else []
+        #print(f"Code Base from ENV: {code_base}")
+
+    #If not available in ENV as well, raise and error
+    if not code_bases:
+        raise ValueError('Code base path not passed as arg and not set in ENV')
+    if len(code_bases) > 1 and (args.repo or args.base or args.manifest):
+        raise ValueError('--repo, --base and --manifest can only be used with a single code base')
+    if len(code_bases) == 1 and not args.repo:
+        args.repo = os.getenv('REPO_NAME')
+
+    #Start the load process
+    print(f"Load Process Started")
+    use_ast = not args.no_ast and java_parser_available()
+    if not args.no_ast and not use_ast:
+        print("javalang is not installed, extracting the full file with the LLM")
+    if args.no_llm and JAVA in args.languages and not use_ast:
+        raise ValueError('--no-llm needs the local Java parser (pip install javalang)')
+
+    #Cache entries depend on how the metadata was produced
+    prompt_version = PROMPT_VERSION
+    if use_ast:
+        prompt_version = f"{PROMPT_VERSION}-ast{PARSER_VERSION}-enrich{ENRICHMENT_PROMPT_VERSION}"
+    cache = None
+    if not args.no_cache and not args.no_llm:
+        cache = ExtractionCache(model_name=MODEL_NAME, prompt_version=prompt_version,
+                                cache_dir=args.cache_dir, read=not args.refresh)
+
+    #One pool for all repositories so the LLM quotas hold across parallel loads
+    with ExtractionPool(concurrency=args.concurrency) as pool:
+        if len(code_bases) == 1:
+            load_repository(code_bases[0], args, cache, pool, use_ast)
+        else:
+            with ThreadPoolExecutor(max_workers=args.parallel_repos, thread_name_prefix="repo") as executor:
+                futures = {executor.submit(load_repository, code_base, args, cache, pool, use_ast): code_base
+                           for code_base in code_bases}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Load of {futures[future]} failed. Exception: {e}")
+    print("Load Process Completed")
+
+
+def load_repository(code_base: str, args, cache: ExtractionCache, pool: ExtractionPool, use_ast: bool):
+    """
+    Loads one code base into its own repository scope (--repo, REPO_NAME or the directory name).
+    """
+    name = args.repo or os.path.basename(os.path.abspath(code_base))
+    repo = repo_key(name, args.branch)
+    print(f"Loading {code_base} as repository {repo}")
+
+    #Work out what changed, if running incrementally
+    changes = None
+    manifest = None
+    if args.base:
+        changes = git_changes(code_base, args.base, args.head)
+    elif args.manifest:
+        manifest = build_manifest(code_base, Discovery(code_base, include=args.include, exclude=args.exclude,
+                                                       use_gitignore=not args.no_gitignore, kinds=args.languages))
+        previous_manifest = load_manifest(args.manifest)
+        if previous_manifest is not None:
+            changes = manifest_changes(previous_manifest, manifest)
+        else:
+            print(f"Manifest {args.manifest} not found, running a full load")
+
+    journal = CheckpointJournal(args.journal)
+    journal.start_run(os.path.abspath(code_base), resume=args.resume)
+    try:
+        #The caller moves --base on after every run, so files that failed before are retried from the journal
+        if args.base:
+            retry = [path for path in journal.failed_files(os.path.abspath(code_base))
+                     if path not in changes.removed and path not in changes.added_or_modified
+                     and os.path.isfile(os.path.join(code_base, path))]
+            if retry:
+                print(f"Retrying {len(retry)} files that failed in earlier runs")
+                changes.added_or_modified.extend(retry)
+
+        loaded, failed_files = navigate_and_load(code_base=code_base, cache=cache,
+                                                 changes=changes, journal=journal, resume=args.resume,
+                                                 use_ast=use_ast, use_llm=not args.no_llm,
+                                                 include=args.include, exclude=args.exclude,
+                                                 use_gitignore=not args.no_gitignore, languages=args.languages,
+                                                 repo=repo, repo_name=name, branch=args.branch, pool=pool,
+                                                 allow_failures=args.allow_failures)
+    finally:
+        journal.close()
+    if loaded and manifest is not None:
+        #Files that failed extraction are left out so the next run picks them up again
+        for path in failed_files:
+            manifest.pop(path, None)
+        save_manifest(args.manifest, manifest)
+
+
+def run_schema(args):
+    #Connector creates constraints and indexes on startup, then report their state
     connector = Neo4jConnector()
     try:
-        connector.save_code_metadata_collection(metadata_collection=metadata_collection)
-    
-    except Exception as e:
-        print(f"Error in saving data to DB. Exception: {e}")
+        print_schema_report(connector.schema_report())
+    finally:
+        connector.close()
+
 
+def run_delete(args):
+    """
+    Removes a whole repository, or with --files the subgraph of some files from its
+    active generation, in batched transactions.
+    """
+    name = args.repo or os.getenv('REPO_NAME')
+    if not name:
+        raise ValueError('delete needs --repo (or REPO_NAME)')
+    repo = repo_key(name, args.branch)
+    if not args.confirm:
+        target = f"{len(args.files)} files of" if args.files else "every node of"
+        raise SystemExit(f"This deletes {target} repository '{repo}'. Re-run with --confirm.")
+
+    connector = Neo4jConnector(repo=repo, setup_schema=False)
+    try:
+        if args.files:
+            connector.use_active_generation()
+            connector.delete_files(args.files)
+            connector.bump_version()
+        else:
+            connector.delete_repository()
     finally:
         connector.close()
 
-    return
+
+def run_status(args):
+    import datetime
+
+    journal = CheckpointJournal(args.journal)
+    try:
+        status = journal.status(args.run_id)
+    finally:
+        journal.close()
+
+    if status is None:
+        print("No ingest runs recorded" if args.run_id is None else f"No ingest run {args.run_id} recorded")
+        return
+
+    counts = status["counts"]
+    state = "finished" if status["finished"] else "running / interrupted"
+    print(f"Run {status['run_id']} ({state}) for {status['code_base']}")
+    print(f"Started: {datetime.datetime.fromtimestamp(status['started_at']):%Y-%m-%d %H:%M:%S}")
+    print(f"Files: {status['files']}{'' if status['discovery_done'] else ' (discovery in progress)'}")
+    print(f"Written: {counts['written']}, Extracted: {counts['extracted']}, Pending: {counts['discovered']}, Failed: {counts['failed']}")
+    print(f"Throughput: {status['files_per_minute']} files/min")
+    if status["eta_seconds"] is not None:
+        print(f"ETA: {datetime.timedelta(seconds=status['eta_seconds'])}")
+
 
 def main():
-    import os
     from dotenv import load_dotenv
+    import argparse
     import sys
 
     load_dotenv()
 
-    #Get the code base path from arg
-    if len(sys.argv) >= 2:
-        code_base = sys.argv[1]
-    else:
-        print("Code Base Path not passed as ARG, using from ENV")
-        code_base = os.getenv('CODE_BASE_PATH')
-        #print(f"Code Base from ENV: {code_base}")
+    parser = argparse.ArgumentParser(description="Extract code metadata and load it to Neo4j")
+    subparsers = parser.add_subparsers(dest="command")
 
-    #If not available in ENV as well, raise and error
-    if not code_base:
-        raise ValueError('Code base path not passed as arg and not set in ENV')
+    load_parser = subparsers.add_parser("load", help="Extract metadata and load it to Neo4j (default)")
+    load_parser.add_argument("code_base", nargs="*", help="Path of the code base(s) (defaults to CODE_BASE_PATH)")
+    load_parser.add_argument("--repo", default=None, help="Repository name the graph is scoped by (defaults to REPO_NAME or the directory name)")
+    load_parser.add_argument("--branch", default=None, help="Branch, stored as <repo>@<branch> so branches load side by side")
+    load_parser.add_argument("--parallel-repos", type=int, default=4, help="Code bases loaded concurrently when several are given")
+    load_parser.add_argument("--concurrency", type=int, default=None, help="Number of concurrent LLM extraction calls")
+    load_parser.add_argument("--no-cache", action="store_true", help="Do not read or write the extraction cache")
+    load_parser.add_argument("--refresh", action="store_true", help="Ignore cached entries but store fresh extractions")
+    load_parser.add_argument("--cache-dir", default=None, help="Extraction cache directory")
+    load_parser.add_argument("--base", default=None, help="Incremental load: base commit to diff from")
+    load_parser.add_argument("--head", default="HEAD", help="Incremental load: head commit to diff to (must be checked out)")
+    load_parser.add_argument("--manifest", default=None, help="Incremental load: mtime manifest file, written after every successful load")
+    load_parser.add_argument("--no-ast", action="store_true", help="Send the whole file to the LLM instead of parsing the structure locally")
+    load_parser.add_argument("--no-llm", action="store_true", help="Structure only from the local Java and Python parsers, no LLM calls")
+    load_parser.add_argument("--languages", nargs="+", choices=[JAVA, PYTHON], default=[JAVA, PYTHON], help="Languages to load (default: java python)")
+    load_parser.add_argument("--include", action="append", default=None, help="Only load files matching this glob (repeatable), e.g. 'src/main/**'")
+    load_parser.add_argument("--exclude", action="append", default=None, help="Skip files and directories matching this glob (repeatable), e.g. '**/generated/**'")
+    load_parser.add_argument("--no-gitignore", action="store_true", help="Do not apply .gitignore files during discovery")
+    load_parser.add_argument("--journal", default=None, help="Checkpoint journal file (defaults to INGEST_JOURNAL_PATH or .ingest_journal.sqlite)")
+    load_parser.add_argument("--resume", action="store_true", help="Resume the last unfinished run, skipping files already written")
+    load_parser.add_argument("--allow-failures", action="store_true", help="Publish the new graph generation even when some files failed")
+    load_parser.set_defaults(func=run_load)
 
-    #Start the load process
-    print(f"Load Process Started")
-    navigate_and_load(code_base=code_base)
-    print("Load Process Completed")
+    schema_parser = subparsers.add_parser("schema", help="Create Neo4j constraints/indexes and report their state")
+    schema_parser.set_defaults(func=run_schema)
+
+    status_parser = subparsers.add_parser("status", help="Show progress, throughput and ETA of the last ingest run")
+    status_parser.add_argument("--journal", default=None, help="Checkpoint journal file")
+    status_parser.add_argument("--run-id", type=int, default=None, help="Run to report on (defaults to the latest)")
+    status_parser.set_defaults(func=run_status)
+
+    delete_parser = subparsers.add_parser("delete", help="Delete a repository (or some of its files) from Neo4j in batches")
+    delete_parser.add_argument("--repo", default=None, help="Repository to delete (defaults to REPO_NAME)")
+    delete_parser.add_argument("--branch", default=None, help="Branch of the repository")
+    delete_parser.add_argument("--files", nargs="+", default=None, help="Only delete these files (paths relative to the code base)")
+    delete_parser.add_argument("--confirm", action="store_true", help="Confirm the delete")
+    delete_parser.set_defaults(func=run_delete)
+
+    #`python load_code.py <path>` keeps working as shorthand for `load <path>`
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["load"] + argv
+    args = parser.parse_args(argv)
+    args.func(args)
 
 
 if __name__ == '__main__':
     main()
-
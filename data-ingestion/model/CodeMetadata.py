@@ -9,7 +9,7 @@ class ParameterMetadata(BaseModel):
 class MethodMetadata(BaseModel):
     name: str
     annotations: List[str]
-    parameters: List[ParameterMetadata] = None
+    parameters: Optional[List[ParameterMetadata]] = None
     return_type: str
     description: Optional[str] = Field(..., title="Description of the method")
     pseudo_code: Optional[str] = Field(..., title="Pseudo code / Logic of the method. Includes business rules if any")
@@ -37,12 +37,13 @@ class LayerEnum(str, Enum):
 
 class CodeMetadata(BaseModel):
     file_name: str
+    file_path: Optional[str] = Field(default=None, title="Path of the file relative to the code base. Set by the loader, leave null")
     package: str  = Field(..., title="Package of the class")
     class_name: str  = Field(..., title="Name of the class")
-    class_annotations: List[str] = None
+    class_annotations: Optional[List[str]] = None
     internal_dependencies: List[str] = Field(..., title="Internal dependencies of the class.")
     external_dependencies: List[str] = Field(..., title="External dependencies of the class.")
-    interfaces: List[str] = None
+    interfaces: Optional[List[str]] = None
     methods: List[MethodMetadata] 
     fields: List[FieldMetadata] 
     functionality_summary: str  = Field(..., title="Brief functional summary of the class")
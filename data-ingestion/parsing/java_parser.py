@@ -0,0 +1,335 @@
+from typing import Dict, List
+
+from model.CodeMetadata import CodeMetadata, MethodMetadata, FieldMetadata, ParameterMetadata, LayerEnum
+
+#javalang is optional, without it extraction falls back to the full LLM prompt
+try:
+    import javalang
+except ImportError:
+    javalang = None
+
+#Bump when the parser output changes, it is part of the extraction cache key
+PARSER_VERSION = "2"
+
+#JDK types that never count as dependencies (java.lang plus common java.util types)
+COMMON_JDK_TYPES = {
+    "Object", "String", "StringBuilder", "StringBuffer", "CharSequence", "Boolean", "Byte", "Character",
+    "Short", "Integer", "Long", "Float", "Double", "Number", "Void", "Math", "System", "Thread", "Runnable",
+    "Iterable", "Comparable", "Enum", "Record", "Class", "Exception", "RuntimeException", "Error", "Throwable",
+    "Override", "Deprecated", "SuppressWarnings", "FunctionalInterface", "SafeVarargs",
+    "IllegalArgumentException", "IllegalStateException", "NullPointerException", "UnsupportedOperationException",
+    "IndexOutOfBoundsException", "ClassCastException", "ArithmeticException", "InterruptedException",
+    "CloneNotSupportedException", "AutoCloseable", "Cloneable",
+    "List", "ArrayList", "LinkedList", "Map", "HashMap", "LinkedHashMap", "TreeMap", "Set", "HashSet",
+    "LinkedHashSet", "TreeSet", "Collection", "Collections", "Arrays", "Objects", "Optional", "Iterator",
+    "Date", "UUID", "Stream", "Collectors",
+}
+
+#Types of JDK packages that are commonly wildcard imported. A wildcard import of one of
+#these only hides these names; any other wildcard makes unresolved names ambiguous
+JDK_PACKAGE_TYPES = {
+    "java.util": COMMON_JDK_TYPES | {
+        "Calendar", "GregorianCalendar", "Locale", "Random", "Scanner", "Properties", "Queue", "Deque",
+        "ArrayDeque", "PriorityQueue", "Stack", "Vector", "Hashtable", "SortedMap", "SortedSet", "NavigableMap",
+        "NavigableSet", "EnumMap", "EnumSet", "BitSet", "Comparator", "StringJoiner", "Timer", "TimeZone",
+        "Currency", "Base64", "OptionalInt", "OptionalLong", "OptionalDouble", "NoSuchElementException",
+        "ConcurrentModificationException", "ListIterator", "AbstractMap", "AbstractList", "IdentityHashMap",
+        "WeakHashMap",
+    },
+    "java.time": {
+        "LocalDate", "LocalDateTime", "LocalTime", "Instant", "Duration", "Period", "ZonedDateTime", "ZoneId",
+        "ZoneOffset", "OffsetDateTime", "OffsetTime", "Clock", "DayOfWeek", "Month", "MonthDay", "Year",
+        "YearMonth", "DateTimeException",
+    },
+    "java.time.format": {"DateTimeFormatter", "DateTimeParseException", "FormatStyle"},
+    "java.io": {
+        "File", "InputStream", "OutputStream", "Reader", "Writer", "BufferedReader", "BufferedWriter",
+        "InputStreamReader", "OutputStreamWriter", "FileInputStream", "FileOutputStream", "FileReader", "FileWriter",
+        "PrintStream", "PrintWriter", "IOException", "FileNotFoundException", "UncheckedIOException",
+        "Serializable", "Closeable", "ByteArrayInputStream", "ByteArrayOutputStream", "StringReader", "StringWriter",
+    },
+    "java.math": {"BigDecimal", "BigInteger", "RoundingMode", "MathContext"},
+    "java.util.function": {
+        "Function", "BiFunction", "Consumer", "BiConsumer", "Supplier", "Predicate", "BiPredicate",
+        "UnaryOperator", "BinaryOperator", "IntFunction", "ToIntFunction", "ToLongFunction", "ToDoubleFunction",
+    },
+    "java.util.stream": {"Stream", "Collectors", "IntStream", "LongStream", "DoubleStream", "Collector", "StreamSupport"},
+    "java.util.concurrent": {
+        "ConcurrentHashMap", "ConcurrentMap", "ExecutorService", "Executors", "Executor", "Future",
+        "CompletableFuture", "Callable", "TimeUnit", "CountDownLatch", "ExecutionException", "TimeoutException",
+        "ThreadLocalRandom", "CopyOnWriteArrayList", "BlockingQueue", "LinkedBlockingQueue", "ScheduledExecutorService",
+    },
+    "java.nio.file": {"Path", "Paths", "Files", "StandardOpenOption"},
+}
+
+#Annotation / supertype name -> architecture layer, used when the LLM is not asked
+LAYER_HINTS = [
+    ({"Controller", "RestController", "ControllerAdvice", "RestControllerAdvice"}, LayerEnum.CONTROLLER),
+    ({"Service", "Component", "Transactional"}, LayerEnum.SERVICE),
+    ({"Repository", "JpaRepository", "CrudRepository", "PagingAndSortingRepository", "Mapper"}, LayerEnum.REPOSITORY),
+    ({"Entity", "Table", "Document", "Embeddable", "MappedSuperclass"}, LayerEnum.ENTITY),
+]
+
+
+def is_available() -> bool:
+    return javalang is not None
+
+
+def _type_name(java_type) -> str:
+    if java_type is None:
+        return "void"
+    name = java_type.name
+    sub_type = getattr(java_type, "sub_type", None)
+    while sub_type is not None:
+        name = f"{name}.{sub_type.name}"
+        sub_type = getattr(sub_type, "sub_type", None)
+    arguments = getattr(java_type, "arguments", None)
+    if arguments:
+        name += "<" + ",".join(_type_name(arg.type) if arg.type is not None else "?" for arg in arguments) + ">"
+    return name + "[]" * len(java_type.dimensions or [])
+
+
+def _referenced_types(node) -> set:
+    """
+    Simple names of every type referenced inside a node, including static call qualifiers (Foo.bar()).
+    Nested type segments (Entry of Map.Entry) are part of their outer type, not names of their own.
+    """
+    names = set()
+    nested = set()
+    for _, ref in node.filter(javalang.tree.ReferenceType):
+        if ref.sub_type is not None:
+            nested.add(id(ref.sub_type))
+        if id(ref) not in nested:
+            names.add(ref.name.split('.')[0])
+    for _, invocation in node.filter(javalang.tree.MethodInvocation):
+        qualifier = (invocation.qualifier or "").split('.')[0]
+        if qualifier[:1].isupper():
+            names.add(qualifier)
+    return names
+
+
+def _members(type_declaration):
+    body = type_declaration.body
+    if isinstance(body, list):
+        return body
+    return getattr(body, "declarations", None) or []
+
+
+def _annotation_names(node) -> List[str]:
+    return [annotation.name for annotation in (node.annotations or [])]
+
+
+def _main_type(tree, file_name: str = None):
+    types = tree.types or []
+    if file_name:
+        stem = file_name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        for type_declaration in types:
+            if type_declaration.name == stem:
+                return type_declaration
+    for type_declaration in types:
+        if "public" in (type_declaration.modifiers or set()):
+            return type_declaration
+    return types[0] if types else None
+
+
+def _guess_layer(annotations: List[str], supertypes: List[str], class_name: str) -> LayerEnum:
+    names = set(annotations) | set(supertypes)
+    for hints, layer in LAYER_HINTS:
+        if names & hints:
+            return layer
+    for suffix, layer in (("Controller", LayerEnum.CONTROLLER), ("Service", LayerEnum.SERVICE),
+                          ("Repository", LayerEnum.REPOSITORY), ("Dao", LayerEnum.REPOSITORY)):
+        if class_name.endswith(suffix):
+            return layer
+    return LayerEnum.DTO
+
+
+def method_key(method: MethodMetadata) -> str:
+    """
+    name(types) key used to match LLM enrichment back to overloaded methods.
+    """
+    return f"{method.name}({','.join(param.type for param in method.parameters or [])})"
+
+
+def _method_source(lines: List[str], position) -> str:
+    """
+    Source of a method from its declaration line up to the matching closing brace
+    (or the terminating ';' for abstract methods). Skips braces inside strings and comments.
+    """
+    if position is None:
+        return ""
+    text = "\n".join(lines[position.line - 1:])
+    depth = 0
+    i = 0
+    in_string = None
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if ch == '\\':
+                i += 1
+            elif ch == in_string:
+                in_string = None
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = len(text) if end == -1 else end + 2
+            continue
+        elif ch in ('"', "'"):
+            in_string = ch
+        elif ch == ';' and depth == 0:
+            return text[:i + 1]
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[:i + 1]
+        i += 1
+    return text
+
+
+def parse_java_structure(java_file_content: str, file_name: str = None):
+    """
+    Deterministically extracts the structural part of CodeMetadata (package, imports,
+    annotations, fields, method signatures, parameters, throws clauses, dependencies).
+    LLM-only fields are left empty and architecture_layer is a heuristic guess.
+
+    Returns (metadata, method_sources) where method_sources maps method_key -> source,
+    or None when javalang is unavailable or the file does not parse.
+    """
+    if javalang is None:
+        return None
+    try:
+        tree = javalang.parse.parse(java_file_content)
+    except Exception as e:
+        print(f"Java parser could not parse {file_name or 'file'}, falling back to LLM. Exception: {e}")
+        return None
+
+    main_type = _main_type(tree, file_name)
+    if main_type is None:
+        return None
+
+    package = tree.package.name if tree.package else ""
+    root_package = ".".join(package.split(".")[:2])
+    lines = java_file_content.splitlines()
+
+    #Imports split into internal (same root package) and external dependencies
+    imported: Dict[str, str] = {}
+    internal_imports, external_imports = [], []
+    #Wildcard imports: names of known JDK packages are excluded, any other wildcard means an
+    #unresolved name may come from that package, so it is not taken as same package
+    wildcard_jdk_types = set()
+    ambiguous_wildcard = False
+    for imp in tree.imports or []:
+        if imp.wildcard and not imp.static:
+            if imp.path in JDK_PACKAGE_TYPES:
+                wildcard_jdk_types |= JDK_PACKAGE_TYPES[imp.path]
+            else:
+                ambiguous_wildcard = True
+        if imp.wildcard or imp.static:
+            continue
+        simple_name = imp.path.rsplit('.', 1)[-1]
+        imported[simple_name] = imp.path
+        if root_package and imp.path.startswith(root_package + "."):
+            internal_imports.append(imp.path)
+        else:
+            external_imports.append(imp.path)
+
+    #Types declared in this file and generic type parameters are not dependencies
+    local_types = {type_declaration.name for _, type_declaration in tree.filter(javalang.tree.TypeDeclaration)}
+    type_parameters = {param.name for _, param in tree.filter(javalang.tree.TypeParameter)}
+    excluded = local_types | type_parameters | COMMON_JDK_TYPES | wildcard_jdk_types
+
+    def internal_names(names: set) -> set:
+        result = set()
+        for name in names:
+            if name in excluded:
+                continue
+            path = imported.get(name)
+            if path is None:
+                #Not imported and not java.lang -> same package, unless a wildcard import may provide it
+                if not ambiguous_wildcard:
+                    result.add(name)
+            elif path in internal_imports:
+                result.add(name)
+        return result
+
+    class_references = internal_names(_referenced_types(main_type))
+    same_package = sorted(name for name in class_references if name not in imported)
+    internal_dependencies = sorted(internal_imports) + same_package
+
+    supertypes = []
+    extends = getattr(main_type, "extends", None)
+    if extends is not None:
+        supertypes += [_type_name(t) for t in (extends if isinstance(extends, list) else [extends])]
+    interfaces = [_type_name(t) for t in (getattr(main_type, "implements", None) or [])]
+
+    fields = []
+    field_types: Dict[str, str] = {}
+    for member in _members(main_type):
+        if not isinstance(member, javalang.tree.FieldDeclaration):
+            continue
+        modifiers = member.modifiers or set()
+        annotations = _annotation_names(member)
+        for declarator in member.declarators:
+            initializer = declarator.initializer
+            field_types[declarator.name] = member.type.name
+            fields.append(FieldMetadata(
+                name=declarator.name,
+                type=_type_name(member.type),
+                annotations=annotations,
+                value=str(initializer.value) if isinstance(initializer, javalang.tree.Literal) else None,
+                description=None,
+                is_public="public" in modifiers,
+                is_static="static" in modifiers,
+                is_primary="Id" in annotations or "EmbeddedId" in annotations,
+            ))
+
+    methods = []
+    method_sources = {}
+    for member in _members(main_type):
+        if not isinstance(member, (javalang.tree.MethodDeclaration, javalang.tree.ConstructorDeclaration)):
+            continue
+        modifiers = member.modifiers or set()
+        references = _referenced_types(member)
+        #Calls through fields (userRepository.save()) depend on the field's type
+        for _, invocation in member.filter(javalang.tree.MethodInvocation):
+            qualifier = (invocation.qualifier or "").split('.')[0]
+            if qualifier in field_types:
+                references.add(field_types[qualifier])
+        method = MethodMetadata(
+            name=member.name,
+            annotations=_annotation_names(member),
+            parameters=[
+                ParameterMetadata(name=param.name, type=_type_name(param.type) + ("..." if param.varargs else ""))
+                for param in member.parameters
+            ],
+            return_type=_type_name(getattr(member, "return_type", None)) if isinstance(member, javalang.tree.MethodDeclaration) else main_type.name,
+            description=None,
+            pseudo_code=None,
+            throws_exceptions=list(member.throws or []),
+            internal_dependencies=sorted(internal_names(references)),
+            is_public="public" in modifiers,
+            is_static="static" in modifiers,
+        )
+        methods.append(method)
+        method_sources[method_key(method)] = _method_source(lines, member.position)
+
+    class_annotations = _annotation_names(main_type)
+    metadata = CodeMetadata(
+        file_name=file_name.rsplit('/', 1)[-1] if file_name else f"{main_type.name}.java",
+        package=package,
+        class_name=main_type.name,
+        class_annotations=class_annotations,
+        internal_dependencies=internal_dependencies,
+        external_dependencies=sorted(external_imports),
+        interfaces=interfaces,
+        methods=methods,
+        fields=fields,
+        functionality_summary="",
+        architecture_layer=_guess_layer(class_annotations, [t.split('<')[0] for t in supertypes + interfaces], main_type.name),
+    )
+    return metadata, method_sources
@@ -0,0 +1,316 @@
+import ast
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+from model.CodeMetadata import CodeMetadata, MethodMetadata, FieldMetadata, ParameterMetadata, LayerEnum
+from parsing.java_parser import method_key
+
+#Bump when the parser output changes, it is part of the extraction cache key of Python files
+PARSER_VERSION = "2"
+
+#Base class / decorator name -> architecture layer
+LAYER_HINTS = [
+    ({"APIRouter", "route", "get", "post", "put", "patch", "delete", "View", "APIView", "ViewSet", "ModelViewSet",
+      "Resource", "MethodView"}, LayerEnum.CONTROLLER),
+    ({"Repository", "Dao", "CRUDBase"}, LayerEnum.REPOSITORY),
+    ({"Model", "Base", "DeclarativeBase", "Document", "Table"}, LayerEnum.ENTITY),
+    ({"BaseModel", "dataclass", "TypedDict", "NamedTuple", "Schema", "Enum"}, LayerEnum.DTO),
+]
+
+
+@lru_cache(maxsize=None)
+def _source_root(directory: str) -> str:
+    """
+    Parent of the top-most package (directory with __init__.py) containing `directory`.
+    Module names are relative to it, e.g. src/app/services/user.py -> app.services.user
+    """
+    while os.path.isfile(os.path.join(directory, "__init__.py")):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    return directory
+
+
+@lru_cache(maxsize=None)
+def _is_local_module(directory: str, stop: str, root_name: str) -> bool:
+    """
+    True when `root_name` is a module or package in `directory` or one of its parents
+    up to `stop` (the source root), i.e. something the file can import from the repo.
+    """
+    if (os.path.isdir(os.path.join(directory, root_name))
+            or os.path.isfile(os.path.join(directory, root_name + ".py"))):
+        return True
+    parent = os.path.dirname(directory)
+    if directory == stop or parent == directory or not directory.startswith(stop):
+        return False
+    return _is_local_module(parent, stop, root_name)
+
+
+def _module_root(path: str, relative_path: str = None) -> str:
+    """
+    Source root of a file: the parent of its top-most package, or the code base root for
+    files outside regular packages (scripts, namespace packages).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if os.path.isfile(os.path.join(directory, "__init__.py")) or not relative_path:
+        return _source_root(directory)
+    depth = relative_path.count("/")
+    for _ in range(depth):
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def module_name(path: str, relative_path: str = None) -> str:
+    relative = os.path.relpath(os.path.abspath(path), _module_root(path, relative_path))[:-len(".py")].replace(os.sep, ".")
+    return relative[:-len(".__init__")] if relative.endswith(".__init__") else relative
+
+
+def _unparse(node) -> str:
+    return ast.unparse(node) if node is not None else "Any"
+
+
+def _decorator_names(node) -> List[str]:
+    return [_unparse(decorator.func if isinstance(decorator, ast.Call) else decorator) for decorator in node.decorator_list]
+
+
+def _root_name(node):
+    """Leftmost name of an attribute chain, e.g. a.b.c -> a"""
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _imports(tree, module: str, is_package: bool, directory: str, source_root: str):
+    """
+    Returns (local name -> dotted path, internal paths, external paths). An import is
+    internal when it is relative or its top level module lives in the repo. Imported
+    submodules (from . import helpers) and classes (CapWords) resolve to themselves,
+    functions and constants to their module.
+    """
+    names: Dict[str, str] = {}
+    internal, external = [], []
+    package_parts = module.split(".") if is_package else module.split(".")[:-1]
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                local = alias.asname or alias.name.split(".")[0]
+                names[local] = alias.name if alias.asname else local
+                target = internal if _is_local_module(directory, source_root, alias.name.split(".")[0]) else external
+                target.append(names[local])
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = ".".join(package_parts[:len(package_parts) - node.level + 1])
+                base = f"{base}.{node.module}" if node.module and base else (node.module or base)
+                is_internal = True
+            else:
+                base = node.module or ""
+                is_internal = _is_local_module(directory, source_root, base.split(".")[0])
+            base_directory = os.path.join(source_root, *base.split(".")) if base and is_internal else None
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                is_class = alias.name[:1].isupper() and not alias.name.isupper()
+                is_submodule = base_directory is not None and (
+                    os.path.isdir(os.path.join(base_directory, alias.name))
+                    or os.path.isfile(os.path.join(base_directory, alias.name + ".py")))
+                path = f"{base}.{alias.name}" if base and (is_class or is_submodule) else (base or alias.name)
+                names[alias.asname or alias.name] = path
+                (internal if is_internal else external).append(path)
+    return names, set(internal), set(external)
+
+
+def _guess_layer(names: set, class_name: str, default: LayerEnum) -> LayerEnum:
+    for hints, layer in LAYER_HINTS:
+        if names & hints:
+            return layer
+    for suffix, layer in (("Controller", LayerEnum.CONTROLLER), ("View", LayerEnum.CONTROLLER),
+                          ("Service", LayerEnum.SERVICE), ("Repository", LayerEnum.REPOSITORY),
+                          ("Dao", LayerEnum.REPOSITORY)):
+        if class_name.endswith(suffix):
+            return layer
+    return default
+
+
+def _parameters(function) -> List[ParameterMetadata]:
+    args = function.args
+    parameters = []
+    for arg in args.posonlyargs + args.args + args.kwonlyargs:
+        if arg.arg in ("self", "cls"):
+            continue
+        parameters.append(ParameterMetadata(name=arg.arg, type=_unparse(arg.annotation)))
+    if args.vararg is not None:
+        parameters.append(ParameterMetadata(name=args.vararg.arg, type="*" + _unparse(args.vararg.annotation)))
+    if args.kwarg is not None:
+        parameters.append(ParameterMetadata(name=args.kwarg.arg, type="**" + _unparse(args.kwarg.annotation)))
+    return parameters
+
+
+def _scan(nodes):
+    """
+    One pass over the sub trees: root names referenced (a in a.b.c), raised exceptions
+    and assignment statements.
+    """
+    roots, raises, assignments = set(), [], []
+    for top in nodes:
+        for node in ast.walk(top):
+            if isinstance(node, ast.Name):
+                roots.add(node.id)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                assignments.append(node)
+            elif isinstance(node, ast.Raise) and node.exc is not None:
+                exception = _unparse(node.exc.func if isinstance(node.exc, ast.Call) else node.exc)
+                if exception not in raises:
+                    raises.append(exception)
+    return roots, raises, assignments
+
+
+def _method(function, roots: set, raises: List[str], internal_names: Dict[str, str]) -> MethodMetadata:
+    decorators = _decorator_names(function)
+    return MethodMetadata(
+        name=function.name,
+        annotations=decorators,
+        parameters=_parameters(function),
+        return_type=_unparse(function.returns) if function.returns is not None else ("None" if function.name == "__init__" else "Any"),
+        description=None,
+        pseudo_code=None,
+        throws_exceptions=raises,
+        internal_dependencies=sorted({internal_names[root].rsplit(".", 1)[-1] for root in roots if root in internal_names}),
+        is_public=not function.name.startswith("_") or (function.name.startswith("__") and function.name.endswith("__")),
+        is_static="staticmethod" in decorators,
+    )
+
+
+def _assigned_fields(statements, is_static: bool) -> List[FieldMetadata]:
+    fields = []
+    for node in statements:
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, (ast.Name, ast.Attribute)):
+            targets, annotation, value = [node.target], node.annotation, node.value
+        elif isinstance(node, ast.Assign):
+            targets, annotation, value = node.targets, None, node.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Attribute):
+                if _root_name(target) != "self" or not isinstance(target.value, ast.Name):
+                    continue
+                name = target.attr
+            elif isinstance(target, ast.Name):
+                name = target.id
+            else:
+                continue
+            fields.append(FieldMetadata(
+                name=name,
+                type=_unparse(annotation),
+                annotations=[],
+                value=_unparse(value) if isinstance(value, ast.Constant) else None,
+                description=None,
+                is_public=not name.startswith("_"),
+                is_static=is_static and annotation is None,
+                is_primary=name in ("id", "pk") or "primary_key=True" in (_unparse(value) if value is not None else ""),
+            ))
+    return fields
+
+
+def _source(lines: List[str], node) -> str:
+    start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+    return "\n".join(lines[start - 1:node.end_lineno])
+
+
+def parse_python_source(content: str, path: str, relative_path: str = None, with_sources: bool = False):
+    """
+    Builds CodeMetadata records for a Python module: one per top level class, plus one
+    named after the module for its top level functions and variables. Decorators map to
+    annotations and type hints to field / parameter / return types.
+
+    Returns (metadata_list, method_sources_list) where method_sources_list holds a
+    method_key -> source dict per record (empty unless with_sources), or None when the
+    file does not parse.
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as e:
+        print(f"Python parser could not parse {relative_path or path}. Exception: {e}")
+        return None
+
+    file_name = os.path.basename(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    source_root = _module_root(path, relative_path)
+    module = module_name(path, relative_path)
+    imported, internal_imports, external_imports = _imports(tree, module, file_name == "__init__.py", directory, source_root)
+    lines = content.splitlines() if with_sources else []
+
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    local_classes = {node.name for node in classes}
+    #Names methods can depend on: internal imports and classes of this module
+    internal_names = {name: path for name, path in imported.items() if path in internal_imports}
+    internal_names.update({name: name for name in local_classes})
+
+    def record(class_name: str, package: str, annotations: List[str], bases: List[str], body, docstring: str,
+               default_layer: LayerEnum):
+        functions = [node for node in body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        statements = [node for node in body if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+        #Each function body is walked once for its references, raises and (in __init__) attributes
+        referenced, _, _ = _scan(statements)
+        methods, fields = [], _assigned_fields(statements, is_static=True)
+        for function in functions:
+            roots, raises, assignments = _scan([function])
+            referenced |= roots
+            methods.append(_method(function, roots, raises, internal_names))
+            if function.name == "__init__":
+                known = {field.name for field in fields}
+                fields += [field for field in _assigned_fields(assignments, is_static=False) if field.name not in known]
+
+        referenced.update(base.split(".")[0] for base in bases)
+        internal_dependencies = sorted({imported[name] for name in referenced if name in imported and imported[name] in internal_imports})
+        internal_dependencies += sorted(name for name in referenced if name in local_classes and name != class_name)
+        external_dependencies = sorted({imported[name] for name in referenced if name in imported and imported[name] in external_imports})
+
+        hint_names = {name.rsplit(".", 1)[-1] for name in annotations + bases}
+        for method in methods:
+            hint_names.update(annotation.rsplit(".", 1)[-1] for annotation in method.annotations)
+        metadata = CodeMetadata(
+            file_name=file_name,
+            package=package,
+            class_name=class_name,
+            class_annotations=annotations,
+            internal_dependencies=internal_dependencies,
+            external_dependencies=external_dependencies,
+            interfaces=bases,
+            methods=methods,
+            fields=fields,
+            #Docstring until the LLM summary replaces it
+            functionality_summary=docstring or "",
+            architecture_layer=_guess_layer(hint_names, class_name, default_layer),
+        )
+        sources = {}
+        if with_sources:
+            for method, function in zip(methods, functions):
+                sources[method_key(method)] = _source(lines, function)
+        return metadata, sources
+
+    results = []
+    for node in classes:
+        results.append(record(node.name, module, _decorator_names(node), [_unparse(base) for base in node.bases],
+                              node.body, ast.get_docstring(node), LayerEnum.DTO))
+
+    #Module level functions and variables belong to a record named after the module
+    #(and modules without classes, e.g. scripts), empty modules are skipped
+    module_body = [node for node in tree.body if not isinstance(node, (ast.ClassDef, ast.Import, ast.ImportFrom))]
+    has_definitions = any(isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Assign, ast.AnnAssign)) for node in module_body)
+    if has_definitions or (not classes and (module_body or imported)):
+        package, _, name = module.rpartition(".")
+        results.append(record(name, package, [], [], module_body, ast.get_docstring(tree), LayerEnum.SERVICE))
+
+    return [metadata for metadata, _ in results], [sources for _, sources in results]
+
+
+def parse_python_file(path: str, relative_path: str = None, with_sources: bool = False):
+    """
+    Reads and parses a Python file. Module level function so it can run in a process pool.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        content = f.read()
+    return parse_python_source(content, path, relative_path, with_sources)
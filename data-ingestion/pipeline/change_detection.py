@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from pipeline.discovery import Discovery
+
+#File types that have an extractor
+SOURCE_EXTENSIONS = ('.java', '.py')
+
+
+class ChangeSet(BaseModel):
+    """Files to re-extract and files to drop, relative to the code base."""
+    added_or_modified: List[str] = []
+    removed: List[str] = []
+
+
+def _is_source(path: str) -> bool:
+    return path.endswith(SOURCE_EXTENSIONS)
+
+
+def git_changes(code_base: str, base: str, head: str = "HEAD") -> ChangeSet:
+    """
+    Files changed between two commits, from `git diff --name-status`.
+    Paths are relative to code_base (which may be a sub directory of the repository).
+    The working tree is expected to be checked out at `head`.
+    """
+    output = subprocess.run(
+        ["git", "-C", code_base, "diff", "--name-status", "--relative", "-M", base, head],
+        check=True, capture_output=True, text=True
+    ).stdout
+
+    changes = ChangeSet()
+    for line in output.splitlines():
+        parts = line.split('\t')
+        status = parts[0][:1]
+
+        #Renames and copies are reported as <status><score> old new
+        if status in ('R', 'C'):
+            old_path, new_path = parts[1], parts[2]
+            if status == 'R' and _is_source(old_path):
+                changes.removed.append(old_path)
+            if _is_source(new_path):
+                changes.added_or_modified.append(new_path)
+        elif status == 'D':
+            if _is_source(parts[1]):
+                changes.removed.append(parts[1])
+        elif _is_source(parts[1]):
+            changes.added_or_modified.append(parts[1])
+
+    return changes
+
+
+def build_manifest(code_base: str, discovery: Discovery = None) -> Dict[str, List[float]]:
+    """
+    Snapshot of [mtime, size] for every source file the discovery finds under code_base.
+    """
+    manifest = {}
+    for item in (discovery or Discovery(code_base)).walk():
+        if not _is_source(item.relative_path):
+            continue
+        stat = os.stat(item.path)
+        manifest[item.relative_path] = [stat.st_mtime, stat.st_size]
+    return manifest
+
+
+def load_manifest(manifest_path: str):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path: str, manifest: Dict[str, List[float]]):
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def manifest_changes(previous: Dict[str, List[float]], current: Dict[str, List[float]]) -> ChangeSet:
+    """
+    Compares two manifests. A file is modified when its mtime or size differs.
+    """
+    changes = ChangeSet()
+    for path, stat in current.items():
+        if previous.get(path) != stat:
+            changes.added_or_modified.append(path)
+    for path in previous:
+        if path not in current:
+            changes.removed.append(path)
+    return changes
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = ".ingest_journal.sqlite"
+
+DISCOVERED = "discovered"
+EXTRACTED = "extracted"
+WRITTEN = "written"
+FAILED = "failed"
+
+
+def content_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointJournal:
+    """
+    Append-only SQLite journal of per-file ingest progress.
+
+    Every state change is a new row in `events` (never updated), so a crashed run
+    can be resumed and a running job can be inspected from another process.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("INGEST_JOURNAL_PATH", DEFAULT_JOURNAL_PATH)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code_base TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                discovery_done_at REAL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                content_hash TEXT,
+                error TEXT,
+                ts REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_run_path ON events (run_id, path, status);
+        """)
+        self._conn.commit()
+        self.run_id = None
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def start_run(self, code_base: str, resume: bool = False) -> int:
+        """
+        Starts a new run, or with resume continues the latest unfinished run for the code base.
+        """
+        if resume:
+            row = self._execute(
+                "SELECT run_id FROM runs WHERE code_base = ? AND finished_at IS NULL ORDER BY run_id DESC LIMIT 1",
+                (code_base,)
+            ).fetchone()
+            if row:
+                self.run_id = row[0]
+                print(f"Resuming ingest run {self.run_id}")
+                return self.run_id
+            print("No unfinished run to resume, starting a new one")
+
+        self.run_id = self._execute(
+            "INSERT INTO runs (code_base, started_at) VALUES (?, ?)", (code_base, time.time())
+        ).lastrowid
+        return self.run_id
+
+    def discovery_done(self):
+        self._execute("UPDATE runs SET discovery_done_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+
+    def finish_run(self):
+        self._execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), self.run_id))
+
+    def record(self, path: str, status: str, file_hash: str = None, error: str = None):
+        self._execute(
+            "INSERT INTO events (run_id, path, status, content_hash, error, ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_id, path, status, file_hash, error, time.time())
+        )
+
+    def record_written(self, paths):
+        """
+        Marks files as written, carrying over the hash recorded at discovery.
+        """
+        now = time.time()
+        with self._lock:
+            for path in paths:
+                self._conn.execute("""
+                    INSERT INTO events (run_id, path, status, content_hash, ts)
+                    SELECT run_id, path, ?, content_hash, ? FROM events
+                    WHERE run_id = ? AND path = ? AND status = ?
+                    ORDER BY id DESC LIMIT 1
+                """, (WRITTEN, now, self.run_id, path, DISCOVERED))
+            self._conn.commit()
+
+    def failed_files(self, code_base: str):
+        """
+        Paths whose latest event over every run of the code base is a failure, i.e.
+        files that failed and have not been written since.
+        """
+        rows = self._execute("""
+            SELECT e.path FROM events e
+            JOIN (SELECT ev.path, MAX(ev.id) AS id FROM events ev JOIN runs r ON r.run_id = ev.run_id
+                  WHERE r.code_base = ? GROUP BY ev.path) latest ON e.id = latest.id
+            WHERE e.status = ?
+            ORDER BY e.path
+        """, (code_base, FAILED)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_complete(self, path: str, file_hash: str) -> bool:
+        row = self._execute(
+            "SELECT 1 FROM events WHERE run_id = ? AND path = ? AND status = ? AND content_hash = ? LIMIT 1",
+            (self.run_id, path, WRITTEN, file_hash)
+        ).fetchone()
+        return row is not None
+
+    def status(self, run_id: int = None):
+        """
+        Progress summary of a run (latest run by default): files per latest status,
+        throughput over the last five minutes and ETA. None when there is no such run.
+        """
+        if run_id is None:
+            row = self._execute("SELECT MAX(run_id) FROM runs").fetchone()
+            run_id = row[0] if row else None
+        if run_id is None:
+            return None
+
+        run = self._execute(
+            "SELECT code_base, started_at, discovery_done_at, finished_at FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        #Unknown run id
+        if run is None:
+            return None
+        code_base, started_at, discovery_done_at, finished_at = run
+
+        #Latest status per file
+        counts = {DISCOVERED: 0, EXTRACTED: 0, WRITTEN: 0, FAILED: 0}
+        for status, count in self._execute("""
+            SELECT e.status, COUNT(*) FROM events e
+            JOIN (SELECT path, MAX(id) AS id FROM events WHERE run_id = ? GROUP BY path) latest ON e.id = latest.id
+            GROUP BY e.status
+        """, (run_id,)):
+            counts[status] = count
+        total = sum(counts.values())
+
+        now = finished_at or time.time()
+        window = 300
+        recent = self._execute(
+            "SELECT COUNT(*) FROM events WHERE run_id = ? AND status = ? AND ts >= ?",
+            (run_id, WRITTEN, now - window)
+        ).fetchone()[0]
+        throughput = recent / min(window, max(now - started_at, 1)) * 60
+        remaining = total - counts[WRITTEN] - counts[FAILED]
+        eta_seconds = remaining / throughput * 60 if throughput > 0 and not finished_at else None
+
+        return {
+            "run_id": run_id,
+            "code_base": code_base,
+            "started_at": started_at,
+            "finished": finished_at is not None,
+            "discovery_done": discovery_done_at is not None,
+            "files": total,
+            "counts": counts,
+            "files_per_minute": round(throughput, 1),
+            "eta_seconds": round(eta_seconds) if eta_seconds is not None else None,
+        }
@@ -0,0 +1,275 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterator, List, NamedTuple
+
+DEFAULT_DISCOVERY_WORKERS = 8
+
+#Work item kinds, each routed to its own extractor
+JAVA = "java"
+PYTHON = "python"
+
+#Directories that never hold source worth extracting
+DEFAULT_EXCLUDES = [
+    ".git/", ".svn/", ".hg/", ".idea/", ".vscode/", ".gradle/", ".mvn/", "node_modules/", "__pycache__/",
+    ".venv/", "venv/", ".tox/", ".pytest_cache/", ".mypy_cache/",
+]
+
+#Build output directories, only skipped next to a build file since packages may share the names
+BUILD_OUTPUT_DIRS = {"target", "build", "out", "bin"}
+BUILD_OUTPUT_MARKERS = {"pom.xml", "build.gradle", "build.gradle.kts", "setup.py", "pyproject.toml"}
+
+
+class WorkItem(NamedTuple):
+    """A discovered file. relative_path uses / separators and is relative to the code base."""
+    path: str
+    relative_path: str
+    kind: str
+
+
+def file_kind(file_name: str):
+    if file_name.endswith('.java'):
+        return JAVA
+    if file_name.endswith('.py'):
+        return PYTHON
+    return None
+
+
+def is_build_output(name: str, sibling_names) -> bool:
+    """True for a build output directory whose parent holds a Maven, Gradle or Python build file."""
+    return name in BUILD_OUTPUT_DIRS and not BUILD_OUTPUT_MARKERS.isdisjoint(sibling_names)
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    gitignore style glob: * and ? stay inside a path segment, ** spans segments.
+    """
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+            else:
+                regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+class IgnoreRule(NamedTuple):
+    regex: "re.Pattern"
+    negate: bool
+    dir_only: bool
+    #Directory of the .gitignore the rule came from, relative to the code base ("" for the root)
+    base: str
+
+
+def parse_ignore_patterns(lines, base: str = "") -> List[IgnoreRule]:
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        #A slash anywhere but the end anchors the pattern to the .gitignore directory
+        if "/" in line:
+            regex = "^" + _glob_to_regex(line.lstrip("/")) + "$"
+        else:
+            regex = "^(?:.*/)?" + _glob_to_regex(line) + "$"
+        rules.append(IgnoreRule(re.compile(regex), negate, dir_only, base))
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], relative_path: str, is_dir: bool) -> bool:
+    """Last matching rule wins, like git."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        path = relative_path
+        if rule.base:
+            if not relative_path.startswith(rule.base + "/"):
+                continue
+            path = relative_path[len(rule.base) + 1:]
+        if rule.regex.match(path):
+            ignored = not rule.negate
+    return ignored
+
+
+class DiscoveryStats:
+    """Aggregated discovery counters, printed once instead of a line per file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.kinds = {JAVA: 0, PYTHON: 0}
+        self.skipped_files = 0
+        self.ignored_files = 0
+        self.ignored_dirs = 0
+        self.directories = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    def summary(self) -> str:
+        kinds = ", ".join(f"{kind}: {count}" for kind, count in self.kinds.items())
+        return (f"Discovered {sum(self.kinds.values())} files ({kinds}) in {self.directories} directories "
+                f"in {self.seconds:.1f}s. Skipped: {self.skipped_files}, Ignored files: {self.ignored_files}, "
+                f"Ignored directories: {self.ignored_dirs}, Errors: {self.errors}")
+
+
+class Discovery:
+    """
+    Parallel os.scandir walk of a code base that honours .gitignore files (at any level),
+    default excludes and include/exclude globs, and yields typed WorkItems as directories
+    are scanned. Each directory is one task on a thread pool, its sub directories are
+    submitted as new tasks.
+    """
+
+    def __init__(self, code_base: str, include: List[str] = None, exclude: List[str] = None,
+                 kinds=None, workers: int = None, use_gitignore: bool = True):
+        self.code_base = code_base
+        self.kinds = set(kinds) if kinds else None
+        self.workers = workers or int(os.getenv("DISCOVERY_WORKERS", DEFAULT_DISCOVERY_WORKERS))
+        self.use_gitignore = use_gitignore
+        self.exclude_rules = parse_ignore_patterns(DEFAULT_EXCLUDES + list(exclude or []))
+        self.include_regexes = [re.compile("^(?:.*/)?" + _glob_to_regex(glob) + "$") if "/" not in glob
+                                else re.compile("^" + _glob_to_regex(glob.lstrip("/")) + "$")
+                                for glob in include or []]
+        self.stats = DiscoveryStats()
+
+    def _included(self, relative_path: str) -> bool:
+        return not self.include_regexes or any(regex.match(relative_path) for regex in self.include_regexes)
+
+    def _accepted_kind(self, file_name: str, relative_path: str):
+        """Kind of a file the walk would yield, None when it is skipped."""
+        kind = file_kind(file_name)
+        if kind is None or (self.kinds and kind not in self.kinds) or not self._included(relative_path):
+            return None
+        return kind
+
+    def _gitignore_rules(self, directory: str, relative_dir: str, rules: List[IgnoreRule]) -> List[IgnoreRule]:
+        if self.use_gitignore:
+            gitignore = os.path.join(directory, ".gitignore")
+            if os.path.isfile(gitignore):
+                with open(gitignore, 'r', encoding='utf-8', errors='ignore') as f:
+                    rules = rules + parse_ignore_patterns(f, relative_dir)
+        return rules
+
+    def _excluded(self, relative_path: str, is_dir: bool, rules: List[IgnoreRule]) -> bool:
+        return is_ignored(self.exclude_rules, relative_path, is_dir) or is_ignored(rules, relative_path, is_dir)
+
+    def work_item(self, relative_path: str):
+        """
+        WorkItem for a single path relative to the code base (e.g. from git diff), with the
+        same rules as the walk: None when a full walk would not yield the file.
+        """
+        parts = relative_path.split('/')
+        rules = []
+        for depth in range(len(parts)):
+            directory = os.path.join(self.code_base, *parts[:depth])
+            rules = self._gitignore_rules(directory, "/".join(parts[:depth]), rules)
+            path = "/".join(parts[:depth + 1])
+            is_dir = depth < len(parts) - 1
+            if self._excluded(path, is_dir, rules):
+                return None
+            if is_dir and parts[depth] in BUILD_OUTPUT_DIRS and is_build_output(parts[depth], os.listdir(directory)):
+                return None
+
+        kind = self._accepted_kind(parts[-1], relative_path)
+        if kind is None:
+            return None
+        return WorkItem(os.path.join(self.code_base, relative_path), relative_path, kind)
+
+    def _scan(self, directory: str, relative_dir: str, rules: List[IgnoreRule]):
+        """
+        Scans one directory. Returns (work_items, sub_directories, rules for sub directories).
+        """
+        items, sub_directories = [], []
+        skipped = ignored_files = ignored_dirs = 0
+
+        rules = self._gitignore_rules(directory, relative_dir, rules)
+
+        with os.scandir(directory) as entries:
+            entries = list(entries)
+        names = {entry.name for entry in entries}
+
+        for entry in entries:
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+
+            if self._excluded(relative_path, is_dir, rules) or (is_dir and is_build_output(entry.name, names)):
+                if is_dir:
+                    ignored_dirs += 1
+                else:
+                    ignored_files += 1
+                continue
+
+            if is_dir:
+                sub_directories.append((entry.path, relative_path))
+                continue
+
+            kind = self._accepted_kind(entry.name, relative_path)
+            if kind is None:
+                skipped += 1
+                continue
+            items.append(WorkItem(entry.path, relative_path, kind))
+
+        with self.stats.lock:
+            self.stats.directories += 1
+            self.stats.skipped_files += skipped
+            self.stats.ignored_files += ignored_files
+            self.stats.ignored_dirs += ignored_dirs
+            for item in items:
+                self.stats.kinds[item.kind] += 1
+        return items, sub_directories, rules
+
+    def walk(self) -> Iterator[WorkItem]:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="discover") as executor:
+            pending = {executor.submit(self._scan, self.code_base, "", [])}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        items, sub_directories, rules = future.result()
+                    except OSError as e:
+                        with self.stats.lock:
+                            self.stats.errors += 1
+                        print(f"Could not scan directory. Exception: {e}")
+                        continue
+                    for directory, relative_dir in sub_directories:
+                        pending.add(executor.submit(self._scan, directory, relative_dir, rules))
+                    yield from items
+
+        self.stats.seconds = time.monotonic() - self.stats.started
+        print(self.stats.summary())
@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List
+
+from pydantic import BaseModel
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_FLUSH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0
+DEFAULT_WRITE_RETRIES = 3
+
+#Queue sentinel marking the end of a stream
+_DONE = object()
+
+
+class PipelineResult(BaseModel):
+    """Outcome of a streaming run. Paths are relative to the code base."""
+    extracted: int = 0
+    written: int = 0
+    failed_files: List[str] = []
+    write_failures: int = 0
+
+
+class StreamingPipeline:
+    """
+    discovery -> extraction workers -> batched graph writer, connected by bounded queues.
+
+    Discovery blocks when the extraction queue is full and workers block when the
+    write queue is full, so memory stays flat regardless of repo size. The writer
+    flushes a micro-batch every `flush_size` results or `flush_interval` seconds,
+    whichever comes first.
+    """
+
+    def __init__(self, extract: Callable, write_batch: Callable, workers: int,
+                 queue_size: int = None, flush_size: int = None, flush_interval: float = None,
+                 write_retries: int = None, relative_path: Callable = None,
+                 on_written: Callable = None, on_failed: Callable = None):
+        self.extract = extract
+        self.write_batch = write_batch
+        self.workers = workers
+        self.flush_size = flush_size or int(os.getenv("PIPELINE_FLUSH_SIZE", DEFAULT_FLUSH_SIZE))
+        self.flush_interval = flush_interval or float(os.getenv("PIPELINE_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS))
+        self.write_retries = write_retries or DEFAULT_WRITE_RETRIES
+        self.relative_path = relative_path or (lambda path: path)
+        #Optional progress hooks: on_written(relative_paths), on_failed(relative_path, error)
+        self.on_written = on_written
+        self.on_failed = on_failed
+        queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self._paths = queue.Queue(maxsize=queue_size)
+        self._results = queue.Queue(maxsize=queue_size)
+        self._result = PipelineResult()
+
+    def _discover(self, files: Iterable[str]):
+        try:
+            for file_path in files:
+                self._paths.put(file_path)
+        except Exception as e:
+            print(f"File discovery failed. Exception: {e}")
+        finally:
+            for _ in range(self.workers):
+                self._paths.put(_DONE)
+
+    def _work(self):
+        while True:
+            file_path = self._paths.get()
+            if file_path is _DONE:
+                self._results.put(_DONE)
+                return
+            try:
+                self._results.put((file_path, self.extract(file_path), None))
+            except Exception as e:
+                self._results.put((file_path, None, e))
+
+    def _flush(self, batch, batch_paths):
+        for attempt in range(1, self.write_retries + 1):
+            try:
+                self.write_batch(batch)
+                self._result.written += len(batch)
+                print(f"Written {self._result.written} classes to Neo4j")
+                if self.on_written:
+                    self.on_written(batch_paths)
+                return
+            except Exception as e:
+                print(f"Error in saving batch to DB (attempt {attempt}/{self.write_retries}). Exception: {e}")
+                time.sleep(attempt)
+
+        #Keep going with the rest of the stream, the files are reported as failed
+        self._result.write_failures += 1
+        self._result.failed_files.extend(batch_paths)
+        if self.on_failed:
+            for path in batch_paths:
+                self.on_failed(path, "write failed")
+
+    def run(self, files: Iterable[str]) -> PipelineResult:
+        threads = [threading.Thread(target=self._discover, args=(files,), name="discover", daemon=True)]
+        threads += [threading.Thread(target=self._work, name=f"extract-{i}", daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        batch, batch_paths = [], []
+        finished_workers = 0
+        deadline = time.monotonic() + self.flush_interval
+        while finished_workers < self.workers:
+            try:
+                item = self._results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _DONE:
+                finished_workers += 1
+            elif item is not None:
+                file_path, metadata, error = item
+                if error is not None or metadata is None:
+                    print(f"Failed to extract metadata from {self.relative_path(file_path)}. Exception: {error}")
+                    self._result.failed_files.append(self.relative_path(file_path))
+                    if self.on_failed:
+                        self.on_failed(self.relative_path(file_path), str(error))
+                else:
+                    #Extractors return one CodeMetadata per class, or a list for multi-class files
+                    self._result.extracted += 1
+                    batch.extend(metadata if isinstance(metadata, list) else [metadata])
+                    batch_paths.append(self.relative_path(file_path))
+
+            if batch and (len(batch) >= self.flush_size or time.monotonic() >= deadline):
+                self._flush(batch, batch_paths)
+                batch, batch_paths = [], []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+        if batch:
+            self._flush(batch, batch_paths)
+
+        for thread in threads:
+            thread.join()
+        return self._result
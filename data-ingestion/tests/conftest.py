@@ -0,0 +1,5 @@
+import os
+import sys
+
+#Modules import each other from the data-ingestion root, as load_code.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,40 @@
+import pytest
+
+from parsing.java_parser import is_available, parse_java_structure
+
+pytestmark = pytest.mark.skipif(not is_available(), reason="javalang is not installed")
+
+SOURCE = """
+package com.app.service;
+
+{imports}
+import java.util.Map;
+import com.app.repository.UserRepository;
+
+public class UserService {{
+    private UserRepository userRepository;
+    private LocalDate created;
+    private Map.Entry<String, String> entry;
+
+    public User find(Helper helper) {{
+        return userRepository.find();
+    }}
+}}
+"""
+
+
+def internal_dependencies(imports: str):
+    metadata, _ = parse_java_structure(SOURCE.format(imports=imports), "UserService.java")
+    return metadata.internal_dependencies
+
+
+def test_nested_type_segments_are_not_dependencies():
+    assert "Entry" not in internal_dependencies("")
+
+
+def test_jdk_wildcard_import_hides_its_types():
+    assert internal_dependencies("import java.time.*;") == ["com.app.repository.UserRepository", "Helper", "User"]
+
+
+def test_unresolved_names_are_unknown_with_other_wildcard_imports():
+    assert internal_dependencies("import java.time.*;\nimport org.example.model.*;") == ["com.app.repository.UserRepository"]
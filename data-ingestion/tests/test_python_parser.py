@@ -0,0 +1,26 @@
+from parsing.python_parser import parse_python_file
+
+
+def write(path, content=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+def test_relative_import_of_a_submodule_resolves_to_the_submodule(tmp_path):
+    write(tmp_path / "app" / "__init__.py")
+    write(tmp_path / "app" / "services" / "__init__.py", "VERSION = 1\n")
+    write(tmp_path / "app" / "services" / "helpers.py", "def normalise(name):\n    return name\n")
+    write(tmp_path / "app" / "services" / "user.py",
+          "from . import helpers\n"
+          "from . import VERSION\n"
+          "\n"
+          "\n"
+          "class UserService:\n"
+          "    def rename(self, name):\n"
+          "        return helpers.normalise(name), VERSION\n")
+
+    records, _ = parse_python_file(str(tmp_path / "app" / "services" / "user.py"), "app/services/user.py")
+
+    service = records[0]
+    assert service.internal_dependencies == ["app.services", "app.services.helpers"]
+    assert service.methods[0].internal_dependencies == ["helpers", "services"]